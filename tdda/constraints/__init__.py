@@ -3,10 +3,25 @@ try:
 except ImportError:
     pd = None
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 if pd is not None:
     from tdda.constraints.pd.constraints import (discover_df,
                                                  verify_df,
-                                                 detect_df)
+                                                 verify_df_chunks,
+                                                 verify_parquet_file,
+                                                 detect_df,
+                                                 detect_df_chunks,
+                                                 compile_constraints,
+                                                 FailureIndex)
+
+if pd is not None and pa is not None:
+    from tdda.constraints.arrow.constraints import (discover_table,
+                                                    verify_table,
+                                                    detect_table)
 
 from tdda.constraints.db.constraints import (discover_db_table,
                                              verify_db_table,
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""
+TDDA constraint discovery, verification and detection for Apache Arrow
+tables, computed with ``pyarrow.compute``.
+
+The top-level functions are:
+
+    :py:func:`tdda.constraints.discover_table`:
+        Discover constraints from an Arrow table.
+
+    :py:func:`tdda.constraints.verify_table`:
+        Verify (check) an Arrow table, against a set of previously
+        discovered constraints.
+
+    :py:func:`tdda.constraints.detect_table`:
+        Detect failing records in an Arrow table.
+
+"""
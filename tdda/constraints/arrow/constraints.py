@@ -0,0 +1,986 @@
+# -*- coding: utf-8 -*-
+"""
+The :py:mod:`tdda.constraints.arrow.constraints` module provides an
+implementation of TDDA constraint discovery, verification and detection
+for Apache Arrow tables (``pyarrow.Table``).
+
+All of the statistics are calculated directly on the Arrow columns,
+using ``pyarrow.compute``, without converting the table to a Pandas
+DataFrame. This allows it to be used for data in parquet, feather (Arrow)
+and CSV files.
+
+The top-level functions are:
+
+    :py:func:`tdda.constraints.discover_table`:
+        Discover constraints from an Arrow table.
+
+    :py:func:`tdda.constraints.verify_table`:
+        Verify (check) an Arrow table, against a set of previously
+        discovered constraints.
+
+    :py:func:`tdda.constraints.detect_table`:
+        For detection of failing rows in an Arrow table,
+        verified against a set of previously discovered constraints,
+        and generate an output dataset containing
+        information about input rows which failed any of the constraints.
+
+"""
+import datetime
+import io
+import math
+import re
+import sys
+import threading
+
+from collections import Counter, OrderedDict
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pcsv
+import pyarrow.feather as pf
+import pyarrow.parquet as pq
+
+from tdda.constraints.base import (
+    STANDARD_FIELD_CONSTRAINTS,
+    native_definite,
+    DatasetConstraints,
+    Verification,
+    Detection,
+    fuzz_up, fuzz_down,
+)
+from tdda.constraints.baseconstraints import (
+    BaseConstraintCalculator,
+    BaseConstraintDetector,
+    BaseConstraintVerifier,
+    BaseConstraintDiscoverer,
+)
+from tdda.constraints.pd.constraints import (
+    columns_to_load,
+    file_format,
+    is_ver_field,
+    verification_field,
+)
+from tdda import rexpy
+
+
+DEBUG = False
+
+
+class ArrowConstraintCalculator(BaseConstraintCalculator):
+    """
+    Implementation of the Constraint Calculator methods for
+    Arrow tables.
+
+    Dictionary-encoded columns are decoded, and their non-null values
+    found, once per column, and kept, since most of the statistics use
+    them.
+    """
+    def __init__(self, table):
+        self.table = table
+        self.columns = {}
+        self.non_nulls = {}
+
+    def column(self, colname):
+        """
+        Returns the (decoded) column colname from the table, as a
+        ``pyarrow.ChunkedArray``.
+        """
+        if not colname in self.columns:
+            self.columns[colname] = arrow_column(self.table, colname)
+        return self.columns[colname]
+
+    def non_null_values(self, colname):
+        """
+        Returns the values in column colname that are neither null nor NaN.
+        """
+        if not colname in self.non_nulls:
+            self.non_nulls[colname] = non_null_values(self.column(colname))
+        return self.non_nulls[colname]
+
+    def is_null(self, value):
+        return arrow_is_null(value)
+
+    def to_datetime(self, value):
+        if isinstance(value, datetime.datetime):
+            return value
+        elif isinstance(value, datetime.date):
+            return datetime.datetime.combine(value, datetime.time())
+        elif isinstance(value, str):
+            try:
+                return datetime.datetime.fromisoformat(value)
+            except ValueError:
+                pass
+        return value
+
+    def get_column_names(self):
+        return self.table.column_names
+
+    def get_nrecords(self):
+        return self.table.num_rows
+
+    def types_compatible(self, x, y, colname=None):
+        return arrow_types_compatible(x, y, colname=colname)
+
+    def calc_min(self, colname):
+        return self.calc_min_max(colname)[0]
+
+    def calc_max(self, colname):
+        return self.calc_min_max(colname)[1]
+
+    def calc_min_max(self, colname):
+        col = self.column(colname)
+        if pa.types.is_null(col.type):
+            return (None, None)
+        mm = pc.min_max(col)
+        return (arrow_scalar(mm['min']), arrow_scalar(mm['max']))
+
+    def calc_min_length(self, colname):
+        return self.calc_min_max_length(colname)[0]
+
+    def calc_max_length(self, colname):
+        return self.calc_min_max_length(colname)[1]
+
+    def calc_min_max_length(self, colname):
+        col = self.column(colname)
+        if not is_string_type(col.type):
+            return (None, None)
+        mm = pc.min_max(pc.utf8_length(col))
+        return (mm['min'].as_py(), mm['max'].as_py())
+
+    def calc_tdda_type(self, colname):
+        return arrow_tdda_type(self.column(colname).type)
+
+    def calc_null_count(self, colname):
+        return self.get_nrecords() - self.calc_non_null_count(colname)
+
+    def calc_non_null_count(self, colname):
+        return len(self.non_null_values(colname))
+
+    def calc_nunique(self, colname):
+        values = self.non_null_values(colname)
+        if pa.types.is_null(values.type):
+            return 0
+        return pc.count_distinct(values).as_py()
+
+    def calc_unique_values(self, colname, include_nulls=True):
+        values = self.non_null_values(colname)
+        if pa.types.is_null(values.type):
+            uniques = []
+        else:
+            uniques = pc.unique(values)
+            uniques = uniques.take(pc.array_sort_indices(uniques)).to_pylist()
+        if include_nulls and self.calc_null_count(colname) > 0:
+            uniques.insert(0, None)
+        return uniques
+
+    def calc_profile(self, colname):
+        """
+        Profile a column from its distinct (non-null) values, found
+        with a single (hash-based) pass over it; the minimum, maximum
+        and (for strings) the sorted distinct values are then computed
+        from these, which are usually far fewer than the values in the
+        column.
+        """
+        col = self.column(colname)
+        values = self.non_null_values(colname)
+        profile = {
+            'null_count': len(col) - len(values),
+            'non_null_count': len(values),
+        }
+        if pa.types.is_null(values.type):
+            profile['nunique'] = 0
+            return profile
+        uniques = pc.unique(values)
+        profile['nunique'] = len(uniques)
+        mm = pc.min_max(uniques)
+        profile['min'] = arrow_scalar(mm['min'])
+        profile['max'] = arrow_scalar(mm['max'])
+        if is_string_type(col.type):
+            order = pc.array_sort_indices(uniques)
+            profile['non_null_uniques'] = uniques.take(order).to_pylist()
+        return profile
+
+    def calc_non_integer_values_count(self, colname):
+        values = self.non_null_values(colname)
+        if not pa.types.is_floating(values.type):
+            return 0
+        return pc.sum(pc.not_equal(pc.floor(values), values)).as_py() or 0
+
+    def calc_all_non_nulls_boolean(self, colname):
+        return (pa.types.is_boolean(self.column(colname).type)
+                or self.calc_non_null_count(colname) == 0)
+
+    def allowed_values_exclusions(self):
+        return [None]
+
+    def value_frequencies(self, colname):
+        """
+        Returns a Counter mapping each distinct non-null value in
+        column colname to the number of times it occurs.
+        """
+        values = self.non_null_values(colname)
+        if pa.types.is_null(values.type):
+            return Counter()
+        counts = pc.value_counts(values)
+        return Counter(dict(zip(counts.field('values').to_pylist(),
+                                counts.field('counts').to_pylist())))
+
+    def find_rexes(self, colname, values=None, seed=None, cache=None,
+                   executor=None):
+        if values is None:
+            values = self.value_frequencies(colname)
+        if executor:
+            return executor.submit(rexpy.extract, values, seed=seed,
+                                   cache=cache).result()
+        else:
+            return rexpy.extract(values, seed=seed, cache=cache)
+
+    def calc_rex_constraint(self, colname, constraint, detect=False):
+        # note that this should return a set of violations, not True/False.
+        rexes = constraint.value
+        if rexes is None:      # a null value is not considered
+            return None        # to be an active constraint,
+                               # so is always satisfied
+        values = self.non_null_values(colname)
+        if pa.types.is_null(values.type) or len(values) == 0:
+            return None
+        uniques = pc.unique(values)
+        unmatched = rex_unmatched(uniques, rexes)
+        failures = set()
+        for s in unmatched:
+            s = native_definite(s)
+            if not any(re.match(rexpy.cre(r), s) for r in rexes):
+                if DEBUG:
+                    print('*** Unmatched string: "%s"' % s)
+                if detect:
+                    failures.add(s)
+                else:
+                    return True  # At least one string didn't match
+        if detect:
+            return failures
+        else:
+            return None
+
+
+class ArrowConstraintDetector(BaseConstraintDetector):
+    """
+    Implementation of the Constraint Detector methods for
+    Arrow tables.
+
+    The result of checking each constraint is a boolean array, with a
+    value for each record in the table (or ``False``, if every record
+    fails), which is null for records with null values.
+    """
+    def __init__(self, table):
+        self.table = table
+        self.detect_lock = threading.Lock()
+        self.detected = {}
+        self.detection_order = {}
+
+    def set_detected(self, colname, kind, values):
+        """
+        Store the per-record results of checking the constraint of the
+        given kind on column colname, for the detection output.
+
+        Detection can happen in several threads at once (for different
+        columns), so the results are stored under a lock, with their
+        positions in the standard order (by input column, then by
+        constraint kind), for sorting them before output.
+        """
+        name = verification_field(colname, kind)
+        names = self.table.column_names
+        position = (names.index(colname) if colname in names else -1,
+                    STANDARD_FIELD_CONSTRAINTS.index(kind))
+        with self.detect_lock:
+            self.detected[name] = values
+            self.detection_order.setdefault(name, position)
+
+    def detect_min_constraint(self, colname, value, precision, epsilon):
+        c = self.column(colname)
+        if not arrow_types_compatible(self.get_min(colname), value):
+            self.set_detected(colname, 'min', False)
+        else:
+            if precision == 'closed' or arrow_tdda_type(c.type) == 'date':
+                ok = pc.greater_equal(c, value)
+            elif precision == 'open':
+                ok = pc.greater(c, value)
+            else:
+                ok = pc.greater_equal(c, fuzz_down(value, epsilon))
+            self.set_detected(colname, 'min', detection_array(c, ok))
+
+    def detect_max_constraint(self, colname, value, precision, epsilon):
+        c = self.column(colname)
+        if not arrow_types_compatible(self.get_max(colname), value):
+            self.set_detected(colname, 'max', False)
+        else:
+            if precision == 'closed' or arrow_tdda_type(c.type) == 'date':
+                ok = pc.less_equal(c, value)
+            elif precision == 'open':
+                ok = pc.less(c, value)
+            else:
+                ok = pc.less_equal(c, fuzz_up(value, epsilon))
+            self.set_detected(colname, 'max', detection_array(c, ok))
+
+    def detect_min_length_constraint(self, colname, value):
+        c = self.column(colname)
+        if not is_string_type(c.type):
+            self.set_detected(colname, 'min_length', False)
+        else:
+            ok = pc.greater_equal(pc.utf8_length(c), value)
+            self.set_detected(colname, 'min_length', detection_array(c, ok))
+
+    def detect_max_length_constraint(self, colname, value):
+        c = self.column(colname)
+        if not is_string_type(c.type):
+            self.set_detected(colname, 'max_length', False)
+        else:
+            ok = pc.less_equal(pc.utf8_length(c), value)
+            self.set_detected(colname, 'max_length', detection_array(c, ok))
+
+    def detect_tdda_type_constraint(self, colname, value):
+        self.set_detected(colname, 'type', False)
+
+    def detect_sign_constraint(self, colname, value):
+        c = self.column(colname)
+        if arrow_coarse_type(arrow_tdda_type(c.type)) != 'number':
+            self.set_detected(colname, 'sign', False)
+        elif value == 'null':
+            self.set_detected(colname, 'sign', False)
+        else:
+            compare = {
+                'positive': pc.greater,
+                'non-negative': pc.greater_equal,
+                'zero': pc.equal,
+                'non-positive': pc.less_equal,
+                'negative': pc.less,
+            }[value]
+            values = pc.cast(c, pa.int8()) if pa.types.is_boolean(c.type) else c
+            self.set_detected(colname, 'sign',
+                              detection_array(c, compare(values, 0)))
+
+    def detect_max_nulls_constraint(self, colname, value):
+        # found more nulls than are allowed, so mark all null values as bad
+        c = self.column(colname)
+        self.set_detected(colname, 'max_nulls',
+                          pc.invert(pc.is_null(c, nan_is_null=True)))
+
+    def detect_no_duplicates_constraint(self, colname, value):
+        # found duplicates, so mark anything duplicated as bad
+        c = self.column(colname)
+        counts = pc.value_counts(self.non_null_values(colname))
+        duplicated = counts.field('values').filter(
+            pc.greater(counts.field('counts'), 1))
+        unique = pc.invert(pc.is_in(c, value_set=duplicated))
+        self.set_detected(colname, 'no_duplicates',
+                          detection_array(c, unique, default=True))
+
+    def detect_allowed_values_constraint(self, colname, allowed_values,
+                                         violations):
+        c = self.column(colname)
+        bad = pa.array(list(violations), type=c.type)
+        self.set_detected(colname, 'allowed_values',
+                          detection_array(c, pc.invert(pc.is_in(c, bad))))
+
+    def detect_rex_constraint(self, colname, violations):
+        c = self.column(colname)
+        if not is_string_type(c.type):
+            self.set_detected(colname, 'rex', False)
+        else:
+            bad = pa.array(list(violations), type=c.type)
+            self.set_detected(colname, 'rex',
+                              detection_array(c, pc.invert(pc.is_in(c, bad))))
+
+    def write_detected_records(self,
+                               detect_outpath=None,
+                               detect_write_all=False,
+                               detect_per_constraint=False,
+                               detect_output_fields=None,
+                               detect_index=False,
+                               detect_in_place=False,
+                               rownumber_is_index=True,
+                               boolean_ints=False,
+                               interleave=False,
+                               **kwargs):
+        """
+        Writes the detection results to *detect_outpath* (if provided),
+        and returns a Detection object, whose ``obj`` is an Arrow table.
+
+        Arrow tables are immutable and have no index, so detection
+        can't be in place, and the row numbers written out (as
+        ``RowNumber``) always count records from 1.
+        """
+        if detect_in_place:
+            raise Exception('Cannot detect in place in an Arrow table.')
+        if kwargs.get('compact'):
+            raise Exception('Compact detection output is not supported '
+                            'for Arrow tables.')
+        nrecords = self.table.num_rows
+        order = sorted(self.detected, key=self.detection_order.get)
+        results = OrderedDict()
+        for name in order:
+            values = self.detected[name]
+            if not isinstance(values, (pa.Array, pa.ChunkedArray)):
+                values = pa.repeat(pa.scalar(values, type=pa.bool_()),
+                                   nrecords)
+            results[name] = values
+
+        nfailname = 'n_failures'
+        fails = pa.repeat(pa.scalar(0, type=pa.int64()), nrecords)
+        for values in results.values():
+            failed = pc.invert(pc.fill_null(values, True))
+            fails = pc.add(fails, pc.cast(failed, pa.int64()))
+        failing = pc.greater(fails, 0)
+        n_failing_records = pc.sum(failing).as_py() or 0
+        n_passing_records = nrecords - n_failing_records
+
+        if not detect_per_constraint:
+            results.clear()
+        results[nfailname] = fails
+
+        add_index = detect_index or detect_output_fields is None
+        if detect_output_fields is None:
+            detect_output_fields = []
+        elif len(detect_output_fields) == 0:
+            detect_output_fields = self.table.column_names
+        fields = OrderedDict()
+        for fname in detect_output_fields:
+            if fname in self.table.column_names:
+                fields[fname] = self.table.column(fname)
+            else:
+                raise Exception('Table has no column %s' % fname)
+        fields.update(results)
+        if interleave:
+            fields = self.interleave(fields, self.table.column_names,
+                                     nfailname)
+        out = pa.table(fields)
+
+        if not detect_write_all:
+            out = out.filter(failing)
+
+        if detect_outpath:
+            to_save = out
+            if add_index:
+                rownumbers = pa.array(range(1, nrecords + 1), type=pa.int64())
+                if not detect_write_all:
+                    rownumbers = pc.filter(rownumbers, failing)
+                to_save = to_save.add_column(0, unique_column_name(out,
+                                                                'RowNumber'),
+                                             rownumbers)
+            if boolean_ints and file_format(detect_outpath) in ('csv', 'psv',
+                                                                'tsv', 'txt'):
+                to_save = bools_to_ints(to_save)
+            save_table(to_save, detect_outpath)
+
+        return Detection(out, n_passing_records, n_failing_records)
+
+    def interleave(self, fields, orig_fields, nfailname):
+        if set(orig_fields) - set(fields):
+            return fields
+            # Only interleave if all of the original fields
+            # are in the output
+
+        all_vfields = set(fields) - set(orig_fields) - set([nfailname])
+        interleaved = OrderedDict()
+        for f in orig_fields:
+            interleaved[f] = fields[f]
+            for v in sorted(v for v in all_vfields if is_ver_field(v, f)):
+                interleaved[v] = fields[v]
+        interleaved[nfailname] = fields[nfailname]
+        return interleaved
+
+
+class ArrowConstraintVerifier(ArrowConstraintCalculator,
+                              ArrowConstraintDetector,
+                              BaseConstraintVerifier):
+    """
+    A :py:class:`ArrowConstraintVerifier` object provides methods
+    for verifying every type of constraint against an Arrow table.
+    """
+    threadsafe = True
+
+    def __init__(self, table, epsilon=None, type_checking=None, n_jobs=None):
+        ArrowConstraintCalculator.__init__(self, table)
+        ArrowConstraintDetector.__init__(self, table)
+        BaseConstraintVerifier.__init__(self, epsilon=epsilon,
+                                        type_checking=type_checking,
+                                        n_jobs=n_jobs)
+
+    def verify_tdda_type_constraint(self, colname, constraint, detect=False):
+        """
+        Verify whether a given column satisfies the supplied type constraint.
+
+        Arrow integer columns can contain nulls, but the same column in
+        a Pandas DataFrame would be real, and constraints discovered from
+        it would say so. So, with sloppy type checking, an integer column
+        with nulls also satisfies a ``real`` type constraint.
+        """
+        result = BaseConstraintVerifier.verify_tdda_type_constraint(
+            self, colname, constraint, detect=False)
+        if (not result and self.type_checking == 'sloppy'
+                and self.column_exists(colname)
+                and self.get_tdda_type(colname) == 'int'
+                and self.get_null_count(colname) > 0):
+            required_type = constraint.value
+            result = ('real' in required_type
+                      if type(required_type) in (list, tuple)
+                      else required_type == 'real')
+        if detect and not bool(result):
+            self.detect_tdda_type_constraint(colname, constraint.value)
+        return result
+
+
+class ArrowVerification(Verification):
+    """
+    A :py:class:`ArrowVerification` object adds a :py:meth:`to_table()`
+    method to a :py:class:`tdda.constraints.base.Verification` object.
+
+    This allows the result of constraint verification to be converted to
+    an Arrow table, including columns for the field (column) name,
+    the numbers of passes and failures and boolean columns for each
+    constraint, with values:
+
+    - ``True``       --- if the constraint was satified for the column
+    - ``False``      --- if column failed to satisfy the constraint
+    - ``null``       --- if there was no constraint of this kind
+    """
+    def __init__(self, *args, **kwargs):
+        Verification.__init__(self, *args, **kwargs)
+
+    def to_table(self):
+        """
+        Converts object to an Arrow table.
+        """
+        fields = self.fields
+        columns = OrderedDict((
+            ('field', list(fields.keys())),
+            ('failures', [v.failures for k, v in fields.items()]),
+            ('passes', [v.passes for k, v in fields.items()]),
+        ))
+        kinds_used = set([])
+        for field, constraints in fields.items():
+            kinds_used = kinds_used.union(set(list(constraints.keys())))
+        base_kinds = [k for k in STANDARD_FIELD_CONSTRAINTS if k in kinds_used]
+        other_kinds = [k for k in kinds_used if not k in base_kinds]
+        for kind in base_kinds + other_kinds:
+            columns[kind] = pa.array([fields[field].get(kind)
+                                      for field in fields], type=pa.bool_())
+        return pa.table(columns)
+
+
+class ArrowDetection(ArrowVerification):
+    """
+    A :py:class:`ArrowDetection` object adds a :py:meth:`detected()`
+    method to a :py:class:`ArrowVerification` object.
+
+    This allows the Arrow table resulting from constraint detection
+    to be made available.
+    """
+    def __init__(self, *args, **kwargs):
+        ArrowVerification.__init__(self, *args, **kwargs)
+
+    def detected(self):
+        """
+        Returns an Arrow table containing the detection results.
+
+        If there are no failing records, and the detection was not run
+        with the `write_all` flag set, then ``None`` is returned.
+        """
+        return self.detection.obj if self.detection else None
+
+
+class ArrowConstraintDiscoverer(ArrowConstraintCalculator,
+                                BaseConstraintDiscoverer):
+    """
+    A :py:class:`ArrowConstraintDiscoverer` object is used to discover
+    constraints on an Arrow table.
+    """
+    threadsafe = True
+
+    def __init__(self, table, inc_rex=False, seed=None, rex_cache=None,
+                 n_jobs=None):
+        ArrowConstraintCalculator.__init__(self, table)
+        BaseConstraintDiscoverer.__init__(self, inc_rex=inc_rex, seed=seed,
+                                          rex_cache=rex_cache, n_jobs=n_jobs)
+
+
+def arrow_column(table, colname):
+    """
+    Returns column colname from an Arrow table, decoding it if it is
+    dictionary-encoded (as categorical columns from Pandas usually are).
+    """
+    col = table.column(colname)
+    if pa.types.is_dictionary(col.type):
+        col = col.cast(col.type.value_type)
+    return col
+
+
+def non_null_values(col):
+    """
+    Returns the values in an Arrow column that are not null, treating
+    NaN (which is a value in Arrow, but null in Pandas) as null.
+    """
+    if col.null_count == 0 and not pa.types.is_floating(col.type):
+        return col
+    return col.filter(pc.invert(pc.is_null(col, nan_is_null=True)))
+
+
+def is_string_type(t):
+    return pa.types.is_string(t) or pa.types.is_large_string(t)
+
+
+def arrow_tdda_type(t):
+    """
+    Returns the TDDA type of an Arrow column, from its (Arrow) type.
+
+    Basic TDDA types are one of 'bool', 'int', 'real', 'string' or 'date'.
+
+    Columns that are entirely null (of Arrow's null type) are 'string',
+    as there is no way to tell what they would be; anything else not
+    recognized as one of these is 'other'.
+    """
+    if pa.types.is_dictionary(t):
+        t = t.value_type
+    if pa.types.is_boolean(t):
+        return 'bool'
+    elif pa.types.is_integer(t):
+        return 'int'
+    elif pa.types.is_floating(t) or pa.types.is_decimal(t):
+        return 'real'
+    elif is_string_type(t) or pa.types.is_null(t):
+        return 'string'
+    elif pa.types.is_timestamp(t) or pa.types.is_date(t):
+        return 'date'
+    else:
+        return 'other'
+
+
+def python_tdda_type(x):
+    """
+    Returns the TDDA type of a Python scalar value, or 'null' for ``None``.
+    """
+    if x is None:
+        return 'null'
+    elif type(x) is bool:
+        return 'bool'
+    elif isinstance(x, int):
+        return 'int'
+    elif isinstance(x, float):
+        return 'null' if math.isnan(x) else 'real'
+    elif isinstance(x, str):
+        return 'string'
+    elif isinstance(x, (datetime.datetime, datetime.date)):
+        return 'date'
+    else:
+        return 'other'
+
+
+def arrow_coarse_type(t):
+    """
+    Returns the TDDA coarse type corresponding to the TDDA type t.
+    The coarse types combine ``bool``, ``int`` and ``real`` into ``number``.
+    """
+    return 'number' if t in ('bool', 'int', 'real') else t
+
+
+def arrow_types_compatible(x, y, colname=None):
+    """
+    Returns boolean indicating whether the coarse_type of *x* and *y* are
+    the same, for scalar values.
+
+    If *colname* is provided, and the check fails, a warning is issued
+    to stderr.
+    """
+    ok = (arrow_coarse_type(python_tdda_type(x))
+          == arrow_coarse_type(python_tdda_type(y)))
+    if not ok and colname:
+        print('Warning: Failing incompatible types constraint for field %s '
+              'of type %s.\n(Constraint value %s of type %s.)'
+              % (colname, type(x), y, type(y)), file=sys.stderr)
+    return ok
+
+
+def arrow_is_null(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def arrow_scalar(s):
+    """
+    Converts an Arrow scalar (e.g. a minimum or maximum) to the
+    corresponding Python value. Dates are converted to datetimes,
+    as with Pandas, and timestamps to Python datetimes (microseconds).
+    """
+    if pa.types.is_timestamp(s.type) and s.type.unit == 'ns':
+        s = s.cast(pa.timestamp('us', s.type.tz), safe=False)
+    v = s.as_py()
+    if (isinstance(v, datetime.date)
+            and not isinstance(v, datetime.datetime)):
+        v = datetime.datetime.combine(v, datetime.time())
+    return v
+
+
+def detection_array(col, ok, default=None):
+    """
+    Construct the boolean array for a detection result, from the result
+    of a comparison (ok); records for which the column value is null
+    (or NaN) get the default value (null, unless specified).
+    """
+    null = pc.is_null(col, nan_is_null=True)
+    if pc.any(null).as_py():
+        return pc.if_else(null, pa.scalar(default, type=pa.bool_()), ok)
+    else:
+        return ok
+
+
+def rex_unmatched(values, rexes):
+    """
+    Returns the values (strings, as an Arrow array) that don't match any
+    of the regular expressions provided, as a list.
+
+    The regular expressions are combined and matched using Arrow's
+    regular expression engine (RE2), and any values that don't match
+    are then checked again using Python's re module by the caller,
+    since RE2's classes (like \\d) are ASCII-only and its $ doesn't match
+    before a final newline. If RE2 can't compile the expressions (e.g.
+    because they use lookahead), all of the values are returned.
+    """
+    pattern = '(?s)%s' % '|'.join('(?:%s)' % r for r in rexes)
+    try:
+        matched = pc.match_substring_regex(values, pattern)
+    except pa.ArrowInvalid:
+        return values.to_pylist()
+    return values.filter(pc.invert(matched)).to_pylist()
+
+
+def unique_column_name(table, name):
+    """
+    Generate a column name that is not already present in the table.
+    """
+    i = 1
+    newname = name
+    while newname in table.column_names:
+        i += 1
+        newname = '%s_%d' % (name, i)
+    return newname
+
+
+def bools_to_ints(table):
+    """
+    Returns a table with the boolean columns of the one provided
+    converted to integers (1 for true and 0 for false).
+    """
+    for i, field in enumerate(table.schema):
+        if pa.types.is_boolean(field.type):
+            table = table.set_column(i, field.name,
+                                     pc.cast(table.column(i), pa.int8()))
+    return table
+
+
+def verify_table(table, constraints_path, epsilon=None, type_checking=None,
+                 report='all', n_jobs=None, **kwargs):
+    """
+    Verify that (i.e. check whether) the Arrow table provided
+    satisfies the constraints in the JSON ``.tdda`` file provided.
+
+    Mandatory Inputs:
+
+        *table*:
+                            A ``pyarrow.Table``, to be checked.
+
+        *constraints_path*:
+                            The path to a JSON ``.tdda`` file
+                            containing constraints to be checked.
+                            Or, alternatively, an in-memory dictionary
+                            containing the structured contents of a ``.tdda``
+                            file.
+
+    Optional Inputs:
+
+        *epsilon*, *type_checking*, *report*, *n_jobs*:
+                            As for :py:func:`tdda.constraints.verify_df`.
+
+                            Arrow columns keep their types (integer
+                            columns with nulls stay integer, for example),
+                            so there is nothing to repair; with ``sloppy``
+                            type checking (the default) constraints
+                            discovered from the same data in Pandas
+                            are still satisfied.
+
+    Returns:
+
+        :py:class:`~tdda.constraints.arrow.constraints.ArrowVerification`
+        object.
+
+    Example usage::
+
+        import pyarrow.parquet as pq
+        from tdda.constraints import verify_table
+
+        table = pq.read_table('example.parquet')
+        v = verify_table(table, 'example_constraints.tdda')
+        print(str(v))
+        print(v.to_table())
+
+    """
+    av = ArrowConstraintVerifier(table, epsilon=epsilon,
+                                 type_checking=type_checking, n_jobs=n_jobs)
+    constraints = load_constraints(constraints_path)
+    return av.verify(constraints, VerificationClass=ArrowVerification,
+                     report=report, **kwargs)
+
+
+def detect_table(table, constraints_path, epsilon=None, type_checking=None,
+                 outpath=None, write_all=False, per_constraint=False,
+                 output_fields=None, index=False, boolean_ints=False,
+                 report='records', n_jobs=None, **kwargs):
+    """
+    Check the records from the Arrow table provided, to detect
+    records that fail any of the constraints in the JSON ``.tdda`` file
+    provided. This is anomaly detection.
+
+    The parameters are as for :py:func:`tdda.constraints.detect_df`,
+    except that detection can't be *in_place* (Arrow tables are
+    immutable), and there is no *repair*. Row numbers in the output
+    (``RowNumber``) count records from 1.
+
+    Returns:
+
+        :py:class:`~tdda.constraints.arrow.constraints.ArrowDetection`
+        object, whose :py:meth:`~ArrowDetection.detected()` method returns
+        the Arrow table containing the detection results.
+
+    Example usage::
+
+        import pyarrow.parquet as pq
+        from tdda.constraints import detect_table
+
+        table = pq.read_table('example.parquet')
+        v = detect_table(table, 'example_constraints.tdda',
+                         outpath='failures.parquet', per_constraint=True)
+        print(v.detected())
+
+    """
+    av = ArrowConstraintVerifier(table, epsilon=epsilon,
+                                 type_checking=type_checking, n_jobs=n_jobs)
+    constraints = load_constraints(constraints_path)
+    return av.detect(constraints, VerificationClass=ArrowDetection,
+                     outpath=outpath, write_all=write_all,
+                     per_constraint=per_constraint,
+                     output_fields=output_fields, index=index,
+                     boolean_ints=boolean_ints, report=report, **kwargs)
+
+
+def discover_table(table, inc_rex=False, table_path=None, seed=None,
+                   rex_cache=None, n_jobs=None):
+    """
+    Automatically discover potentially useful constraints that characterize
+    the Arrow table provided.
+
+    The parameters are as for :py:func:`tdda.constraints.discover_df`,
+    with *table_path* being the path from which the table was loaded,
+    if any.
+
+    The constraints are the same as would be discovered from the
+    corresponding Pandas DataFrame, except that integer columns with
+    nulls have type ``int`` (rather than ``real``), and so can have
+    ``no_duplicates`` constraints.
+
+    Example usage::
+
+        import pyarrow.parquet as pq
+        from tdda.constraints import discover_table
+
+        table = pq.read_table('example.parquet')
+        constraints = discover_table(table)
+        with open('example_constraints.tdda', 'w') as f:
+            f.write(constraints.to_json())
+
+    """
+    disco = ArrowConstraintDiscoverer(table, inc_rex=inc_rex, seed=seed,
+                                      rex_cache=rex_cache, n_jobs=n_jobs)
+    constraints = disco.discover()
+    if constraints:
+        constraints.set_dates_user_host_creator()
+        constraints.set_source(table_path)
+        constraints.set_stats(n_records=table.num_rows,
+                              n_selected=table.num_rows)
+    return constraints
+
+
+def load_constraints(constraints_path):
+    if isinstance(constraints_path, dict):
+        constraints = DatasetConstraints()
+        constraints.initialize_from_dict(native_definite(constraints_path))
+        return constraints
+    else:
+        return DatasetConstraints(loadpath=constraints_path)
+
+
+def load_table(path, columns=None):
+    """
+    Load an Arrow table from a parquet, feather (Arrow IPC) or CSV file.
+
+    Any index columns stored in a parquet file written from Pandas are
+    dropped, since these are not data columns.
+
+    If *columns* is provided, only the columns with those names are
+    read (in the order they appear in the file); names that are not
+    in the file are ignored.
+    """
+    fmt = file_format(path)
+    if fmt == 'parquet':
+        table = pq.read_table(path,
+                              columns=present_columns(pq.read_schema(path),
+                                                      columns))
+        metadata = table.schema.pandas_metadata or {}
+        index_cols = [c for c in metadata.get('index_columns', [])
+                      if isinstance(c, str) and c in table.column_names]
+        return table.drop_columns(index_cols) if index_cols else table
+    elif fmt in ('feather', 'arrow', 'ipc'):
+        table = pf.read_table(path, memory_map=True)
+        if columns is not None:
+            table = table.select(present_columns(table.schema, columns))
+        return table
+    elif fmt in ('csv', 'psv', 'tsv', 'txt'):
+        delimiter = {'psv': '|', 'tsv': '\t'}.get(fmt, ',')
+        parse_options = pcsv.ParseOptions(delimiter=delimiter)
+        convert_options = None
+        if columns is not None:
+            with pcsv.open_csv(path, parse_options=parse_options) as reader:
+                names = present_columns(reader.schema, columns)
+            convert_options = pcsv.ConvertOptions(include_columns=names)
+        return pcsv.read_csv(path, parse_options=parse_options,
+                             convert_options=convert_options)
+    else:
+        raise Exception(f'Unknown input format: {fmt}')
+
+
+def present_columns(schema, columns):
+    """
+    Returns the names of the fields in the Arrow *schema* that are in
+    *columns*, in schema order, or None if *columns* is None.
+    """
+    if columns is None:
+        return None
+    wanted = set(columns)
+    return [name for name in schema.names if name in wanted]
+
+
+def save_table(table, path):
+    """
+    Save an Arrow table as a parquet, feather or CSV file, or as CSV
+    to standard output if the path is ``-`` (or ``None``).
+    """
+    if path == '-' or path is None:
+        buf = io.BytesIO()
+        pcsv.write_csv(table, buf)
+        print(buf.getvalue().decode('UTF-8'), end='')
+        return
+    fmt = file_format(path)
+    if fmt == 'parquet':
+        pq.write_table(table, path)
+    elif fmt in ('feather', 'arrow', 'ipc'):
+        pf.write_feather(table, path)
+    elif fmt in ('csv', 'psv', 'tsv', 'txt'):
+        pcsv.write_csv(table, path)
+    else:
+        raise Exception(f'Unknown output format: {fmt}')
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+Support for Arrow constraint detection from the command-line tool
+
+Detect records in parquet, feather (Arrow) and CSV files, loaded as
+Arrow tables, that fail constraints from a .tdda JSON constraints file.
+"""
+
+USAGE = '''
+
+Parameters:
+
+  * input is one of:
+
+      - a .parquet file
+      - a .feather or .arrow (Arrow IPC) file
+      - a csv file
+
+  * constraints.tdda, if provided, is a JSON .tdda file constaining
+    constraints.
+
+  * name of output file (.csv, .parquet, .feather or .arrow)
+    where detection results are to be written.
+    Can be - (or missing) to write to standard output.
+
+  * --arrow
+      Use the Arrow backend, rather than Pandas. This is the default
+      for .arrow files.
+
+'''
+
+import os
+import sys
+
+from tdda import __version__
+from tdda.constraints.flags import detect_parser, detect_flags
+from tdda.constraints.arrow.constraints import (detect_table, load_table,
+                                                columns_to_load)
+
+
+def detect_table_from_file(table_path, constraints_path, outpath,
+                           verbose=True, **kwargs):
+    if constraints_path is None:
+        (stem, ext) = os.path.splitext(table_path)
+        constraints_path = stem + '.tdda'
+
+    columns = columns_to_load(constraints_path, kwargs.get('output_fields'))
+    table = load_table(table_path, columns=columns)
+    kwargs.pop('in_place', None)    # Arrow tables are immutable
+    v = detect_table(table, constraints_path, outpath=outpath, **kwargs)
+    if verbose and outpath is not None and outpath != '-':
+        print(v)
+    return v
+
+
+def arrow_detect_parser():
+    parser = detect_parser(USAGE)
+    parser.add_argument('input', help='parquet, feather (Arrow) or CSV file')
+    parser.add_argument('constraints', nargs='?',
+                        help='constraints file to verify against')
+    parser.add_argument('outpath', nargs='?',
+                        help='file to write detection results to')
+    parser.add_argument('--arrow', action='store_true',
+                        help='use the Arrow backend')
+    return parser
+
+
+def arrow_detect_params(args):
+    parser = arrow_detect_parser()
+    params = {}
+    flags = detect_flags(parser, args, params)
+    params['table_path'] = flags.input
+    params['constraints_path'] = flags.constraints
+    params['outpath'] = flags.outpath
+    return params
+
+
+class ArrowDetector:
+    def __init__(self, argv, verbose=False):
+        self.argv = argv
+        self.verbose = verbose
+
+    def detect(self):
+        params = arrow_detect_params(self.argv[1:])
+        path = params['table_path']
+        if path is None or not os.path.isfile(path):
+            print('%s does not exist' % path)
+            sys.exit(1)
+        return detect_table_from_file(verbose=self.verbose, **params)
+
+
+def main(argv, verbose=True):
+    if len(argv) > 1 and argv[1] in ('-v', '--version'):
+        print(__version__)
+        sys.exit(0)
+    v = ArrowDetector(argv)
+    v.detect()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+"""
+Support for Arrow constraint discovery from the command-line tool
+
+Discover TDDA constraints for parquet, feather (Arrow) and CSV files,
+loaded as Arrow tables, and save the generated constraints as a .tdda
+JSON file.
+"""
+
+USAGE = '''
+
+Parameters:
+
+  * input is one of:
+
+    - a .parquet file
+    - a .feather or .arrow (Arrow IPC) file
+    - a csv file
+
+  * constraints.tdda, if provided, specifies the name of a file to
+    which the generated constraints will be written.  Can be - (or missing)
+    to write to standard output.
+
+  * --arrow
+      Use the Arrow backend, rather than Pandas. This is the default
+      for .arrow files.
+
+'''
+
+import os
+import sys
+
+from tdda import __version__
+from tdda.constraints.flags import discover_parser, discover_flags
+from tdda.constraints.arrow.constraints import discover_table, load_table
+
+
+def discover_table_from_file(table_path, constraints_path, verbose=True,
+                             **kwargs):
+    table = load_table(table_path)
+    constraints = discover_table(table, table_path=table_path, **kwargs)
+    if constraints is None:
+        # should never happen
+        return
+
+    output = constraints.to_json(tddafile=constraints_path)
+    if constraints_path and constraints_path != '-':
+        with open(constraints_path, 'w') as f:
+            f.write(output)
+    elif verbose or constraints_path == '-':
+        print(output)
+    return output
+
+
+def arrow_discover_parser():
+    parser = discover_parser(USAGE)
+    parser.add_argument('input', nargs=1,
+                        help='parquet, feather (Arrow) or CSV file')
+    parser.add_argument('constraints', nargs='?',
+                        help='name of constraints file to create')
+    parser.add_argument('--arrow', action='store_true',
+                        help='use the Arrow backend')
+    return parser
+
+
+def arrow_discover_params(args):
+    parser = arrow_discover_parser()
+    params = {}
+    flags = discover_flags(parser, args, params)
+    params['table_path'] = flags.input[0] if flags.input else None
+    params['constraints_path'] = flags.constraints
+    return params
+
+
+class ArrowDiscoverer:
+    def __init__(self, argv, verbose=False):
+        self.argv = argv
+        self.verbose = verbose
+
+    def discover(self):
+        params = arrow_discover_params(self.argv[1:])
+        path = params['table_path']
+        if path is None or not os.path.isfile(path):
+            print('%s does not exist' % path)
+            sys.exit(1)
+        return discover_table_from_file(verbose=self.verbose, **params)
+
+
+def main(argv, verbose=True):
+    if len(argv) > 1 and argv[1] in ('-v', '--version'):
+        print(__version__)
+        sys.exit(0)
+    d = ArrowDiscoverer(argv)
+    d.discover()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
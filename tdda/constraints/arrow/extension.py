@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""
+Extensions to the ``tdda`` command line tool, to support Arrow tables,
+computed with ``pyarrow.compute`` rather than Pandas.
+
+The Arrow backend is used for ``.arrow`` (Arrow IPC) files, and for
+parquet, feather and CSV files when the ``--arrow`` flag is given.
+"""
+
+import os
+import sys
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+from tdda.constraints.extension import ExtensionBase
+
+if pyarrow is not None:
+    from tdda.constraints.arrow.discover import ArrowDiscoverer
+    from tdda.constraints.arrow.verify import ArrowVerifier
+    from tdda.constraints.arrow.detect import ArrowDetector
+
+
+ARROW_EXTENSIONS = ('.arrow', '.ipc')
+ARROW_FLAG_EXTENSIONS = ('.parquet', '.feather', '.csv', '.psv', '.tsv')
+
+
+class TDDAArrowExtension(ExtensionBase):
+    def __init__(self, argv, verbose=False):
+        ExtensionBase.__init__(self, argv, verbose=verbose)
+
+    def applicable(self):
+        if pyarrow is None:
+            return False
+        arrow = '--arrow' in self.argv
+        for a in self.argv:
+            (stem, ext) = os.path.splitext(a)
+            if (ext in ARROW_EXTENSIONS
+                    or (arrow and ext in ARROW_FLAG_EXTENSIONS)):
+                return True
+        return False
+
+    def help(self, stream=sys.stdout):
+        print('  - Arrow tables (filename.arrow, or with --arrow, '
+              'filename.parquet or filename.csv)', file=stream)
+
+    def spec(self):
+        return 'an .arrow file, or a parquet or CSV file with --arrow'
+
+    def discover(self):
+        return ArrowDiscoverer(self.argv, verbose=self.verbose).discover()
+
+    def verify(self):
+        return ArrowVerifier(self.argv, verbose=self.verbose).verify()
+
+    def detect(self):
+        return ArrowDetector(self.argv, verbose=self.verbose).detect()
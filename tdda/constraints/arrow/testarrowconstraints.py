@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test Suite for the Arrow constraints backend
+"""
+
+import datetime
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+
+from tdda.constraints.base import (
+    DatasetConstraints,
+    FieldConstraints,
+    TypeConstraint,
+    MinConstraint,
+    MaxConstraint,
+    SignConstraint,
+    MaxNullsConstraint,
+    NoDuplicatesConstraint,
+    AllowedValuesConstraint,
+    RexConstraint,
+)
+from tdda.constraints.arrow import constraints as arc
+from tdda.constraints.arrow.constraints import (load_table, discover_table,
+                                                verify_table, detect_table)
+from tdda.constraints.arrow.extension import TDDAArrowExtension
+from tdda.constraints.pd.constraints import (load_df, discover_df, verify_df,
+                                             detect_df)
+from tdda.referencetest import ReferenceTestCase
+
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+TESTDATA_DIR = os.path.join(os.path.dirname(THIS_DIR), 'testdata')
+
+
+def comparable(df):
+    """
+    Returns a DataFrame with all nulls as None, for comparing the
+    values from two DataFrames regardless of their dtypes.
+    """
+    df = df.astype(object)
+    return df.where(df.notnull(), None)
+
+
+class TestArrowConstraintCalculator(ReferenceTestCase):
+    def setUp(self):
+        self.table = pa.table({
+            'i': [3, 1, None, 1],
+            'r': [1.5, float('nan'), -2.0, 1.5],
+            's': ['b', None, 'a', 'b'],
+            'c': pa.array(['y', 'x', None, 'x']).dictionary_encode(),
+            'b': [True, False, None, True],
+            'd': pa.array([datetime.datetime(2024, 1, 2), None,
+                           datetime.datetime(2024, 1, 1), None],
+                          type=pa.timestamp('ns')),
+            'n': pa.nulls(4),
+        })
+        self.calc = arc.ArrowConstraintCalculator(self.table)
+
+    def testTypes(self):
+        types = {c: self.calc.calc_tdda_type(c)
+                 for c in self.table.column_names}
+        self.assertEqual(types, {'i': 'int', 'r': 'real', 's': 'string',
+                                 'c': 'string', 'b': 'bool', 'd': 'date',
+                                 'n': 'string'})
+
+    def testCounts(self):
+        calc = self.calc
+        self.assertEqual(calc.calc_null_count('i'), 1)
+        self.assertEqual(calc.calc_null_count('r'), 1)     # NaN is null
+        self.assertEqual(calc.calc_null_count('n'), 4)
+        self.assertEqual(calc.calc_nunique('r'), 2)
+        self.assertEqual(calc.calc_nunique('c'), 2)
+        self.assertEqual(calc.calc_nunique('n'), 0)
+        self.assertEqual(calc.calc_unique_values('s'), [None, 'a', 'b'])
+        self.assertEqual(calc.calc_unique_values('c', include_nulls=False),
+                         ['x', 'y'])
+
+    def testMinMax(self):
+        calc = self.calc
+        self.assertEqual(calc.calc_min('i'), 1)
+        self.assertEqual(calc.calc_max('r'), 1.5)
+        self.assertEqual(calc.calc_min('d'), datetime.datetime(2024, 1, 1))
+        self.assertIs(type(calc.calc_max('d')), datetime.datetime)
+        self.assertIsNone(calc.calc_min('n'))
+        self.assertEqual(calc.calc_min_length('c'), 1)
+        self.assertEqual(calc.calc_max_length('s'), 1)
+
+    def testProfile(self):
+        calc = self.calc
+        for col in self.table.column_names:
+            profile = calc.calc_profile(col)
+            self.assertEqual(profile['null_count'],
+                             calc.calc_null_count(col))
+            self.assertEqual(profile['non_null_count'],
+                             calc.calc_non_null_count(col))
+            self.assertEqual(profile['nunique'], calc.calc_nunique(col))
+            if col != 'n':
+                self.assertEqual(profile['min'], calc.calc_min(col))
+                self.assertEqual(profile['max'], calc.calc_max(col))
+        for col in ('s', 'c'):
+            self.assertEqual(calc.calc_profile(col)['non_null_uniques'],
+                             calc.calc_unique_values(col,
+                                                     include_nulls=False))
+
+    def testRex(self):
+        table = pa.table({'s': ['a1', 'b2', 'c٣', 'dd', None]})
+        calc = arc.ArrowConstraintCalculator(table)
+        rex = RexConstraint(['^[a-z]\\d$'])
+        # ٣ is an (Arabic-Indic) digit for Python's re, but not RE2
+        self.assertEqual(calc.calc_rex_constraint('s', rex, detect=True),
+                         {'dd'})
+        self.assertTrue(calc.calc_rex_constraint('s', rex))
+        lookahead = RexConstraint(['^(?=[a-c])[a-z]\\d$'])  # Python re only
+        self.assertEqual(calc.calc_rex_constraint('s', lookahead,
+                                                  detect=True),
+                         {'dd'})
+        self.assertIsNone(calc.calc_rex_constraint('s',
+                                                   RexConstraint(['^..$'])))
+
+
+class TestArrowTableConstraints(ReferenceTestCase):
+    def testIntWithNullsSatisfiesReal(self):
+        table = pa.table({'a': [1, None, 3]})
+        constraints = DatasetConstraints([
+            FieldConstraints('a', [TypeConstraint('real'),
+                                   MinConstraint(1.0),
+                                   SignConstraint('positive')]),
+        ])
+        v = verify_table(table, constraints.to_dict())
+        self.assertEqual(v.failures, 0)
+        v = verify_table(table, constraints.to_dict(), type_checking='strict')
+        self.assertEqual(v.failures, 1)
+        self.assertEqual(v.to_table().column('type').to_pylist(), [False])
+
+    def testDetect(self):
+        table = pa.table({
+            'a': [1, 2, 2, None, 5],
+            's': ['x', 'y', 'z', 'y', None],
+        })
+        constraints = DatasetConstraints([
+            FieldConstraints('a', [MaxConstraint(4),
+                                   MaxNullsConstraint(0),
+                                   NoDuplicatesConstraint()]),
+            FieldConstraints('s', [AllowedValuesConstraint(['x', 'y'])]),
+        ])
+        v = detect_table(table, constraints.to_dict(), per_constraint=True,
+                         output_fields=[])
+        self.assertEqual(v.failures, 4)
+        self.assertEqual(v.detection.n_passing_records, 1)
+        self.assertEqual(v.detection.n_failing_records, 4)
+        self.assertEqual(v.detected().to_pydict(), {
+            'a': [2, 2, None, 5],
+            's': ['y', 'z', 'y', None],
+            'a_max_ok': [True, True, None, False],
+            'a_nonnull_ok': [True, True, False, True],
+            'a_nodups_ok': [False, False, True, True],
+            's_values_ok': [True, False, True, None],
+            'n_failures': [1, 2, 1, 1],
+        })
+
+    def testDetectToFile(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            table = pa.table({'a': [1, 2, 3]})
+            constraints = {'fields': {'a': {'max': 2}}}
+            outpath = os.path.join(tmpdir, 'detect.csv')
+            detect_table(table, constraints, outpath=outpath,
+                         boolean_ints=True, per_constraint=True)
+            with open(outpath) as f:
+                self.assertEqual(f.read(),
+                                 '"RowNumber","a_max_ok","n_failures"\n'
+                                 '3,0,1\n')
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def testLoadColumns(self):
+        columns = ['surname', 'nonexistent', 'account_number']
+        for name in ('accounts1k.csv', 'accounts1k.parquet'):
+            path = os.path.join(TESTDATA_DIR, name)
+            table = load_table(path, columns=columns)
+            self.assertEqual(table.column_names,
+                             ['account_number', 'surname'])
+            self.assertTrue(table.equals(
+                load_table(path).select(['account_number', 'surname'])))
+
+    def testDiscoverSameAsPandas(self):
+        for name in ('elements118.parquet', 'accounts1k.parquet'):
+            path = os.path.join(TESTDATA_DIR, name)
+            arrow = discover_table(load_table(path), inc_rex=True, seed=1)
+            pandas = discover_df(load_df(path), inc_rex=True, seed=1)
+            self.assertEqual(arrow.to_dict()['fields'],
+                             pandas.to_dict()['fields'])
+
+    def testVerifySameAsPandas(self):
+        for (name, tdda) in (('elements118.parquet', 'elements92rex.tdda'),
+                             ('elements92.parquet', 'elements118rex.tdda'),
+                             ('accounts25k.parquet', 'ref-accounts1k.tdda')):
+            path = os.path.join(TESTDATA_DIR, name)
+            constraints_path = os.path.join(TESTDATA_DIR, tdda)
+            arrow = verify_table(load_table(path), constraints_path)
+            pandas = verify_df(load_df(path), constraints_path)
+            self.assertEqual((arrow.passes, arrow.failures),
+                             (pandas.passes, pandas.failures))
+            self.assertTrue(comparable(arrow.to_table().to_pandas())
+                            .equals(comparable(pandas.to_frame())))
+
+    def testDetectSameAsPandas(self):
+        path = os.path.join(TESTDATA_DIR, 'accounts25k.parquet')
+        constraints_path = os.path.join(TESTDATA_DIR, 'ref-accounts1k.tdda')
+        tmpdir = tempfile.mkdtemp()
+        try:
+            arrow_path = os.path.join(tmpdir, 'arrow.parquet')
+            pandas_path = os.path.join(tmpdir, 'pandas.parquet')
+            arrow = detect_table(load_table(path), constraints_path,
+                                 outpath=arrow_path, per_constraint=True,
+                                 output_fields=['surname'], index=True)
+            pandas = detect_df(load_df(path), constraints_path,
+                               outpath=pandas_path, per_constraint=True,
+                               output_fields=['surname'], index=True,
+                               rownumber_is_index=False)
+            self.assertEqual(arrow.detection.n_failing_records, 117)
+            self.assertEqual(pandas.detection.n_failing_records, 117)
+            self.assertTrue(comparable(pd.read_parquet(arrow_path))
+                            .equals(comparable(pd.read_parquet(pandas_path))))
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+class TestArrowExtension(ReferenceTestCase):
+    def testApplicable(self):
+        for (argv, applicable) in (
+            (['verify', 'data.arrow', 'c.tdda'], True),
+            (['verify', 'data.parquet', 'c.tdda'], False),
+            (['verify', '--arrow', 'data.parquet', 'c.tdda'], True),
+            (['detect', 'data.csv', 'c.tdda', 'out.csv', '--arrow'], True),
+            (['verify', 'postgres:table', 'c.tdda', '--arrow'], False),
+        ):
+            self.assertEqual(TDDAArrowExtension(argv).applicable(),
+                             applicable)
+
+
+if __name__ == '__main__':
+    ReferenceTestCase.main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+Support for Arrow constraint verification from the command-line tool
+
+Verify parquet, feather (Arrow) and CSV files, loaded as Arrow tables,
+against constraints from a .tdda JSON constraints file.
+"""
+
+USAGE = '''
+
+Parameters:
+
+  * input is one of:
+
+      - a .parquet file
+      - a .feather or .arrow (Arrow IPC) file
+      - a csv file
+
+  * constraints.tdda, if provided, is a JSON .tdda file constaining
+    constraints.
+
+If no constraints file is provided, a file with the same path as the
+input file, with a .tdda extension will be tried.
+
+  * --arrow
+      Use the Arrow backend, rather than Pandas. This is the default
+      for .arrow files.
+
+'''
+
+import os
+import sys
+
+from tdda import __version__
+from tdda.constraints.flags import verify_parser, verify_flags
+from tdda.constraints.arrow.constraints import (verify_table, load_table,
+                                                columns_to_load)
+
+
+def verify_table_from_file(table_path, constraints_path, verbose=True,
+                           **kwargs):
+    if constraints_path is None:
+        stem, ext = os.path.splitext(table_path)
+        constraints_path = stem + '.tdda'
+
+    table = load_table(table_path, columns=columns_to_load(constraints_path))
+    v = verify_table(table, constraints_path, **kwargs)
+    if verbose:
+        print(v)
+    return v
+
+
+def arrow_verify_parser():
+    parser = verify_parser(USAGE)
+    parser.add_argument('input', nargs=1,
+                        help='parquet, feather (Arrow) or CSV file')
+    parser.add_argument('constraints', nargs='?',
+                        help='constraints file to verify against')
+    parser.add_argument('--arrow', action='store_true',
+                        help='use the Arrow backend')
+    return parser
+
+
+def arrow_verify_params(args):
+    parser = arrow_verify_parser()
+    params = {}
+    flags = verify_flags(parser, args, params)
+    params['table_path'] = flags.input[0] if flags.input else None
+    params['constraints_path'] = flags.constraints
+    return params
+
+
+class ArrowVerifier:
+    def __init__(self, argv, verbose=False):
+        self.argv = argv
+        self.verbose = verbose
+
+    def verify(self):
+        params = arrow_verify_params(self.argv[1:])
+        path = params['table_path']
+        if path is None or not os.path.isfile(path):
+            print('%s does not exist' % path)
+            sys.exit(1)
+        return verify_table_from_file(verbose=self.verbose, **params)
+
+
+def main(argv, verbose=True):
+    if len(argv) > 1 and argv[1] in ('-v', '--version'):
+        print(__version__)
+        sys.exit(0)
+    v = ArrowVerifier(argv)
+    v.verify()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -12,7 +12,9 @@ import socket
 import sys
 
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
+from tdda.utils import effective_n_jobs
 from tdda.version import version
 
 PRECISIONS = ('open', 'closed', 'fuzzy')
@@ -38,6 +40,15 @@ SIGNS = ('positive', 'non-negative', 'zero', 'non-positive', 'negative',
          'null')
 TYPES = ('bool', 'int', 'real', 'date', 'string')
 DATE_VALUED_CONSTRAINTS = ('min', 'max')
+
+# Constraint kinds in (roughly) increasing order of the cost of verifying
+# them, for fail-fast verification, which checks the cheapest first.
+# The first few need only simple reductions (null counts, min and max),
+# not a profile of the distinct values in the column.
+# Any other kinds are checked after these, but before rex constraints.
+FAIL_FAST_ORDER = ('type', 'max_nulls', 'min', 'max', 'sign',
+                   'min_length', 'max_length', 'no_duplicates',
+                   'allowed_values')
 UTF8 = 'UTF-8'
 
 
@@ -676,6 +687,7 @@ class Verification(object):
         self.detect_output_fields = detect_output_fields
         self.detect_index = detect_index
         self.detect_in_place = detect_in_place
+        self.short_circuited = False
         if report not in ('all', 'fields', 'records'):
             raise Exception('Value for report must be one of "all", "fields"'
                             ' or "records", not "%s".' % report)
@@ -709,6 +721,10 @@ class Verification(object):
                            for field, ver in field_items)
         fields_part = 'FIELDS:\n\n%s\n\n' % fields if fields else ''
 
+        if self.short_circuited:
+            fields_part += ('Stopped at the first failure; '
+                            'not all constraints were checked.\n\n')
+
         if self.report == 'records' and self.detection:
             return ('%sSUMMARY:\n\n'
                     'Records passing: %d\n'
@@ -776,7 +792,8 @@ def strip_lines(s):
 
 
 def verify(constraints, fieldnames, verifiers, VerificationClass=None,
-           detected_records_writer=None, **kwargs):
+           detected_records_writer=None, n_jobs=None, fail_fast=False,
+           checks=None, **kwargs):
     """
     Perform a verification of a set of constraints.
     This is primarily an internal function, intended to be used by
@@ -806,6 +823,28 @@ def verify(constraints, fieldnames, verifiers, VerificationClass=None,
                             DataFrame. If not provided, Verification
                             is used.
 
+        n_jobs              If more than 1 (or 0 or negative, for one per
+                            CPU), verify up to that many fields concurrently,
+                            in a pool of threads. The verifiers must then be
+                            safe to call from several threads at once for
+                            different fields. The results are the same as
+                            (and in the same order as) for serial verification.
+
+        fail_fast           If true, verify the constraints one at a time,
+                            the cheapest kinds first (across all fields),
+                            and stop at the first failure. The results then
+                            only include the constraints that were checked,
+                            and the Verification's short_circuited attribute
+                            is set if any were not. This can't be combined
+                            with detection.
+
+        checks              If provided, a mapping from field names to
+                            the checks for their constraints, as from
+                            field_checks (e.g. bound once, for a compiled
+                            plan), which are used in place of looking up
+                            the verifier for each constraint's kind in
+                            verifiers (which can then be None).
+
         kwargs              Any keyword arguments provided are passed to
                             the VerificationClass chosen.
 
@@ -831,24 +870,28 @@ def verify(constraints, fieldnames, verifiers, VerificationClass=None,
             pass
         os.remove(detect_outpath)
 
-    for name in allfields:
-        field_results = TDDAObject()
-        failures = passes = 0
-        for c in constraints.fields[name]:
-            verify = verifiers.get(c.kind)
-            if verify:
-                satisfied = verify(name, c, detect)
-                if satisfied:
-                    passes += 1
-                else:
-                    failures += 1
-            else:
-                satisfied = None
-            field_results[c.kind] = satisfied
-        field_results.failures = failures
-        results.failures += failures
-        field_results.passes = passes
-        results.passes += passes
+    if checks is None:
+        checks = field_checks(constraints, verifiers)
+
+    if fail_fast:
+        if detect:
+            raise Exception('Cannot detect with fail-fast verification.')
+        verify_fail_fast(results, allfields, checks)
+        return results
+
+    def verify_field(name):
+        return verify_field_constraints(checks[name], detect)
+
+    n_jobs = effective_n_jobs(n_jobs)
+    if n_jobs > 1 and len(allfields) > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as threads:
+            all_field_results = list(threads.map(verify_field, allfields))
+    else:
+        all_field_results = [verify_field(name) for name in allfields]
+
+    for name, field_results in zip(allfields, all_field_results):
+        results.failures += field_results.failures
+        results.passes += field_results.passes
         results.fields[name] = field_results
 
     if detect and detected_records_writer and results.failures > 0:
@@ -856,15 +899,101 @@ def verify(constraints, fieldnames, verifiers, VerificationClass=None,
     return results
 
 
+def field_checks(constraints, verifiers):
+    """
+    Returns a dictionary mapping each field name in the
+    DatasetConstraints *constraints* to a tuple of the checks for its
+    constraints, each of which is a (field name, constraint, verifier)
+    tuple, with the verifier for the constraint's kind from the mapping
+    *verifiers* (or None, if there isn't one).
+
+    The verifiers are usually callables, but a compiled plan maps kinds
+    to the names of verification methods, to bind to each dataset.
+    """
+    return {
+        name: tuple((name, c, verifiers.get(c.kind)) for c in fc)
+        for (name, fc) in constraints.fields.items()
+    }
+
+
+def verify_field_constraints(checks, detect):
+    """
+    Verify each of the constraints for a single field, from its *checks*
+    (as from field_checks), returning a TDDAObject mapping constraint
+    kinds to whether they were satisfied (or None, if there was no
+    verifier for the kind), with the numbers of failures and passes set
+    as attributes.
+    """
+    field_results = TDDAObject()
+    failures = passes = 0
+    for (name, c, verify) in checks:
+        if verify:
+            satisfied = verify(name, c, detect)
+            if satisfied:
+                passes += 1
+            else:
+                failures += 1
+        else:
+            satisfied = None
+        field_results[c.kind] = satisfied
+    field_results.failures = failures
+    field_results.passes = passes
+    return field_results
+
+
+def verify_fail_fast(results, fieldnames, checks):
+    """
+    Verify the constraints for the given fields (from their *checks*, as
+    from field_checks) in order of (roughly) increasing cost, from
+    FAIL_FAST_ORDER, with rex constraints last, stopping at the first
+    failure.
+
+    The results for the constraints that were checked are recorded in
+    the Verification *results*, in the usual order, and its
+    short_circuited attribute is set if any constraints were not checked.
+    """
+    def cost(check):
+        kind = check[1].kind
+        return (kind == 'rex',
+                FAIL_FAST_ORDER.index(kind) if kind in FAIL_FAST_ORDER
+                else len(FAIL_FAST_ORDER))
+
+    ordered = sorted((check for name in fieldnames for check in checks[name]),
+                     key=cost)
+    satisfied = {}
+    for (i, (name, c, verify)) in enumerate(ordered):
+        satisfied[(name, c.kind)] = verify(name, c, False) if verify else None
+        if verify and not satisfied[(name, c.kind)]:
+            results.short_circuited = i < len(ordered) - 1
+            break
+
+    for name in fieldnames:
+        field_results = TDDAObject()
+        failures = passes = 0
+        for (name, c, verify) in checks[name]:
+            if (name, c.kind) in satisfied:
+                field_results[c.kind] = satisfied[(name, c.kind)]
+                if field_results[c.kind]:
+                    passes += 1
+                elif verify:
+                    failures += 1
+        if len(field_results) > 0:
+            field_results.failures = failures
+            field_results.passes = passes
+            results.failures += failures
+            results.passes += passes
+            results.fields[name] = field_results
+
+
 def detect(constraints, fieldnames, verifiers, VerificationClass=None,
-           detected_records_writer=None, **kwargs):
+           detected_records_writer=None, n_jobs=None, **kwargs):
     """
     Variation of verify which does detection too.
     """
     return verify(constraints, fieldnames, verifiers,
                   VerificationClass=VerificationClass,
                   detect=True, detected_records_writer=detected_records_writer,
-                  **kwargs)
+                  n_jobs=n_jobs, **kwargs)
 
 
 def tcn(sat, ascii=False):
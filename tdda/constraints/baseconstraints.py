@@ -7,14 +7,16 @@ TDDA constraint discovery and verification, common underlying functionality.
 import datetime
 import re
 import sys
+import threading
 
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from tdda.constraints.base import (
     PRECISIONS,
     SIGNS,
     STANDARD_FIELD_CONSTRAINTS,
-    verify, detect,
+    verify, detect, field_checks,
     native_definite,
     DatasetConstraints,
     FieldConstraints,
@@ -31,6 +33,8 @@ from tdda.constraints.base import (
 from tdda.constraints.extension import (BaseConstraintCalculator,
                                         BaseConstraintDetector)
 
+from tdda.utils import effective_n_jobs
+
 if sys.version_info[0] >= 3:
     unicode_string = str
     byte_string = bytes
@@ -48,6 +52,20 @@ DEFAULT_TYPE_CHECKING = 'sloppy'
 MAX_CATEGORIES = 20     # String fields with up to 20 categories will
                         # generate AllowedValues constraints
 
+# Names of the verification methods for each kind of constraint
+VERIFIER_METHODS = {
+    'type': 'verify_tdda_type_constraint',
+    'min': 'verify_min_constraint',
+    'max': 'verify_max_constraint',
+    'min_length': 'verify_min_length_constraint',
+    'max_length': 'verify_max_length_constraint',
+    'sign': 'verify_sign_constraint',
+    'max_nulls': 'verify_max_nulls_constraint',
+    'no_duplicates': 'verify_no_duplicates_constraint',
+    'allowed_values': 'verify_allowed_values_constraint',
+    'rex': 'verify_rex_constraint',
+}
+
 
 class BaseConstraintVerifier(BaseConstraintCalculator, BaseConstraintDetector):
     """
@@ -58,44 +76,75 @@ class BaseConstraintVerifier(BaseConstraintCalculator, BaseConstraintDetector):
     a mix-in subclass which inherits both from :py:mod:`BaseConstraintVerifier`
     and from specific implementations of :py:mod:`BaseConstraintCalculator`
     and :py:mod:`BaseConstraintDetector`.
+
+    If ``n_jobs`` is more than 1 (or is 0 or negative, for one job per CPU),
+    and the implementation is thread-safe (``threadsafe`` is set), fields
+    are verified concurrently, in a pool of threads. The per-column cache
+    is safe to use from several threads.
+
+    ``compiled`` is an optional (read-only) mapping from (column name,
+    constraint kind) pairs to precompiled forms of the values of the
+    constraints, from a compiled plan (e.g. a frozenset of allowed
+    values), for the verification methods to use in place of the
+    constraint values themselves.
     """
-    def __init__(self, epsilon=None, type_checking=None, **kwargs):
+    threadsafe = False      # calc_ and detect_ methods can be used
+                            # from several threads, for different columns
+
+    def __init__(self, epsilon=None, type_checking=None, n_jobs=None,
+                 compiled=None, **kwargs):
         self.epsilon = EPSILON_DEFAULT if epsilon is None else epsilon
         self.type_checking = type_checking or DEFAULT_TYPE_CHECKING
         assert self.type_checking in TYPE_CHECKING_OPTIONS
+        self.n_jobs = n_jobs
+        self.compiled = compiled or {}
         self.cache = {}
+        self.cache_locks = {}
+        self.cache_lock = threading.Lock()
 
     def verifiers(self):
         """
         Returns a dictionary mapping constraint types to their callable
         (bound) verification methods.
         """
+        return {kind: getattr(self, method)
+                for (kind, method) in VERIFIER_METHODS.items()}
+
+    def bind_checks(self, checks):
+        """
+        Returns the checks from a compiled plan (a mapping from field names
+        to tuples of (field name, constraint, method name) checks, from
+        field_checks with VERIFIER_METHODS) with each method name replaced
+        by that method of this verifier.
+        """
         return {
-            'type': self.verify_tdda_type_constraint,
-            'min': self.verify_min_constraint,
-            'max': self.verify_max_constraint,
-            'min_length': self.verify_min_length_constraint,
-            'max_length': self.verify_max_length_constraint,
-            'sign': self.verify_sign_constraint,
-            'max_nulls': self.verify_max_nulls_constraint,
-            'no_duplicates': self.verify_no_duplicates_constraint,
-            'allowed_values': self.verify_allowed_values_constraint,
-            'rex': self.verify_rex_constraint,
+            name: tuple((name, c, method and getattr(self, method))
+                        for (name, c, method) in field)
+            for (name, field) in checks.items()
         }
 
-    def verify(self, constraints, VerificationClass=Verification, **kwargs):
+    def verify(self, constraints, VerificationClass=Verification,
+               checks=None, **kwargs):
         """
-        Apply verifiers to a set of constraints, for reporting
+        Apply verifiers to a set of constraints, for reporting.
+
+        If *checks* (from a compiled plan) are provided, they are bound to
+        this verifier and used for the constraints.
         """
-        return verify(constraints, self.get_column_names(), self.verifiers(),
+        return verify(constraints, self.get_column_names(),
+                      self.verifiers() if checks is None else None,
                       VerificationClass=VerificationClass,
                       detected_records_writer=self.write_detected_records,
+                      n_jobs=self.n_jobs if self.threadsafe else None,
+                      checks=(None if checks is None
+                              else self.bind_checks(checks)),
                       **kwargs)
 
     def detect(self, constraints, VerificationClass=Verification,
                outpath=None, write_all=False, per_constraint=False,
                output_fields=None, index=False, in_place=False,
-               rownumber_is_index=True, boolean_ints=False, **kwargs):
+               rownumber_is_index=True, boolean_ints=False, checks=None,
+               **kwargs):
         """
         Apply verifiers to a set of constraints, for detection.
 
@@ -103,8 +152,12 @@ class BaseConstraintVerifier(BaseConstraintCalculator, BaseConstraintDetector):
         then it fails verification, but there are no records to detect
         against. Similarly if the field exists but the dataset has no
         records.
+
+        If *checks* (from a compiled plan) are provided, they are bound to
+        this verifier and used for the constraints.
         """
-        return detect(constraints, self.get_column_names(), self.verifiers(),
+        return detect(constraints, self.get_column_names(),
+                      self.verifiers() if checks is None else None,
                       VerificationClass=VerificationClass,
                       detect_outpath=outpath, detect_write_all=write_all,
                       detect_per_constraint=per_constraint,
@@ -114,6 +167,9 @@ class BaseConstraintVerifier(BaseConstraintCalculator, BaseConstraintDetector):
                       detected_records_writer=self.write_detected_records,
                       rownumber_is_index=rownumber_is_index,
                       boolean_ints=boolean_ints,
+                      n_jobs=self.n_jobs if self.threadsafe else None,
+                      checks=(None if checks is None
+                              else self.bind_checks(checks)),
                       **kwargs)
 
     def get_cached_value(self, value, colname, f):
@@ -122,18 +178,25 @@ class BaseConstraintVerifier(BaseConstraintCalculator, BaseConstraintDetector):
         first, if it is not already there.
         """
         col_cache = self.cache_values(colname)
-        if not value in col_cache:
-            col_cache[value] = f(colname)
-        return col_cache[value]
+        with self.cache_locks[colname]:
+            if not value in col_cache:
+                col_cache[value] = f(colname)
+            return col_cache[value]
 
     def cache_values(self, colname):
         """
         Returns the dictionary for colname from the cache, first creating
         it if there isn't one on entry.
+
+        Each column's dictionary has its own (re-entrant) lock, in
+        self.cache_locks, so that values for different columns can be
+        calculated in different threads at the same time.
         """
-        if not colname in self.cache:
-            self.cache[colname] = {}
-        return self.cache[colname]
+        with self.cache_lock:
+            if not colname in self.cache:
+                self.cache[colname] = {}
+                self.cache_locks[colname] = threading.RLock()
+            return self.cache[colname]
 
     def verify_min_constraint(self, colname, constraint, detect=False):
         """
@@ -401,9 +464,11 @@ class BaseConstraintVerifier(BaseConstraintCalculator, BaseConstraintDetector):
         else:
             actual_values = self.get_unique_values(colname)
             exclusions = exclusions or []
+            allowed = self.compiled.get((colname, 'allowed_values'))
+            if allowed is None:
+                allowed = set(allowed_values)
 
-            violations = (set(actual_values) - set(allowed_values)
-                                             - set(exclusions))
+            violations = (set(actual_values) - allowed - set(exclusions))
             result = len(violations) == 0
 
         if detect and not bool(result):
@@ -519,22 +584,69 @@ class BaseConstraintDiscoverer(BaseConstraintCalculator):
     A concrete implementation of this class is constructed by creating
     a mix-in subclass which inherits both from :py:mod:`BaseConstraintDiscover`
     and from a specific implementation of :py:mod:`BaseConstraintCalculator`.
+
+    If ``n_jobs`` is more than 1 (or is 0 or negative, for one job per CPU),
+    and the calculator is thread-safe (``threadsafe`` is set), fields are
+    discovered concurrently: their statistics are calculated for several
+    fields at once in a pool of threads, and regular expressions are found
+    by rexpy in a pool of processes. Otherwise, fields are discovered one
+    at a time, as if ``n_jobs`` were 1. The constraints found, and their
+    order, are the same either way.
     """
-    def __init__(self, inc_rex=False, seed=None, **kwargs):
+    threadsafe = False      # calc_ methods can be used from several threads
+
+    def __init__(self, inc_rex=False, seed=None, rex_cache=None, n_jobs=None,
+                 **kwargs):
         self.inc_rex = inc_rex
         self.seed = seed
+        self.rex_cache = rex_cache
+        self.n_jobs = n_jobs
+        self.rex_executor = None
 
     def discover(self):
-        field_constraints = []
-        for col in self.get_column_names():
-            constraints = self.discover_field_constraints(col)
-            if constraints:
-                field_constraints.append(constraints)
+        colnames = self.get_column_names()
+        n_jobs = effective_n_jobs(self.n_jobs)
+        if n_jobs > 1:
+            results = self.discover_concurrently(colnames, n_jobs)
+        else:
+            results = [self.discover_field_constraints(col)
+                       for col in colnames]
+        field_constraints = [c for c in results if c]
         if field_constraints:
             return DatasetConstraints(field_constraints)
         else:
             return None
 
+    def discover_concurrently(self, colnames, n_jobs):
+        """
+        Discover the constraints for each of the columns named, using up
+        to n_jobs threads and (for rexpy) processes, if the calculator is
+        thread-safe, or one at a time, if it isn't.
+
+        Returns a list of results (FieldConstraints or None) in the same
+        order as colnames.
+        """
+        if not self.threadsafe:
+            # Each field's regular expressions would be waited for before
+            # moving on to the next field, so a pool of processes would
+            # only add the cost of sending the values to it.
+            return [self.discover_field_constraints(col) for col in colnames]
+        rex_pool = None
+        if self.inc_rex:
+            rex_pool = ProcessPoolExecutor(max_workers=n_jobs)
+            # Start the workers now, before there are any other threads,
+            # since forking while other threads are running is unsafe.
+            rex_pool.submit(int).result()
+        self.rex_executor = rex_pool
+        try:
+            with ThreadPoolExecutor(max_workers=n_jobs) as threads:
+                return list(threads.map(self.discover_field_constraints,
+                                        colnames))
+        finally:
+            self.rex_executor = None
+            if rex_pool:
+                rex_pool.shutdown()
+
     def discover_field_constraints(self, fieldname):
         min_constraint = max_constraint = None
         min_length_constraint = max_length_constraint = None
@@ -550,8 +662,18 @@ class BaseConstraintDiscoverer(BaseConstraintCalculator):
         length = self.get_nrecords()
 
         if length > 0:  # Things are not very interesting when there is no data
-            nNull = self.calc_null_count(fieldname)
-            nNonNull = self.calc_non_null_count(fieldname)
+            # Strings and ints need their distinct values, so profile
+            # them in one pass; direct reductions are cheaper for others.
+            profile = (self.calc_profile(fieldname)
+                       if type_ in ('string', 'int') else {})
+
+            def stat(name, f, **kwargs):
+                # Statistic from the profile, or calculated if not there
+                return (profile[name] if name in profile
+                        else f(fieldname, **kwargs))
+
+            nNull = stat('null_count', self.calc_null_count)
+            nNonNull = stat('non_null_count', self.calc_non_null_count)
             assert nNull + nNonNull == length
             if nNull < 2:
                 max_nulls_constraint = MaxNullsConstraint(nNull)
@@ -560,11 +682,12 @@ class BaseConstraintDiscoverer(BaseConstraintCalculator):
             uniqs = None
             n_unique = -1   # won't equal number of non-nulls later on
             if type_ in ('string', 'int'):
-                n_unique = self.calc_nunique(fieldname)
+                n_unique = stat('nunique', self.calc_nunique)
                 if type_ == 'string':
                     if n_unique <= MAX_CATEGORIES:
-                        uniqs = self.calc_unique_values(fieldname,
-                                                        include_nulls=False)
+                        uniqs = stat('non_null_uniques',
+                                     self.calc_unique_values,
+                                     include_nulls=False)
                     if uniqs:
                         avc = AllowedValuesConstraint(uniqs)
                         allowed_values_constraint = avc
@@ -577,8 +700,9 @@ class BaseConstraintDiscoverer(BaseConstraintCalculator):
                     if (uniqs is None and n_unique > 0):
                         # There were too many for us to have bothered getting
                         # them all before, but we need them now.
-                        uniqs = self.calc_unique_values(fieldname,
-                                                        include_nulls=False)
+                        uniqs = stat('non_null_uniques',
+                                     self.calc_unique_values,
+                                     include_nulls=False)
                     if uniqs:
                         if type(uniqs[0]) is unicode_string:
                             L = [len(v) for v in uniqs]
@@ -590,8 +714,8 @@ class BaseConstraintDiscoverer(BaseConstraintCalculator):
                         max_length_constraint = MaxLengthConstraint(M)
                 else:
                     # Non-string fields all potentially get min and max values
-                    m = self.calc_min(fieldname)
-                    M = self.calc_max(fieldname)
+                    m = stat('min', self.calc_min)
+                    M = stat('max', self.calc_max)
                     if not self.is_null(m):
                         min_constraint = MinConstraint(m)
                     if not self.is_null(M):
@@ -617,9 +741,15 @@ class BaseConstraintDiscoverer(BaseConstraintCalculator):
                 no_duplicates_constraint = NoDuplicatesConstraint()
 
         if type_ == 'string' and self.inc_rex:
+            kw = {}
+            if self.rex_cache:
+                kw['cache'] = self.rex_cache
+            if self.rex_executor:
+                kw['executor'] = self.rex_executor
             rex_constraint = RexConstraint(self.find_rexes(fieldname,
                                                            values=uniqs,
-                                                           seed=self.seed))
+                                                           seed=self.seed,
+                                                           **kw))
 
         constraints = [c for c in [type_constraint,
                                    min_constraint, max_constraint,
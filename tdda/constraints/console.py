@@ -6,6 +6,10 @@ Command line interface for constraint discovery and verification.
 If pandas is available, constraints can be discovered and verified on
 .csv files and saved .parquet dataframe files.
 
+If pyarrow is available, they can also be discovered and verified on
+Arrow tables, loaded from .arrow files (or from .parquet and .csv files,
+with the --arrow flag).
+
 If supported database drivers are available, constraints can be discovered
 and verified on tables in databases.
 
@@ -23,7 +27,7 @@ import unittest
 from tdda.examples import copy_examples
 from tdda.constraints.base import Marks
 from tdda.constraints.pd.discover import pd_discover_parser
-from tdda.constraints.pd.verify import pd_verify_parser
+from tdda.constraints.pd.verify import pd_verify_parser, PandasVerifier
 from tdda.constraints.pd.detect import pd_detect_parser
 from tdda.referencetest.gentest import gentest_wrapper
 
@@ -44,6 +48,8 @@ HELP="""Use
 
 
 STANDARD_EXTENSIONS = [
+    'tdda.constraints.arrow.extension.TDDAArrowExtension',   # before Pandas,
+                                                              # for --arrow
     'tdda.constraints.pd.extension.TDDAPandasExtension',
     'tdda.constraints.db.extension.TDDADatabaseExtension',
 ]
@@ -176,6 +182,10 @@ def main_with_argv(argv, verbose=True):
                 return ext.discover()
         no_constraints(name, 'No discovery available', argv[2:], extensions)
     elif name == 'verify':
+        if '--batch' in argv:
+            # The input is a glob pattern, so can't choose the extension;
+            # batch verification is for files read with Pandas.
+            return PandasVerifier(argv[1:], verbose=verbose).verify()
         for ext in extensions:
             if ext.applicable():
                 return ext.verify()
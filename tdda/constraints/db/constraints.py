@@ -96,10 +96,14 @@ class DatabaseConstraintCalculator(BaseConstraintCalculator):
     def calc_all_non_nulls_boolean(self, colname):
         raise Exception('database should not require all_non_nulls_boolean')
 
-    def find_rexes(self, colname, values=None, seed=None):
+    def find_rexes(self, colname, values=None, seed=None, cache=None,
+                   executor=None):
         if not values:
             values = self.get_database_unique_values(self.tablename, colname)
-        return rexpy.extract(sorted(values), seed=seed)
+        if executor:
+            return executor.submit(rexpy.extract, sorted(values), seed=seed,
+                                   cache=cache).result()
+        return rexpy.extract(sorted(values), seed=seed, cache=cache)
 
     def calc_rex_constraint(self, colname, constraint, detect=False):
         return not self.get_database_rex_match(self.tablename, colname,
@@ -124,7 +128,7 @@ class DatabaseConstraintVerifier(DatabaseConstraintCalculator,
     for verifying every type of constraint against a single database table.
     """
     def __init__(self, dbtype, db, tablename, epsilon=None,
-                 type_checking='strict', testing=False):
+                 type_checking='strict', testing=False, n_jobs=None):
         """
         Inputs:
 
@@ -145,7 +149,12 @@ class DatabaseConstraintVerifier(DatabaseConstraintCalculator,
         DatabaseConstraintCalculator.__init__(self, tablename, testing)
         DatabaseConstraintDetector.__init__(self, tablename)
         BaseConstraintVerifier.__init__(self, epsilon=epsilon,
-                                        type_checking=type_checking)
+                                        type_checking=type_checking,
+                                        n_jobs=n_jobs)
+
+    @property
+    def threadsafe(self):
+        return self.threadsafe_connection()
 
 
 class DatabaseVerification(Verification):
@@ -165,14 +174,20 @@ class DatabaseConstraintDiscoverer(DatabaseConstraintCalculator,
     A :py:class:`DatabaseConstraintDiscoverer` object is used to discover
     constraints on a single database table.
     """
-    def __init__(self, dbtype, db, tablename, inc_rex=False, seed=None):
+    def __init__(self, dbtype, db, tablename, inc_rex=False, seed=None,
+                 rex_cache=None, n_jobs=None):
         DatabaseHandler.__init__(self, dbtype, db)
         tablename = self.resolve_table(tablename)
 
         DatabaseConstraintCalculator.__init__(self, tablename)
-        BaseConstraintDiscoverer.__init__(self, inc_rex=inc_rex, seed=seed)
+        BaseConstraintDiscoverer.__init__(self, inc_rex=inc_rex, seed=seed,
+                                          rex_cache=rex_cache, n_jobs=n_jobs)
         self.tablename = tablename
 
+    @property
+    def threadsafe(self):
+        return self.threadsafe_connection()
+
 
 def types_compatible(x, y, colname):
     """
@@ -198,7 +213,7 @@ def types_compatible(x, y, colname):
 
 def verify_db_table(dbtype, db, tablename, constraints_path, epsilon=None,
                     type_checking='strict', testing=False, report='all',
-                    **kwargs):
+                    n_jobs=None, fail_fast=False, **kwargs):
     """
     Verify that (i.e. check whether) the database table provided
     satisfies the constraints in the JSON .tdda file provided.
@@ -274,6 +289,25 @@ def verify_db_table(dbtype, db, tablename, constraints_path, epsilon=None,
                             when being run as part of an automated test.
                             It suppresses type-compatibility warnings.
 
+        *n_jobs*:
+                            The number of fields to verify concurrently
+                            (``0`` or negative for one per CPU), each
+                            thread using its own cursor. This is only
+                            used if the database driver allows connections
+                            to be shared between threads (DB-API
+                            threadsafety level 2 or more), which excludes
+                            sqlite; otherwise fields are verified one
+                            at a time.
+
+        *fail_fast*:
+                            If ``True``, check the constraints one at a
+                            time, cheapest first (so ``rex`` constraints,
+                            which need all the distinct values, last), and
+                            stop at the first failure. The verification
+                            then only includes the constraints that were
+                            checked, and its ``short_circuited`` attribute
+                            is set if any were not checked.
+
     Returns:
 
         :py:class:`~tdda.constraints.db.constraints.DatabaseVerification` object.
@@ -299,14 +333,14 @@ def verify_db_table(dbtype, db, tablename, constraints_path, epsilon=None,
     """
     dbv = DatabaseConstraintVerifier(dbtype, db, tablename, epsilon=epsilon,
                                      type_checking=type_checking,
-                                     testing=testing)
+                                     testing=testing, n_jobs=n_jobs)
     if not dbv.check_table_exists(tablename):
         print('No table %s' % tablename, file=sys.stderr)
         sys.exit(1)
     constraints = DatasetConstraints(loadpath=constraints_path)
     return dbv.verify(constraints,
                       VerificationClass=DatabaseVerification,
-                      report=report, **kwargs)
+                      report=report, fail_fast=fail_fast, **kwargs)
 
 
 def detect_db_table(dbtype, db, tablename, constraints_path, epsilon=None,
@@ -319,7 +353,8 @@ def detect_db_table(dbtype, db, tablename, constraints_path, epsilon=None,
                               'for databases.')
 
 
-def discover_db_table(dbtype, db, tablename, inc_rex=False, seed=None):
+def discover_db_table(dbtype, db, tablename, inc_rex=False, seed=None,
+                      rex_cache=None, n_jobs=None):
     """
     Automatically discover potentially useful constraints that characterize
     the database table provided.
@@ -332,6 +367,20 @@ def discover_db_table(dbtype, db, tablename, inc_rex=False, seed=None):
             a database object
         *tablename*:
             a table name
+        *rex_cache*:
+            an optional persistent cache for regular expressions
+            discovered by rexpy (a directory path, ``True`` for the
+            default location, or a
+            :py:class:`~tdda.rexpy.rexpy.RexpyCache` object)
+        *n_jobs*:
+            if more than 1 (or 0 or negative, for one per CPU), discover
+            constraints for up to that many fields concurrently, in a
+            pool of threads (each with its own cursor), finding regular
+            expressions in a pool of processes. This is only done if the
+            database driver allows connections to be shared between
+            threads (DB-API threadsafety level 2 or more), which excludes
+            sqlite and MongoDB; otherwise fields are discovered one at
+            a time.
 
     Possible return values:
 
@@ -434,7 +483,8 @@ def discover_db_table(dbtype, db, tablename, inc_rex=False, seed=None):
 
     """
     disco = DatabaseConstraintDiscoverer(dbtype, db, tablename,
-                                         inc_rex=inc_rex, seed=seed)
+                                         inc_rex=inc_rex, seed=seed,
+                                         rex_cache=rex_cache, n_jobs=n_jobs)
     if not disco.check_table_exists(tablename):
         print('No table %s' % tablename, file=sys.stderr)
         sys.exit(1)
@@ -10,6 +10,7 @@ import json
 import os
 import re
 import sys
+import threading
 
 try:
     import pgdb
@@ -262,6 +263,20 @@ def database_connection_mongodb(host, port, db, user, password):
         sys.exit(1)
 
 
+def dbapi_threadsafety(connection):
+    """
+    Returns the DB-API threadsafety level declared by the module
+    providing the connection given, or 0 if it can't be found.
+    """
+    parts = type(connection).__module__.split('.')
+    while parts:
+        module = sys.modules.get('.'.join(parts))
+        if hasattr(module, 'threadsafety'):
+            return module.threadsafety
+        parts.pop()
+    return 0
+
+
 def regex_matcher(expr, item):
     """
     REGEXP implementation for Sqlite
@@ -338,7 +353,27 @@ class SQLDatabaseHandler:
         self.dbtype = dbtype
         self.db = db.connection
         self.schema = db.schema
-        self.cursor = db.connection.cursor()
+        self.cursors = threading.local()
+
+    @property
+    def cursor(self):
+        # DB-API cursors can't be shared between threads, so each
+        # thread gets its own.
+        cursor = getattr(self.cursors, 'cursor', None)
+        if cursor is None:
+            cursor = self.cursors.cursor = self.db.cursor()
+        return cursor
+
+    def threadsafe_connection(self):
+        """
+        Can the connection be used from several threads at once
+        (each with its own cursor)?
+
+        This is so if the DB-API module declares a threadsafety level
+        of 2 or more, except for sqlite, whose connections can only be
+        used in the thread that created them.
+        """
+        return self.dbtype != 'sqlite' and dbapi_threadsafety(self.db) >= 2
 
     def quoted(self, name):
         # quote a columnname
@@ -651,6 +686,9 @@ class MongoDBDatabaseHandler:
         self.dbtype = dbtype
         self.db = db
 
+    def threadsafe_connection(self):
+        return False
+
     def find_collection(self, tablename):
         """
         Search through the collections hierarchy to resolve dotted names
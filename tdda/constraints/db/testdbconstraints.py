@@ -53,7 +53,8 @@ from tdda.referencetest.referencetestcase import ReferenceTestCase, tag
 
 from tdda.constraints.db.drivers import database_connection, DatabaseHandler
 from tdda.constraints.db.constraints import (verify_db_table,
-                                             discover_db_table)
+                                             discover_db_table,
+                                             DatabaseConstraintDiscoverer)
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 TESTDATA_DIR = os.path.join(os.path.dirname(THIS_DIR), 'testdata')
@@ -198,6 +199,18 @@ class TestDatabaseConstraintVerifiers:
             for name, value in field.items():
                 self.assertEqual(type(value), bool)
 
+    def test_verify_elements_fail_fast(self):
+        constraints_file = os.path.join(TESTDATA_DIR, 'elements92rex.tdda')
+        elements = self.dbh.resolve_table('elements')
+        result = verify_db_table(self.dbh.dbtype, self.db, elements,
+                                 constraints_file, testing=True,
+                                 fail_fast=True)
+        self.assertTrue(result.short_circuited)
+        self.assertEqual(result.failures, 1)
+        checked = set(kind for field in result.fields.values()
+                      for kind in field)
+        self.assertFalse('rex' in checked)
+
 
 @unittest.skipIf(sqlite3 is None, 'sqlite3 not available')
 class TestSQLiteDBConstraintVerifiers(ReferenceTestCase,
@@ -260,6 +273,28 @@ class TestDatabaseConstraintDiscoverers:
                                                     '"dataset":',
                                                     '"tddafile":'])
 
+    def test_discover_elements_concurrently(self):
+        elements = self.dbh.resolve_table('elements')
+        serial = discover_db_table(self.dbh.dbtype, self.db, elements,
+                                   inc_rex=True, seed=827364)
+        disco = DatabaseConstraintDiscoverer(self.dbh.dbtype, self.db,
+                                             elements, inc_rex=True,
+                                             seed=827364, n_jobs=2)
+        executors = set()
+        find_rexes = disco.find_rexes
+
+        def recording_find_rexes(colname, executor=None, **kwargs):
+            executors.add(executor is not None)
+            return find_rexes(colname, executor=executor, **kwargs)
+
+        disco.find_rexes = recording_find_rexes
+        concurrent = disco.discover()
+        self.assertEqual(concurrent.to_dict()['fields'],
+                         serial.to_dict()['fields'])
+        # a pool of processes is only used if fields are discovered
+        # in threads
+        self.assertEqual(executors, set([disco.threadsafe]))
+
 
 @unittest.skipIf(sqlite3 is None, 'sqlite3 not available')
 class TestSQLiteDBConstraintDiscoverers(ReferenceTestCase,
@@ -308,6 +308,22 @@ class BaseConstraintCalculator:
         """
         raise NotImplementedError('unique_values')
 
+    def calc_profile(self, colname):
+        """
+        Calculates a profile of a column: a dictionary of some or all of
+        the statistics ``null_count``, ``non_null_count``, ``nunique``,
+        ``min``, ``max`` and ``non_null_uniques`` (the sorted list of
+        distinct non-null values, as from ``calc_unique_values`` with
+        ``include_nulls=False``), computed together in as few passes over
+        the data as possible.
+
+        Any statistic left out will be calculated separately, with
+        the corresponding ``calc_`` method, if it is needed. The
+        default implementation returns an empty dictionary, so
+        implementing this is optional.
+        """
+        return {}
+
     def calc_non_integer_values_count(self, colname):
         """
         Calculates the number of unique non-integer values in a column
@@ -327,10 +343,20 @@ class BaseConstraintCalculator:
         """
         raise NotImplementedError('all_non_nulls_boolean')
 
-    def find_rexes(self, colname, values=None):
+    def find_rexes(self, colname, values=None, seed=None, cache=None,
+                   executor=None):
         """
         Generate a list of regular expressions that cover all of
         the patterns found in the (string) column.
+
+        If a cache is given (see :py:class:`tdda.rexpy.rexpy.RexpyCache`),
+        it should be passed on to rexpy, so that previously-found results
+        can be reused.
+
+        If an executor is given (a ``concurrent.futures`` process pool),
+        rexpy should be run in it (e.g. by submitting
+        :py:func:`tdda.rexpy.rexpy.extract`), to allow regular expressions
+        for different fields to be found in parallel.
         """
         raise NotImplementedError('find_rexes')
 
@@ -5,6 +5,7 @@ Helpers for command-line option flags for discover and verify
 """
 
 import argparse
+import os
 import sys
 
 
@@ -15,6 +16,15 @@ Optional flags are:
       Include regular expression generation. Disabled by default.
   * -R or --norex
       Exclude regular expression generation (the default)
+  * --rex-cache DIR
+      Cache regular expressions generated in directory DIR, and reuse
+      them for fields with the same values in later runs.
+  * -j N or --jobs N
+      Discover constraints for up to N fields concurrently
+      (0 for one per CPU). This applies to CSV and parquet files,
+      and to databases whose connections can be shared between
+      threads (not sqlite or MongoDB, whose fields are discovered
+      one at a time).
 '''
 
 VERIFY_HELP = '''
@@ -28,6 +38,9 @@ Optional flags are:
       Report in ASCII form, without using special characters.
   * --epsilon E
       Use this value of epsilon for fuzziness in comparing numeric values.
+  * --fail-fast
+      Check the cheapest constraints first, and stop at the first failure,
+      reporting only the constraints checked.
 '''
 
 DETECT_HELP = '''
@@ -63,6 +76,12 @@ Optional flags are:
       The row number is automatically included if no output fields are
       specified. Rows are usually numbered from 1, unless the
       input file already has an index.
+  * --compact
+      Write only the row numbers of failing records (from 1), each with
+      a bitmask of the constraints it failed, to a .parquet or .npz
+      output file, with a sidecar .json file (named by adding .json to
+      the output file's name) listing the constraints. The options for
+      the columns in the output don't apply.
 
 '''
 
@@ -77,6 +96,10 @@ def discover_parser(usage=''):
                         help='include regular expression generation')
     parser.add_argument('-R', '--norex', action='store_true',
                         help='exclude regular expression generation')
+    parser.add_argument('--rex-cache', metavar='DIR',
+                        help='cache generated regular expressions in DIR')
+    parser.add_argument('-j', '--jobs', type=int, metavar='N',
+                        help='discover up to N fields concurrently')
     parser.add_argument('-7', '--ascii', action='store_true',
                         help='report without using special characters')
     return parser
@@ -88,6 +111,10 @@ def discover_flags(parser, args, params):
         print(parser.epilog, file=sys.stderr)
         sys.exit(1)
     params['inc_rex'] = flags.rex
+    if flags.rex_cache:
+        params['rex_cache'] = flags.rex_cache
+    if flags.jobs is not None:
+        params['n_jobs'] = flags.jobs
     return flags
 
 
@@ -110,6 +137,8 @@ def verify_parser(usage=''):
                              'equivalent')
     parser.add_argument('-epsilon', '--epsilon', type=float,
                         help='epsilon fuzziness')
+    parser.add_argument('--fail-fast', action='store_true',
+                        help='stop at the first failing constraint')
     return parser
 
 
@@ -154,6 +183,9 @@ def detect_parser(usage=''):
     parser.add_argument('--int', dest='boolean_ints', action='store_true',
                         help='Write out boolean fields as integers, with '
                              '1 for true and 0 for false.')
+    parser.add_argument('--compact', action='store_true',
+                        help='Write only failing row numbers and bitmasks '
+                             'of failed constraints (.parquet or .npz).')
     return parser
 
 
@@ -177,6 +209,8 @@ def verify_flags(parser, args, params):
         params['type_checking'] = flags.type_checking
     if flags.epsilon is not None:
         params['epsilon'] = float(flags.epsilon)
+    if flags.fail_fast:
+        params['fail_fast'] = True
     return flags
 
 
@@ -219,6 +253,14 @@ def detect_flags(parser, args, params):
 
     if flags.interleave:
         params['interleave'] = True
+    if flags.compact:
+        outpath = getattr(flags, 'outpath', None)
+        if outpath and os.path.splitext(outpath)[1] not in ('.parquet',
+                                                            '.npz'):
+            print('With --compact, the output file must be a .parquet '
+                  'or .npz file.', file=sys.stderr)
+            sys.exit(1)
+        params['compact'] = True
     params['in_place'] = False  # Only applicable in API case
     params['report'] = 'records'
     return flags
@@ -22,13 +22,22 @@ The top-level functions are:
         and generate an output dataset containing
         information about input rows which failed any of the constraints.
 
+    :py:func:`tdda.constraints.compile_constraints`:
+        Compile a set of constraints into a plan for verifying (or
+        detecting failing rows in) many Pandas DataFrames.
+
 """
 import datetime
+import json
 import os
 import re
+import struct
 import sys
+import threading
+import zipfile
 
 from collections import OrderedDict
+from types import MappingProxyType
 
 from tdda.deprecated.featherfiles import read_feather_file, write_feather_file
 
@@ -48,6 +57,7 @@ from tdda.constraints.base import (
     DatasetConstraints,
     Verification,
     Detection,
+    field_checks,
     fuzz_up, fuzz_down,
 )
 from tdda.constraints.baseconstraints import (
@@ -56,11 +66,14 @@ from tdda.constraints.baseconstraints import (
     BaseConstraintVerifier,
     BaseConstraintDiscoverer,
     MAX_CATEGORIES,
+    VERIFIER_METHODS,
     unicode_string, byte_string, long_type
 )
 from tdda.pd.utils import is_string_col, is_string_dtype, is_categorical_dtype
+from tdda.utils import nvl
 
 from tdda.referencetest.checkpandas import (default_csv_loader,
+                                            default_csv_chunk_loader,
                                             default_csv_writer)
 from tdda import rexpy
 
@@ -82,6 +95,49 @@ isPy3 = sys.version_info[0] >= 3
 DEBUG = False
 RE_FLAGS = re.UNICODE | re.DOTALL
 
+# Tri-state results for each record in detection, with a fourth state
+# for a null value that is treated as passing (e.g. for no_duplicates)
+PASS = 1
+FAIL = 0
+NULL_RESULT = -1
+NULL_PASS = 2
+
+TYPE_SAMPLE_SIZE = 1000         # Values inferred first when finding
+                                # the type of a column of objects
+TYPE_BLOCK_SIZE = 100000        # Values inferred at a time after that
+
+# TDDA types for the kinds of values inferred by Pandas' infer_dtype
+# that determine the type of a column of objects
+INFERRED_TDDA_TYPES = {
+    'string': 'string',
+    'bytes': 'string',
+    'boolean': 'bool',
+    'datetime': 'date',
+    'date': 'date',
+}
+
+# Kinds of values inferred by infer_dtype that include no booleans,
+# strings or dates, and so don't determine the type of a column.
+# (Kinds that might include NaT, which is a datetime, are not here.)
+UNTYPED_INFERRED_KINDS = ('empty', 'integer', 'floating',
+                          'mixed-integer-float', 'decimal', 'complex')
+
+# Regular expressions using backreferences (or conditional groups)
+# can't be combined with others, since the group numbers would change.
+BACKREFERENCE_RE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+MAX_DISTINCT_VALUES = 100000    # Most distinct values kept for a field
+                                # when verifying allowed values in chunks
+
+# Pandas types to which columns in a chunk are converted, when detecting
+# in chunks, to match the TDDA type of the column in the whole dataset
+CHUNK_DTYPES = {
+    'real': 'float64',
+    'date': 'datetime64[ns]',
+    'string': object,
+    'bool': object,
+}
+
 
 class PandasConstraintCalculator(BaseConstraintCalculator):
     """
@@ -90,6 +146,7 @@ class PandasConstraintCalculator(BaseConstraintCalculator):
     """
     def __init__(self, df):
         self.df = df
+        self.compiled = {}      # set by a verifier using a compiled plan
 
     def is_null(self, value):
         return pd.isnull(value)
@@ -111,22 +168,14 @@ class PandasConstraintCalculator(BaseConstraintCalculator):
             m = self.df[colname].dropna().min()  # Otherwise -inf!
         else:
             m = self.df[colname].min()
-        if pandas_tdda_type(m) == 'date' and hasattr(m, 'to_pydatetime'):
-            m = m.to_pydatetime(warn=False)
-        elif hasattr(m, 'item'):
-            m = m.item()
-        return m
+        return python_scalar(m)
 
     def calc_max(self, colname):
         if is_string_col(self.df[colname]):
             M = self.df[colname].dropna().max()
         else:
             M = self.df[colname].max()
-        if pandas_tdda_type(M) == 'date' and hasattr(M, 'to_pydatetime'):
-            M = M.to_pydatetime(warn=False)
-        elif hasattr(M, 'item'):
-            M = M.item()
-        return M
+        return python_scalar(M)
 
     def calc_min_length(self, colname):
         if isPy3:
@@ -147,7 +196,7 @@ class PandasConstraintCalculator(BaseConstraintCalculator):
         return int(len(self.df) - self.df[colname].count())
 
     def calc_non_null_count(self, colname):
-        return int(len(self.df) - self.calc_null_count(colname))
+        return int(self.df[colname].count())
 
     def calc_nunique(self, colname):
         return int(self.df[colname].nunique())
@@ -160,6 +209,40 @@ class PandasConstraintCalculator(BaseConstraintCalculator):
         nonnullvalues = [v for v in values if not pd.isnull(v)]
         return nullvalues + sorted(nonnullvalues)
 
+    def calc_profile(self, colname):
+        """
+        Profile a column from a single (hash-based) pass over it,
+        using value_counts(); the other statistics are then computed
+        from the distinct values and their counts, which are usually
+        much smaller than the column itself.
+
+        Statistics that can't be computed for the column (e.g. the minimum
+        of an unordered categorical, or the sorted values of an object
+        column with mixed types) are left out.
+        """
+        col = self.df[colname]
+        counts = col.value_counts(dropna=True, sort=False)
+        if is_categorical_dtype(col.dtype):
+            counts = counts[counts > 0]     # unused categories
+        values = counts.index
+        non_null_count = int(counts.sum())
+        profile = {
+            'null_count': len(col) - non_null_count,
+            'non_null_count': non_null_count,
+            'nunique': len(values),
+        }
+        for (stat, f) in (('min', values.min), ('max', values.max)):
+            try:
+                profile[stat] = python_scalar(f())
+            except TypeError:
+                pass
+        if is_string_col(col):
+            try:
+                profile['non_null_uniques'] = sorted(values)
+            except TypeError:
+                pass
+        return profile
+
     def calc_non_integer_values_count(self, colname):
         values = self.df[colname].dropna()
         non_nulls = self.df[colname].count()
@@ -168,18 +251,27 @@ class PandasConstraintCalculator(BaseConstraintCalculator):
 
     def calc_all_non_nulls_boolean(self, colname):
         nn = self.df[colname].dropna()
-        return all([type(v) is bool for i, v in nn.iteritems()])
+        if pd.api.types.is_bool_dtype(nn.dtype):
+            return True
+        return pd.api.types.infer_dtype(nn, skipna=True) in ('boolean',
+                                                              'empty')
 
     def allowed_values_exclusions(self):
         # remarkably, Pandas returns various kinds of nulls as
         # unique values, despite not counting them with .nunique()
         return [None, np.nan, pd.NaT]
 
-    def find_rexes(self, colname, values=None, seed=None):
-        if values is None:
-            return rexpy.pdextract(self.df[colname])
+    def find_rexes(self, colname, values=None, seed=None, cache=None,
+                   executor=None):
+        if executor:
+            if values is None:
+                values = rexpy.pd_value_frequencies(self.df[colname])
+            return executor.submit(rexpy.extract, values, seed=seed,
+                                   cache=cache).result()
+        elif values is None:
+            return rexpy.pdextract(self.df[colname], seed=seed, cache=cache)
         else:
-            return rexpy.extract(values, seed=None)
+            return rexpy.extract(values, seed=seed, cache=cache)
 
     def calc_rex_constraint(self, colname, constraint, detect=False):
         # note that this should return a set of violations, not True/False.
@@ -187,26 +279,99 @@ class PandasConstraintCalculator(BaseConstraintCalculator):
         if rexes is None:      # a null value is not considered
             return None        # to be an active constraint,
                                # so is always satisfied
-        rexes = [re.compile(r, RE_FLAGS) for r in rexes]
-        strings = [native_definite(s)
-                   for s in self.df[colname].dropna().unique()]
-
-        failures = set()
-        for s in strings:
-            for r in rexes:
-                if re.match(r, s):
-                    break
-            else:
-                if DEBUG:
-                    print('*** Unmatched string: "%s"' % s)
-                if detect:
-                    failures.add(s)
-                else:
-                    return True  # At least one string didn't match
+        c = self.df[colname]
+        if is_categorical_dtype(c):
+            # only check the categories that are actually used
+            codes = c.cat.codes.values
+            values = pd.Series(c.cat.categories[np.unique(codes[codes >= 0])],
+                               dtype=object)
+        else:
+            values = pd.Series(c.dropna().unique(), dtype=object)
+        if pd.api.types.infer_dtype(values, skipna=True) != 'string':
+            # e.g. bytes (from parquet binary columns), decoded to match
+            values = values.map(native_definite)
+
+        unmatched = values[~ rex_matches(values, rexes,
+                                         self.compiled.get((colname, 'rex')))]
+        if DEBUG:
+            for s in unmatched:
+                print('*** Unmatched string: "%s"' % s)
         if detect:
-            return failures
+            return set(native_definite(s) for s in unmatched)
         else:
-            return None
+            return True if len(unmatched) > 0 else None
+
+
+class DetectionMatrix:
+    """
+    A :py:class:`DetectionMatrix` holds the per-record results of
+    detection, one column per constraint, as a tri-state matrix of
+    8-bit integers: ``PASS`` (1), ``FAIL`` (0), or ``NULL_RESULT`` (-1),
+    for a null value that neither passes nor fails. (``NULL_PASS`` (2)
+    marks a null value that is treated as passing.)
+
+    The matrix is allocated in advance, with space for more columns
+    allocated (doubling the number) only when it is full, and the number
+    of failures for each record is accumulated as each column is added.
+    DataFrame columns are only constructed for output, by
+    :py:meth:`to_frame`.
+    """
+    INITIAL_COLUMNS = 16
+
+    def __init__(self, nrecords):
+        self.nrecords = nrecords
+        self.values = np.empty((nrecords, self.INITIAL_COLUMNS),
+                               dtype=np.int8, order='F')
+        self.columns = OrderedDict()    # column name -> position in values
+        self.has_nulls = set()          # names of columns with null results
+        self.n_failures = np.zeros(nrecords, dtype=np.int32)
+
+    def set(self, name, values):
+        """
+        Sets the column called *name* to *values*, which is either a
+        tri-state array (as returned by :py:func:`detection_field`),
+        a boolean array, or a single boolean, for all records.
+        """
+        if name in self.columns:
+            j = self.columns[name]
+            self.n_failures -= self.values[:, j] == FAIL
+        else:
+            j = len(self.columns)
+            if j == self.values.shape[1]:
+                values_so_far = self.values
+                self.values = np.empty((self.nrecords, 2 * j),
+                                       dtype=np.int8, order='F')
+                self.values[:, :j] = values_so_far
+            self.columns[name] = j
+        col = self.values[:, j]
+        col[:] = np.asarray(values).astype(np.int8)
+        self.n_failures += col == FAIL
+        if np.any((col == NULL_RESULT) | (col == NULL_PASS)):
+            self.has_nulls.add(name)
+        else:
+            self.has_nulls.discard(name)
+
+    def to_frame(self, names, index, rows=None):
+        """
+        Returns a DataFrame with the given *index* and the columns
+        *names* (in that order), restricted to the given *rows*
+        (positions), if provided.
+
+        Columns with no null results (in any record) are boolean;
+        others are objects, with True, False and NaN values.
+        """
+        df = pd.DataFrame(index=index)
+        for name in names:
+            col = self.values[:, self.columns[name]]
+            if rows is not None:
+                col = col[rows]
+            passes = (col == PASS) | (col == NULL_PASS)
+            if name in self.has_nulls:
+                df[name] = np.where(col == NULL_RESULT, np.nan,
+                                    passes.astype('O'))
+            else:
+                df[name] = passes
+        return df
 
 
 class PandasConstraintDetector(BaseConstraintDetector):
@@ -216,107 +381,142 @@ class PandasConstraintDetector(BaseConstraintDetector):
     """
     def __init__(self, df):
         self.df = df
+        self.detect_lock = threading.Lock()
+        self.detection_order = {}
+        self.detection_kinds = {}
         if df is not None:
             self.date_cols = list(df.select_dtypes(include=[np.datetime64]))
-            index = df.index.copy()
-            if not index.name:
-                index.name = 'Index'
-            self.out_df = pd.DataFrame(index=index)
+            self.detected = DetectionMatrix(len(df))
         else:
             self.date_cols = []
-            self.out_df = None
+            self.detected = None
+        self.coarse_types = {}
+
+    def column_coarse_type(self, colname):
+        """
+        Returns the TDDA coarse type of column colname, memoized, since
+        most of the constraints on a column need it.
+        """
+        t = self.coarse_types.get(colname)
+        if t is None:
+            t = self.coarse_types[colname] = pandas_coarse_type(
+                self.df[colname])
+        return t
+
+    def set_detected(self, colname, kind, values):
+        """
+        Store the per-record results of checking the constraint of the
+        given kind on column colname as a column in the detection matrix.
+
+        Detection can happen in several threads at once (for different
+        columns), so the columns are added under a lock, and their
+        positions in the standard order (by input column, then by
+        constraint kind) are recorded, for sorting them before output.
+        """
+        name = verification_field(colname, kind)
+        names = list(self.df)
+        position = (names.index(colname) if colname in names else -1,
+                    STANDARD_FIELD_CONSTRAINTS.index(kind))
+        with self.detect_lock:
+            self.detected.set(name, values)
+            self.detection_order.setdefault(name, position)
+            self.detection_kinds.setdefault(name, (colname, kind))
 
     def detect_min_constraint(self, colname, value, precision, epsilon):
-        name = verification_field(colname, 'min')
         c = self.df[colname]
-        if not pandas_types_compatible(c, value):
-            self.out_df[name] = False
+        if self.column_coarse_type(colname) != pandas_coarse_type(value):
+            # every non-null value fails; nulls are still a null result
+            none = np.zeros(len(c), dtype=bool)
+            self.set_detected(colname, 'min', detection_field(c, none))
         elif precision == 'closed' or colname in self.date_cols:
-            self.out_df[name] = detection_field(c, c >= value)
+            self.set_detected(colname, 'min', detection_field(c, c >= value))
         elif precision == 'open':
-            self.out_df[name] = detection_field(c, c > value)
+            self.set_detected(colname, 'min', detection_field(c, c > value))
         else:
-            self.out_df[name] = detection_field(c, df_fuzzy_gt(c, value,
-                                                               epsilon))
+            self.set_detected(colname, 'min',
+                              detection_field(c, df_fuzzy_gt(c, value,
+                                                         epsilon)))
 
     def detect_max_constraint(self, colname, value, precision, epsilon):
-        name = verification_field(colname, 'max')
         c = self.df[colname]
-        if not pandas_types_compatible(c, value):
-            self.out_df[name] = False
+        if self.column_coarse_type(colname) != pandas_coarse_type(value):
+            # every non-null value fails; nulls are still a null result
+            none = np.zeros(len(c), dtype=bool)
+            self.set_detected(colname, 'max', detection_field(c, none))
         elif precision == 'closed' or colname in self.date_cols:
-            self.out_df[name] = detection_field(c, c <= value)
+            self.set_detected(colname, 'max', detection_field(c, c <= value))
         elif precision == 'open':
-            self.out_df[name] = detection_field(c, c < value)
+            self.set_detected(colname, 'max', detection_field(c, c < value))
         else:
-            self.out_df[name] = detection_field(c, df_fuzzy_lt(c, value,
-                                                               epsilon))
+            self.set_detected(colname, 'max',
+                              detection_field(c, df_fuzzy_lt(c, value,
+                                                         epsilon)))
 
     def detect_min_length_constraint(self, colname, value):
-        name = verification_field(colname, 'min_length')
         c = self.df[colname]
-        if pandas_coarse_type(c) != 'string':
-            self.out_df[name] = False
+        if self.column_coarse_type(colname) != 'string':
+            self.set_detected(colname, 'min_length', False)
         else:
-            self.out_df[name] = detection_field(c, c.str.len() >= value)
+            self.set_detected(colname, 'min_length',
+                              detection_field(c, c.str.len() >= value))
 
     def detect_max_length_constraint(self, colname, value):
-        name = verification_field(colname, 'max_length')
         c = self.df[colname]
-        if pandas_coarse_type(c) != 'string':
-            self.out_df[name] = False
+        if self.column_coarse_type(colname) != 'string':
+            self.set_detected(colname, 'max_length', False)
         else:
-            self.out_df[name] = detection_field(c, c.str.len() <= value)
+            self.set_detected(colname, 'max_length',
+                              detection_field(c, c.str.len() <= value))
 
     def detect_tdda_type_constraint(self, colname, value):
-        name = verification_field(colname, 'type')
-        self.out_df[name] = False
+        self.set_detected(colname, 'type', False)
 
     def detect_sign_constraint(self, colname, value):
-        name = verification_field(colname, 'sign')
         c = self.df[colname]
 
-        if pandas_coarse_type(c) != 'number':
+        if self.column_coarse_type(colname) != 'number':
             result = False
         elif value == 'null':
-            self.out_df[name] = False
+            self.set_detected(colname, 'sign', False)
         elif value == 'positive':
-            self.out_df[name] = detection_field(c, c > 0)
+            self.set_detected(colname, 'sign', detection_field(c, c > 0))
         elif value == 'non-negative':
-            self.out_df[name] = detection_field(c, c >= 0)
+            self.set_detected(colname, 'sign', detection_field(c, c >= 0))
         elif value == 'zero':
-            self.out_df[name] = detection_field(c, c == 0)
+            self.set_detected(colname, 'sign', detection_field(c, c == 0))
         elif value == 'non-positive':
-            self.out_df[name] = detection_field(c, c <= 0)
+            self.set_detected(colname, 'sign', detection_field(c, c <= 0))
         elif value == 'negative':
-            self.out_df[name] = detection_field(c, c < 0)
+            self.set_detected(colname, 'sign', detection_field(c, c < 0))
 
     def detect_max_nulls_constraint(self, colname, value):
         # found more nulls than are allowed, so mark all null values as bad
-        name = verification_field(colname, 'max_nulls')
         c = self.df[colname]
-        self.out_df[name] = pd.notnull(c)
+        self.set_detected(colname, 'max_nulls', pd.notnull(c))
 
     def detect_no_duplicates_constraint(self, colname, value):
         # found duplicates, so mark anything duplicated as bad
-        name = verification_field(colname, 'no_duplicates')
         c = self.df[colname]
         unique = ~ self.df.duplicated(colname, keep=False)
-        self.out_df[name] = detection_field(c, unique, default=True)
+        self.set_detected(colname, 'no_duplicates',
+                          detection_field(c, unique, default=True))
 
     def detect_allowed_values_constraint(self, colname, allowed_values,
                                          violations):
-        name = verification_field(colname, 'allowed_values')
         c = self.df[colname]
-        self.out_df[name] = detection_field(c, ~ c.isin(violations))
+        self.set_detected(colname, 'allowed_values',
+                          detection_field(c, ~ c.isin(violations)))
 
     def detect_rex_constraint(self, colname, violations):
-        name = verification_field(colname, 'rex')
         c = self.df[colname]
-        if pandas_coarse_type(c) != 'string':
-            self.out_df[name] = False
+        if self.column_coarse_type(colname) != 'string':
+            self.set_detected(colname, 'rex', False)
         else:
-            self.out_df[name] = detection_field(c, ~ c.isin(violations))
+            keys = c
+            if pd.api.types.infer_dtype(c, skipna=True) != 'string':
+                keys = c.map(native_definite)   # violations are decoded
+            self.set_detected(colname, 'rex',
+                              detection_field(c, ~ keys.isin(violations)))
 
     def write_detected_records(self,
                                detect_outpath=None,
@@ -328,9 +528,37 @@ class PandasConstraintDetector(BaseConstraintDetector):
                                rownumber_is_index=True,
                                boolean_ints=False,
                                interleave=False,
+                               detect_writer=None,
+                               detect_row_offset=0,
+                               compact=False,
                                **kwargs):
-        if self.out_df is None:
+        """
+        Writes the detection results to *detect_outpath* (if provided),
+        and returns a Detection object.
+
+        When detecting in chunks, *detect_writer* is the
+        :py:class:`PandasDetectionWriter` to which the results for each
+        chunk are appended (in place of *detect_outpath*), and
+        *detect_row_offset* is the number of records in previous chunks,
+        so that row numbers are for the whole dataset.
+
+        If *compact* is set, the results are a :py:class:`FailureIndex`
+        (see :py:meth:`failure_index`), rather than a DataFrame.
+        """
+        if self.detected is None:
             return None
+        if compact:
+            if detect_in_place:
+                raise Exception('Cannot detect in place with compact '
+                                'output.')
+            failures = self.failure_index(detect_row_offset)
+            if detect_outpath:
+                failures.save(detect_outpath)
+            n_failing_records = len(failures)
+            return Detection(failures, failures.nrecords - n_failing_records,
+                             n_failing_records)
+        if detect_writer:
+            detect_outpath = detect_writer.path
         orig_fields = list(self.df)
         output_is_typed = (
             detect_outpath
@@ -339,7 +567,6 @@ class PandasConstraintDetector(BaseConstraintDetector):
         output_is_feather = (detect_outpath
                              and file_format(detect_outpath) == 'feather')
 
-        out_df = self.out_df
         add_index = detect_index or detect_output_fields is None
         if detect_output_fields is None:
             detect_output_fields = []
@@ -347,26 +574,38 @@ class PandasConstraintDetector(BaseConstraintDetector):
             detect_output_fields = list(self.df)
 
         nfailname = 'n_failures'
-        nf = len(list(out_df))
-        fails = (nf - out_df.sum(axis=1).astype(float)
-                    - out_df.isnull().sum(axis=1).astype(float))
-        out_df[nfailname] = fails.astype(int)
-        n_failing_records = (fails > 0).astype(int).sum()
-        n_passing_records = len(out_df) - n_failing_records
-
-        if not detect_per_constraint:
-            fnames = [name for name in list(out_df) if name != nfailname]
-            out_df = out_df.drop(fnames, axis=1)
+        fails = self.detected.n_failures
+        n_failing_records = int(np.count_nonzero(fails))
+        n_passing_records = len(fails) - n_failing_records
+
+        # Only construct the output for the failing records, unless
+        # all are needed.
+        if detect_write_all or detect_in_place:
+            rows = None
+            row_numbers = np.arange(len(fails))
+        else:
+            rows = row_numbers = np.flatnonzero(fails)
+        index = self.df.index if rows is None else self.df.index[rows]
+        if not index.name and not isinstance(index, pd.MultiIndex):
+            index = index.rename('Index')
+        names = (sorted(self.detected.columns, key=self.detection_order.get)
+                 if detect_per_constraint else [])
+        out_df = self.detected.to_frame(names, index, rows)
+        out_df[nfailname] = (fails if rows is None
+                             else fails[rows]).astype(int)
 
         if detect_in_place:
             for fname in list(out_df):
-                newfield = out_df[fname]
+                newfield = out_df[fname].values
                 self.df[unique_column_name(self.df, fname)] = newfield
 
         if detect_output_fields:
             for fname in reversed(detect_output_fields):
                 if fname in list(self.df):
-                    out_df.insert(0, fname, self.df[fname])
+                    c = self.df[fname]
+                    out_df.insert(0, fname,
+                                  c.array if rows is None
+                                  else c.iloc[rows].array)
                 else:
                     raise Exception('DataFrame has no column %s' % fname)
 
@@ -398,30 +637,56 @@ class PandasConstraintDetector(BaseConstraintDetector):
                     if isinstance(df_to_save.index, pd.MultiIndex):
                         for i, level in enumerate(df_to_save.index.levels):
                             name = (df_to_save.index.names[i]
-                                    if df_to_save.index.names
-                                    else '%s_%d' % (stem, (i+1)))
+                                    or '%s_%d' % (stem, (i+1)))
                             pair = (unique_column_name(df_to_save, name),
                                     df_to_save.index.get_level_values(i))
                             indexes.append(pair)
                     else:
                         indexes.append((unique_column_name(df_to_save, stem),
                                         df_to_save.index))
-                    df_to_save.reset_index(inplace=True, drop=True)
+                    # number the records by position in the whole DataFrame
+                    df_to_save.index = (pd.RangeIndex(len(df_to_save))
+                                        if rows is None
+                                        else pd.Index(row_numbers))
                 else:
                     pair = (unique_column_name(df_to_save, 'RowNumber'),
-                            pd.RangeIndex(1, len(df_to_save)+1))
+                            detect_row_offset + 1 + row_numbers)
                     indexes.append(pair)
                 for name, index in reversed(indexes):
                     df_to_save.insert(0, name, index)
 
             if not detect_write_all:
                 df_to_save = df_to_save[df_to_save[nfailname] > 0]
-            save_df(df_to_save, detect_outpath, index=False)
+            if detect_writer:
+                detect_writer.write(df_to_save)
+            else:
+                save_df(df_to_save, detect_outpath, index=False)
 
         if not detect_write_all:
             out_df = out_df[out_df[nfailname] > 0]
         return Detection(out_df, n_passing_records, n_failing_records)
 
+    def failure_index(self, row_offset=0):
+        """
+        Returns a :py:class:`FailureIndex` of the failing records, and the
+        constraints that they failed, from the detection matrix, without
+        constructing any DataFrame columns; row numbers start from
+        *row_offset* + 1.
+        """
+        names = sorted(self.detected.columns, key=self.detection_order.get)
+        positions = [self.detected.columns[name] for name in names]
+        rows = np.flatnonzero(self.detected.n_failures)
+        failed = self.detected.values[np.ix_(rows, positions)] == FAIL
+        constraints = [
+            OrderedDict((('name', name),
+                         ('field', self.detection_kinds[name][0]),
+                         ('kind', self.detection_kinds[name][1])))
+            for name in names
+        ]
+        return FailureIndex(row_offset + 1 + rows,
+                            np.packbits(failed, axis=1, bitorder='little'),
+                            constraints, nrecords=self.detected.nrecords)
+
     def interleave(self, df, orig_fields, nfailname):
         if set(orig_fields) - set(list(df)):
             return df
@@ -449,11 +714,15 @@ class PandasConstraintVerifier(PandasConstraintCalculator,
     A :py:class:`PandasConstraintVerifier` object provides methods
     for verifying every type of constraint against a Pandas DataFrame.
     """
-    def __init__(self, df, epsilon=None, type_checking=None):
+    threadsafe = True
+
+    def __init__(self, df, epsilon=None, type_checking=None, n_jobs=None,
+                 compiled=None):
         PandasConstraintCalculator.__init__(self, df)
         PandasConstraintDetector.__init__(self, df)
         BaseConstraintVerifier.__init__(self, epsilon=epsilon,
-                                        type_checking=type_checking)
+                                        type_checking=type_checking,
+                                        n_jobs=n_jobs, compiled=compiled)
 
     def repair_field_types(self, constraints):
         # We sometimes haven't inferred the field types correctly for
@@ -495,6 +764,820 @@ class PandasConstraintVerifier(PandasConstraintCalculator,
                 print('%s: %s' % (e.__class__.__name__, str(e)))
 
 
+class PandasColumnAccumulator:
+    """
+    A :py:class:`PandasColumnAccumulator` holds mergeable statistics
+    for a single column of a dataset that is processed in chunks
+    (a sequence of Pandas DataFrames), sufficient to verify the
+    constraints for the field without having the whole column in memory.
+
+    Distinct values are only kept for fields with ``allowed_values``
+    or ``no_duplicates`` constraints, and violations of regular
+    expressions only for fields with ``rex`` constraints.
+
+    The set of distinct values is capped at *max_distinct* values
+    (or one more than the number of allowed values, if that is larger),
+    since beyond that the ``allowed_values`` constraint is known to fail.
+    For ``no_duplicates`` constraints, all distinct values are kept
+    until a duplicate is found. In both cases, once the cap applies,
+    the number of distinct values is only a lower bound, but that
+    is enough to verify the constraints.
+
+    If *detect* is set, nothing is capped, and the values that occur more
+    than once are also kept, for fields with ``no_duplicates`` constraints,
+    since all of these are needed to identify failing records.
+    """
+    def __init__(self, name, constraints=None, max_distinct=None,
+                 detect=False):
+        self.name = name
+        self.constraints = constraints
+        self.detect = detect
+        self.max_distinct = (MAX_DISTINCT_VALUES if max_distinct is None
+                             else max_distinct)
+        self.nrecords = 0
+        self.null_count = 0
+        self.non_null_count = 0
+        self.null_type = None       # type of first chunk, even if all null
+        self.null_types = set()     # types of chunks with only nulls
+        self.types = []             # types of chunks with non-null values
+        self.min = self.max = None
+        self.min_length = self.max_length = None
+        self.non_integer_values_count = 0
+        self.all_non_nulls_boolean = True
+        self.values = None          # distinct non-null values
+        self.values_full = False    # set if no more values will be added
+        self.duplicated = False
+        self.duplicates = set()     # values seen more than once, if detecting
+        self.rex = self.rex_violations = None
+
+        fc = constraints.constraints if constraints else {}
+        allowed = fc.get('allowed_values')
+        self.track_allowed = bool(allowed and allowed.value is not None)
+        no_dups = fc.get('no_duplicates')
+        self.track_duplicates = bool(no_dups and no_dups.value is True)
+        if self.track_allowed or self.track_duplicates:
+            self.values = set()
+            if self.track_allowed:
+                self.max_distinct = max(self.max_distinct,
+                                        len(allowed.value) + 1)
+        rex = fc.get('rex')
+        if rex and rex.value is not None:
+            self.rex = rex
+            self.rex_violations = set()
+
+    def update(self, df):
+        """
+        Updates the statistics with the values of the column in *df*,
+        the next chunk of the dataset.
+        """
+        self.merge(self.summarize(df))
+
+    def summarize(self, df):
+        """
+        Returns a new accumulator with the statistics for the column
+        in *df*, using a single (hash-based) pass over the column.
+        """
+        acc = PandasColumnAccumulator(self.name, self.constraints,
+                                      self.max_distinct, self.detect)
+        col = df[self.name]
+        counts = col.value_counts(dropna=True, sort=False)
+        if is_categorical_dtype(col.dtype):
+            counts = counts[counts > 0]     # unused categories
+        values = counts.index
+        t = pandas_tdda_type(col)
+        acc.nrecords = len(col)
+        acc.non_null_count = int(counts.sum())
+        acc.null_count = acc.nrecords - acc.non_null_count
+        acc.null_type = t
+        if acc.non_null_count == 0:
+            acc.null_types = {t}
+            return acc      # no information about the values
+
+        acc.types = [t]
+        for (stat, f) in (('min', values.min), ('max', values.max)):
+            try:
+                setattr(acc, stat, python_scalar(f()))
+            except TypeError:
+                pass
+        if t == 'string':
+            lengths = pd.Series(values, dtype=object).str.len()
+            if lengths.count() > 0:
+                acc.min_length = python_scalar(lengths.min())
+                acc.max_length = python_scalar(lengths.max())
+            if acc.rex:
+                calc = PandasConstraintCalculator(df)
+                acc.rex_violations = calc.calc_rex_constraint(self.name,
+                                                              acc.rex,
+                                                              detect=True)
+        elif t == 'real':
+            calc = PandasConstraintCalculator(df)
+            acc.non_integer_values_count = (
+                calc.calc_non_integer_values_count(self.name))
+        acc.all_non_nulls_boolean = all(type(v) is bool for v in values)
+        if acc.values is not None:
+            acc.values = set(values.tolist())
+            acc.duplicated = bool((counts > 1).any())
+            if self.detect and self.track_duplicates:
+                acc.duplicates = set(values[(counts > 1).values].tolist())
+            acc.values_full = self.is_full(acc.values, acc.duplicated)
+        return acc
+
+    def merge(self, other):
+        """
+        Merges the statistics from *other*, an accumulator for the same
+        column over a later part of the dataset, into this one.
+        """
+        self.nrecords += other.nrecords
+        self.null_count += other.null_count
+        self.non_null_count += other.non_null_count
+        if self.null_type is None:
+            self.null_type = other.null_type
+        self.null_types.update(other.null_types)
+        self.types.extend(t for t in other.types if t not in self.types)
+        self.min = extreme(min, self.min, other.min)
+        self.max = extreme(max, self.max, other.max)
+        self.min_length = extreme(min, self.min_length, other.min_length)
+        self.max_length = extreme(max, self.max_length, other.max_length)
+        self.non_integer_values_count += other.non_integer_values_count
+        self.all_non_nulls_boolean = (self.all_non_nulls_boolean
+                                      and other.all_non_nulls_boolean)
+        if self.values is not None and not self.values_full:
+            if self.detect and self.track_duplicates:
+                self.duplicates.update(other.duplicates,
+                                       self.values & other.values)
+            n = len(self.values)
+            self.values.update(other.values)
+            self.duplicated = (self.duplicated or other.duplicated
+                               or len(self.values) < n + len(other.values))
+            self.values_full = (other.values_full
+                                or self.is_full(self.values, self.duplicated))
+        if (self.rex_violations is not None
+                and (self.detect
+                     or len(self.rex_violations) < self.max_distinct)):
+            self.rex_violations.update(other.rex_violations or ())
+
+    def is_full(self, values, duplicated):
+        """
+        Returns whether no more distinct values need to be kept.
+        """
+        if self.detect or (self.track_duplicates and not duplicated):
+            return False
+        return (len(values) > self.max_distinct
+                or (self.track_duplicates and not self.track_allowed))
+
+    def tdda_type(self):
+        """
+        Returns the TDDA type of the column as a whole.
+
+        Integer chunks combine with real chunks (including chunks with
+        only nulls, as floating-point NaNs) to give a real column, as they
+        would if they were in a single DataFrame. Other chunks with only
+        nulls are ignored (unless all of them are), and differing types
+        are combined as a column of objects would be.
+        """
+        if not self.types:
+            return self.null_type
+        elif self.types == ['int'] and 'real' in self.null_types:
+            return 'real'
+        elif len(self.types) == 1:
+            return self.types[0]
+        elif set(self.types) <= {'int', 'real'}:
+            return 'real'
+        elif 'string' in self.types:
+            return 'string'
+        for t in self.types:
+            if t in ('bool', 'date'):
+                return t
+        return self.types[0]
+
+
+class PandasChunkedConstraintVerifier(PandasConstraintCalculator,
+                                      BaseConstraintVerifier):
+    """
+    A :py:class:`PandasChunkedConstraintVerifier` object verifies
+    constraints against a dataset supplied in chunks (Pandas DataFrames
+    with the same columns), for datasets that are too large to fit in
+    memory.
+
+    Each chunk is used to update a
+    :py:class:`PandasColumnAccumulator` for each column, and then
+    discarded; the constraints are then verified from the accumulated
+    statistics, giving the same results as verifying the whole dataset
+    as a single DataFrame.
+
+    If *detect* is set, the accumulators keep everything needed to
+    detect failing records afterwards, chunk by chunk, with a
+    :py:class:`PandasChunkConstraintDetector`.
+    """
+    def __init__(self, constraints, epsilon=None, type_checking=None,
+                 repair=True, max_distinct=None, detect=False):
+        PandasConstraintCalculator.__init__(self, None)
+        BaseConstraintVerifier.__init__(self, epsilon=epsilon,
+                                        type_checking=type_checking)
+        self.constraints = constraints
+        self.repair = repair
+        self.max_distinct = max_distinct
+        self.detecting = detect
+        self.accumulators = OrderedDict()
+        self.nrecords = 0
+
+    def update(self, df):
+        """
+        Updates the statistics for every column with the values in *df*,
+        the next chunk of the dataset.
+        """
+        if self.repair:
+            PandasConstraintVerifier(df).repair_field_types(self.constraints)
+        for c in df.columns:
+            if c not in self.accumulators:
+                fc = self.constraints[c] if c in self.constraints else None
+                self.accumulators[c] = PandasColumnAccumulator(
+                    c, fc, max_distinct=self.max_distinct,
+                    detect=self.detecting)
+            self.accumulators[c].update(df)
+        self.nrecords += len(df)
+
+    def get_column_names(self):
+        return list(self.accumulators)
+
+    def get_nrecords(self):
+        return self.nrecords
+
+    def calc_min(self, colname):
+        return nvl(self.accumulators[colname].min, np.nan)
+
+    def calc_max(self, colname):
+        return nvl(self.accumulators[colname].max, np.nan)
+
+    def calc_min_length(self, colname):
+        return nvl(self.accumulators[colname].min_length, np.nan)
+
+    def calc_max_length(self, colname):
+        return nvl(self.accumulators[colname].max_length, np.nan)
+
+    def calc_tdda_type(self, colname):
+        return self.accumulators[colname].tdda_type()
+
+    def calc_null_count(self, colname):
+        return self.accumulators[colname].null_count
+
+    def calc_non_null_count(self, colname):
+        return self.accumulators[colname].non_null_count
+
+    def calc_nunique(self, colname):
+        return len(self.accumulators[colname].values or ())
+
+    def calc_unique_values(self, colname, include_nulls=True):
+        values = self.accumulators[colname].values or ()
+        return sorted(values)
+
+    def calc_profile(self, colname):
+        return {}
+
+    def calc_non_integer_values_count(self, colname):
+        return self.accumulators[colname].non_integer_values_count
+
+    def calc_all_non_nulls_boolean(self, colname):
+        return self.accumulators[colname].all_non_nulls_boolean
+
+    def calc_rex_constraint(self, colname, constraint, detect=False):
+        violations = self.accumulators[colname].rex_violations
+        if detect:
+            return violations
+        else:
+            return True if violations else None
+
+
+class PandasChunkConstraintDetector(PandasConstraintDetector,
+                                    PandasChunkedConstraintVerifier):
+    """
+    A :py:class:`PandasChunkConstraintDetector` object detects failing
+    records in a single chunk of a dataset, using the statistics for the
+    whole dataset from a :py:class:`PandasChunkedConstraintVerifier`
+    (constructed with *detect* set, and updated with every chunk).
+
+    So constraints are verified for the dataset as a whole, and values
+    are detected as duplicates, or as violating allowed values or regular
+    expressions, on the basis of all the chunks, not just this one.
+    """
+    def __init__(self, df, verifier):
+        for c in df.columns:
+            if c not in verifier.accumulators:
+                continue
+            # convert columns to the type of the dataset as a whole, as
+            # they would be in a single DataFrame: integer columns that
+            # are real overall are promoted, and columns with no values
+            # in this chunk (so read as real) take the overall type
+            t = verifier.accumulators[c].tdda_type()
+            ct = pandas_tdda_type(df[c])
+            if (t in CHUNK_DTYPES and t != ct
+                    and (df[c].count() == 0 or (t, ct) == ('real', 'int'))):
+                df[c] = df[c].astype(CHUNK_DTYPES[t])
+        PandasChunkedConstraintVerifier.__init__(
+            self, verifier.constraints, epsilon=verifier.epsilon,
+            type_checking=verifier.type_checking, repair=verifier.repair,
+            detect=True)
+        PandasConstraintDetector.__init__(self, df)
+        self.accumulators = verifier.accumulators
+        self.nrecords = verifier.nrecords
+        if self.repair:
+            PandasConstraintVerifier(df).repair_field_types(self.constraints)
+
+    def detect_no_duplicates_constraint(self, colname, value):
+        # mark anything duplicated anywhere in the dataset as bad
+        c = self.df[colname]
+        duplicates = self.accumulators[colname].duplicates
+        self.set_detected(colname, 'no_duplicates',
+                          detection_field(c, ~ c.isin(duplicates),
+                                          default=True))
+
+
+class PandasDetectionWriter:
+    """
+    A :py:class:`PandasDetectionWriter` writes detection results to
+    a CSV or parquet file (or to standard output, as CSV, if *path*
+    is ``-``) incrementally, one chunk at a time.
+
+    Parquet output uses the schema of the first chunk written, with
+    columns that are entirely null in that chunk typed from *types*,
+    a mapping from (original) column names to TDDA types; any other such
+    columns are detection results, so are boolean.
+    """
+    def __init__(self, path, types=None):
+        self.path = path
+        self.fmt = 'csv' if path == '-' else file_format(path)
+        if self.fmt == 'feather':
+            raise Exception('Cannot write detection results to a feather '
+                            'file incrementally.')
+        elif self.fmt not in ('parquet', 'csv', 'psv', 'tsv', 'txt'):
+            raise Exception(f'Unknown output format: {self.fmt}')
+        self.types = types or {}
+        self.nchunks = 0
+        self.parquet_writer = None
+
+    def write(self, df):
+        """
+        Appends the records in *df* to the output.
+        """
+        if self.fmt == 'parquet':
+            self.write_parquet(df)
+        elif self.path == '-':
+            sys.stdout.write(default_csv_writer(df, None, index=False,
+                                                header=self.nchunks == 0))
+        else:
+            default_csv_writer(df, self.path, index=False,
+                               mode='w' if self.nchunks == 0 else 'a',
+                               header=self.nchunks == 0)
+        self.nchunks += 1
+
+    def write_parquet(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.parquet_writer is None:
+            arrow_types = {
+                'bool': pa.bool_(),
+                'int': pa.float64(),    # ints with nulls are floats in pandas
+                'real': pa.float64(),
+                'string': pa.string(),
+                'date': pa.timestamp('ns'),
+                'other': pa.string(),
+            }
+            fields = [
+                f.with_type(arrow_types[self.types.get(f.name, 'bool')])
+                if pa.types.is_null(f.type) else f
+                for f in table.schema
+            ]
+            schema = pa.schema(fields, metadata=table.schema.metadata)
+            self.parquet_writer = pq.ParquetWriter(self.path, schema)
+        schema = self.parquet_writer.schema
+        columns = [
+            pa.nulls(len(table), f.type) if col.null_count == len(table)
+            else col.cast(f.type) if col.type != f.type
+            else col
+            for (f, col) in zip(schema, table.columns)
+        ]
+        table = pa.Table.from_arrays(columns, schema=schema)
+        self.parquet_writer.write_table(table)
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+            self.parquet_writer = None
+
+
+class FailureIndex:
+    """
+    A :py:class:`FailureIndex` is a compact form of detection results,
+    for datasets in which few records fail: the row numbers of the
+    failing records (counting from 1, as for ``RowNumber`` columns),
+    and, for each of them, a bitmask of the constraints that it failed.
+
+    Its attributes are:
+
+        - *row_numbers*  --- an integer array of the row numbers of the
+                             failing records
+        - *masks*        --- an array of bytes (``uint8``), with a row
+                             for each failing record, in which bit
+                             ``j % 8`` (counting from the least significant
+                             bit) of byte ``j // 8`` is set if the record
+                             failed constraint ``j``
+        - *constraints*  --- a list of dictionaries describing the
+                             constraints, in order, with their ``name``
+                             (as for their columns in full detection
+                             results, e.g. ``a_max_ok``), ``field``
+                             and ``kind``
+        - *nrecords*     --- the number of records in the whole dataset.
+
+    A null value that neither passes nor fails a constraint is not a
+    failure, so is not recorded.
+
+    It is saved (by :py:meth:`save`) to a parquet file, with columns
+    ``RowNumber`` and ``failures`` (fixed-size binary, holding the
+    masks), or to a NumPy ``.npz`` file, with arrays of the same names,
+    and in either case, a sidecar JSON file (with ``.json`` appended to
+    the name) listing the constraints. The ``.npz`` file is uncompressed,
+    so that its arrays can be memory-mapped by :py:meth:`load`.
+    """
+    def __init__(self, row_numbers, masks, constraints, nrecords=None):
+        self.row_numbers = row_numbers
+        self.masks = masks
+        self.constraints = constraints
+        self.nrecords = nrecords
+
+    def __len__(self):
+        return len(self.row_numbers)
+
+    def __repr__(self):
+        return ('FailureIndex(%d failing records of %s, %d constraints)'
+                % (len(self), self.nrecords, len(self.constraints)))
+
+    def constraint_names(self):
+        return [c['name'] for c in self.constraints]
+
+    def failed(self, name):
+        """
+        Returns a boolean array, with an element for each failing record,
+        which is true if it failed the constraint called *name*.
+        """
+        j = self.constraint_names().index(name)
+        return ((self.masks[:, j // 8] >> (j % 8)) & 1).astype(bool)
+
+    def n_failures(self):
+        """
+        Returns an integer array of the number of constraints that each
+        failing record failed.
+        """
+        bits = np.unpackbits(self.masks, axis=1,
+                             count=len(self.constraints), bitorder='little')
+        return bits.sum(axis=1)
+
+    def to_frame(self, per_constraint=True):
+        """
+        Returns a DataFrame of the detection results for the failing
+        records, indexed by their row numbers (as ``RowNumber``), with a
+        boolean ``ok`` column for each constraint (if *per_constraint*
+        is set) and the number of failures, as ``n_failures``.
+        """
+        df = pd.DataFrame(index=pd.Index(np.asarray(self.row_numbers),
+                                         name='RowNumber'))
+        if per_constraint:
+            for name in self.constraint_names():
+                df[name] = ~ self.failed(name)
+        df['n_failures'] = self.n_failures().astype(int)
+        return df
+
+    def join(self, source, columns=None, per_constraint=True):
+        """
+        Returns the failing records from *source*, which is either the
+        DataFrame that the detection was for, or the path of the file it
+        was read from, with the results from :py:meth:`to_frame` as
+        extra columns.
+
+        Only the *columns* listed (or all columns, if it is ``None``) are
+        included, and only those columns, and (for parquet files) the row
+        groups containing the failing records, are read from a file.
+
+        Records from a DataFrame keep its index; records from a file
+        are indexed by their row numbers.
+        """
+        rows = np.asarray(self.row_numbers) - 1
+        if isinstance(source, pd.DataFrame):
+            df = source if columns is None else source[list(columns)]
+            df = df.iloc[rows].copy()
+        else:
+            df = read_rows(source, rows, columns)
+            df.index = pd.Index(np.asarray(self.row_numbers),
+                                name='RowNumber')
+        detected = self.to_frame(per_constraint)
+        for name in list(detected):
+            df[unique_column_name(df, name)] = detected[name].values
+        return df
+
+    def sidecar(self):
+        return OrderedDict((
+            ('nrecords', self.nrecords),
+            ('n_failing_records', len(self)),
+            ('constraints', [OrderedDict([('id', j)] + list(c.items()))
+                             for j, c in enumerate(self.constraints)]),
+        ))
+
+    def save(self, path):
+        """
+        Saves the index to *path*, which must be a ``.parquet`` or
+        ``.npz`` file, and the list of constraints to its sidecar file.
+        """
+        check_compact_outpath(path)
+        fmt = file_format(path)
+        row_numbers = np.asarray(self.row_numbers, dtype=np.int64)
+        masks = np.ascontiguousarray(self.masks, dtype=np.uint8)
+        if fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            failures = pa.FixedSizeBinaryArray.from_buffers(
+                pa.binary(masks.shape[1]), len(masks),
+                [None, pa.py_buffer(masks)])
+            table = pa.table({'RowNumber': row_numbers,
+                              'failures': failures})
+            pq.write_table(table, path)
+        else:
+            np.savez(path, RowNumber=row_numbers, failures=masks)
+        with open(failure_index_sidecar_path(path), 'w') as f:
+            json.dump(self.sidecar(), f, indent=4)
+            f.write('\n')
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Loads a :py:class:`FailureIndex` saved to *path* (with its
+        sidecar file). If *mmap* is set, the arrays from a ``.npz``
+        file are memory-mapped, rather than read into memory.
+        """
+        with open(failure_index_sidecar_path(path)) as f:
+            sidecar = json.load(f)
+        constraints = [OrderedDict((k, v) for (k, v) in c.items()
+                                   if k != 'id')
+                       for c in sidecar['constraints']]
+        fmt = file_format(path)
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            table = pq.read_table(path, memory_map=mmap)
+            row_numbers = table.column('RowNumber').to_numpy()
+            failures = table.column('failures').combine_chunks()
+            width = failures.type.byte_width
+            if len(failures):
+                masks = np.frombuffer(failures.buffers()[1], dtype=np.uint8,
+                                      count=len(failures) * width,
+                                      offset=failures.offset * width)
+                masks = masks.reshape(len(failures), width)
+            else:
+                masks = np.zeros((0, width), dtype=np.uint8)
+        elif fmt == 'npz':
+            arrays = load_npz(path, mmap=mmap)
+            row_numbers = arrays['RowNumber']
+            masks = arrays['failures']
+        else:
+            raise Exception('Compact detection output must be a .parquet '
+                            'or .npz file, not %s' % path)
+        return cls(row_numbers, masks, constraints,
+                   nrecords=sidecar.get('nrecords'))
+
+    @classmethod
+    def concat(cls, indexes):
+        """
+        Combines the indexes for consecutive chunks of a dataset (whose
+        row numbers are already for the dataset as a whole) into one.
+        """
+        indexes = list(indexes)
+        constraints = indexes[0].constraints if indexes else []
+        if any(fi.constraints != constraints for fi in indexes):
+            raise Exception('Cannot combine failure indexes for different '
+                            'constraints.')
+        width = (len(constraints) + 7) // 8
+        return cls(np.concatenate([fi.row_numbers for fi in indexes]
+                                  or [np.zeros(0, dtype=np.int64)]),
+                   np.concatenate([fi.masks for fi in indexes]
+                                  or [np.zeros((0, width), dtype=np.uint8)]),
+                   constraints,
+                   nrecords=sum(fi.nrecords or 0 for fi in indexes))
+
+
+class ParquetColumnStatistics:
+    """
+    A :py:class:`ParquetColumnStatistics` object summarizes the statistics
+    for a column from a parquet file's footer (row-group metadata), as
+    they would be for the column in the DataFrame from ``pd.read_parquet``.
+
+    Its attributes are:
+
+        - *tdda_type*   --- the TDDA type of the column in Pandas,
+                            or ``None`` if this can't be known without
+                            reading the column (e.g. categoricals)
+        - *null_count*  --- the number of nulls, or ``None`` if this is
+                            not known exactly (e.g. if a float column
+                            could contain NaNs, which parquet does not
+                            count as nulls)
+        - *min*, *max*  --- the minimum and maximum (non-null) values,
+                            if these are exact, with ``has_min_max`` set
+                            if they are (they are both ``None`` if there
+                            are no non-null values).
+
+    Minimum and maximum values are only used for numeric and
+    (timezone-naive) timestamp columns, since parquet writers can
+    truncate string statistics, and boolean columns with nulls are
+    objects in Pandas. They are not used for nanosecond timestamps,
+    which can't be converted to Python datetimes exactly.
+
+    *numpy_type* is the column's dtype in Pandas, from the pandas metadata
+    in the file, if there is any. An integer column with nulls is only
+    known to be ``real`` if it is a plain NumPy integer type (or there
+    is no pandas metadata), since a Pandas nullable integer column
+    (e.g. ``Int64``) is read back as integers.
+    """
+    def __init__(self, field, chunks, nrecords, from_pandas=False,
+                 numpy_type=None):
+        import pyarrow as pa
+        t = field.type
+        stats = [c.statistics for c in chunks]
+        complete = all(s is not None and s.has_null_count for s in stats)
+        nulls = sum(s.null_count for s in stats) if complete else None
+        is_int = pa.types.is_integer(t)
+        is_float = pa.types.is_floating(t)
+        is_date = pa.types.is_timestamp(t) and t.tz is None
+        if nulls is not None and is_float and not from_pandas:
+            nulls = None    # NaNs aren't counted as nulls in parquet
+        self.null_count = nulls
+
+        if is_int:
+            self.tdda_type = (None if nulls is None
+                              else 'int' if nulls == 0
+                              else 'real' if is_numpy_int_type(numpy_type)
+                              else None)    # a nullable int type, perhaps
+        elif is_float:
+            self.tdda_type = 'real'
+        elif pa.types.is_boolean(t):
+            self.tdda_type = 'bool'
+        elif is_date:
+            self.tdda_type = 'date'
+        elif pa.types.is_string(t) or pa.types.is_large_string(t):
+            self.tdda_type = 'string'
+        else:
+            self.tdda_type = None
+
+        self.has_min_max = False
+        self.min = self.max = None
+        exact_date = is_date and t.unit != 'ns'    # no ns in datetimes
+        if complete and (is_int or is_float or exact_date):
+            with_values = [s for s in stats if s.num_values > 0]
+            if all(s.has_min_max for s in with_values):
+                mins = [python_scalar(s.min) for s in with_values]
+                maxes = [python_scalar(s.max) for s in with_values]
+                if not any(pd.isnull(v) for v in mins + maxes):
+                    self.has_min_max = True
+                    self.min = min(mins) if mins else None
+                    self.max = max(maxes) if maxes else None
+
+    def decides(self, field_constraints):
+        """
+        Returns ``True`` if every constraint in *field_constraints* can be
+        verified from these statistics, with the same result as verifying
+        it against the column in a DataFrame read from the file.
+
+        A type constraint must match the type exactly, since any other
+        case may need the values (for sloppy type checking) or may lead
+        to the column's type being repaired.
+        """
+        if self.tdda_type is None:
+            return False
+        for c in field_constraints:
+            if c.kind == 'type':
+                if c.value not in (self.tdda_type, [self.tdda_type]):
+                    return False
+            elif c.kind in ('min', 'max', 'sign'):
+                if not self.has_min_max:
+                    return False
+            elif c.kind == 'max_nulls':
+                if self.null_count is None:
+                    return False
+            else:
+                return False
+        return True
+
+
+def is_numpy_int_type(numpy_type):
+    """
+    Returns ``True`` if *numpy_type* (the name of a Pandas dtype, from a
+    parquet file's pandas metadata) is a plain NumPy integer type, or is
+    ``None``, for a file with no pandas metadata, whose integer columns
+    with nulls are read as floats.
+    """
+    if numpy_type is None:
+        return True
+    try:
+        return np.dtype(numpy_type).kind in 'iu'
+    except TypeError:
+        return False        # e.g. Int64, a Pandas extension type
+
+
+def parquet_statistics(path):
+    """
+    Returns an OrderedDict mapping the names of the (non-index) columns
+    in the parquet file at *path* to
+    :py:class:`ParquetColumnStatistics` objects, from the file's footer,
+    together with the number of records in the file.
+    """
+    import pyarrow.parquet as pq
+    pf = pq.ParquetFile(path)
+    metadata = pf.metadata
+    schema = pf.schema_arrow
+    pandas_metadata = schema.pandas_metadata
+    index_cols = [c for c in (pandas_metadata or {}).get('index_columns', [])
+                  if isinstance(c, str)]
+    numpy_types = {c.get('field_name'): c.get('numpy_type')
+                   for c in (pandas_metadata or {}).get('columns', [])}
+    leaves = [metadata.schema.column(i).path
+              for i in range(metadata.num_columns)]
+    statistics = OrderedDict()
+    for field in schema:
+        if field.name in index_cols:
+            continue
+        if not field.name in leaves:
+            continue    # nested columns have no (single) statistics
+        i = leaves.index(field.name)
+        chunks = [metadata.row_group(g).column(i)
+                  for g in range(metadata.num_row_groups)]
+        statistics[field.name] = ParquetColumnStatistics(
+            field, chunks, metadata.num_rows,
+            from_pandas=pandas_metadata is not None,
+            numpy_type=numpy_types.get(field.name))
+    return statistics, metadata.num_rows
+
+
+class PandasParquetConstraintVerifier(PandasConstraintVerifier):
+    """
+    A :py:class:`PandasParquetConstraintVerifier` verifies a parquet
+    file against a set of constraints, deciding ``type``, ``min``,
+    ``max``, ``sign`` and ``max_nulls`` constraints from the statistics
+    in the file's footer where these are complete and exact, without
+    reading the column.
+
+    Only the columns that have other constraints (``rex``,
+    ``allowed_values``, ``no_duplicates`` etc.), or whose statistics
+    are incomplete, are read, and verified as normal. The results are the
+    same as for verifying the DataFrame read from the whole file.
+    """
+    def __init__(self, path, constraints, epsilon=None, type_checking=None,
+                 n_jobs=None):
+        (self.statistics, self.nrecords) = parquet_statistics(path)
+        self.stats_fields = set(
+            name for name, fc in constraints.fields.items()
+            if name in self.statistics
+            and self.statistics[name].decides(fc.constraints.values())
+        )
+        columns = [c for c in self.statistics
+                   if c in constraints.fields and c not in self.stats_fields]
+        df = pd.read_parquet(path, columns=columns)
+        PandasConstraintVerifier.__init__(self, df, epsilon=epsilon,
+                                          type_checking=type_checking,
+                                          n_jobs=n_jobs)
+
+    def get_column_names(self):
+        return list(self.statistics)
+
+    def get_nrecords(self):
+        return self.nrecords
+
+    def calc_profile(self, colname):
+        if colname in self.stats_fields:
+            return {}
+        return PandasConstraintVerifier.calc_profile(self, colname)
+
+    def calc_min(self, colname):
+        if colname in self.stats_fields:
+            return self.statistics[colname].min
+        return PandasConstraintVerifier.calc_min(self, colname)
+
+    def calc_max(self, colname):
+        if colname in self.stats_fields:
+            return self.statistics[colname].max
+        return PandasConstraintVerifier.calc_max(self, colname)
+
+    def calc_tdda_type(self, colname):
+        if colname in self.stats_fields:
+            return self.statistics[colname].tdda_type
+        return PandasConstraintVerifier.calc_tdda_type(self, colname)
+
+    def calc_null_count(self, colname):
+        if colname in self.stats_fields:
+            return self.statistics[colname].null_count
+        return PandasConstraintVerifier.calc_null_count(self, colname)
+
+    def calc_non_null_count(self, colname):
+        if colname in self.stats_fields:
+            return self.nrecords - self.statistics[colname].null_count
+        return PandasConstraintVerifier.calc_non_null_count(self, colname)
+
+
 class PandasVerification(Verification):
     """
     A :py:class:`PandasVerification` object adds a :py:meth:`to_frame()`
@@ -565,8 +1648,20 @@ class PandasDetection(PandasVerification):
 
         If there are no failing records, and the detection was not run
         with the `write_all` flag set, then ``None`` is returned.
+
+        For compact detection, this is the DataFrame from the
+        :py:class:`FailureIndex`, of just the failing records.
         """
-        return self.detection.obj if self.detection else None
+        obj = self.detection.obj if self.detection else None
+        return obj.to_frame() if isinstance(obj, FailureIndex) else obj
+
+    def failure_index(self):
+        """
+        Returns the :py:class:`FailureIndex` from compact detection,
+        or ``None`` if detection was not compact.
+        """
+        obj = self.detection.obj if self.detection else None
+        return obj if isinstance(obj, FailureIndex) else None
 
 
 class PandasConstraintDiscoverer(PandasConstraintCalculator,
@@ -575,9 +1670,145 @@ class PandasConstraintDiscoverer(PandasConstraintCalculator,
     A :py:class:`PandasConstraintDiscoverer` object is used to discover
     constraints on a Pandas DataFrame.
     """
-    def __init__(self, df, inc_rex=False):
+    threadsafe = True
+
+    def __init__(self, df, inc_rex=False, seed=None, rex_cache=None,
+                 n_jobs=None):
         PandasConstraintCalculator.__init__(self, df)
-        BaseConstraintDiscoverer.__init__(self, inc_rex=inc_rex)
+        BaseConstraintDiscoverer.__init__(self, inc_rex=inc_rex, seed=seed,
+                                          rex_cache=rex_cache, n_jobs=n_jobs)
+
+
+class CompiledConstraints:
+    """
+    A :py:class:`CompiledConstraints` object is an immutable plan for
+    verifying a set of constraints, from :py:func:`compile_constraints`,
+    that can be applied to any number of Pandas DataFrames, with its
+    :py:meth:`verify` and :py:meth:`detect` methods.
+
+    The constraints are loaded (with their date values parsed) once, when
+    the plan is compiled, and so are the regular expressions for ``rex``
+    constraints (combined into one, where possible) and the sets of
+    values for ``allowed_values`` constraints (as frozensets), so none of
+    this is repeated for each DataFrame. The checks for each field (its
+    constraints, with the names of their verification methods) are also
+    prepared once, and are just bound to the verifier for each DataFrame.
+    Only the DataFrame-specific parts (such as repairing its column types)
+    are done for each one.
+
+    Its attributes (which can't be changed) are:
+
+        - *epsilon*, *type_checking*, *repair*
+                           --- as for :py:func:`verify_df`
+        - *compiled*       --- a read-only mapping from (field name,
+                               constraint kind) pairs to the compiled
+                               forms of the constraints' values.
+
+    The constraints themselves are private to the plan, since the
+    compiled forms and checks are prepared from them.
+
+    A plan can be shared between threads.
+    """
+    def __init__(self, constraints, epsilon=None, type_checking=None,
+                 repair=True):
+        compiled = {}
+        for (name, fc) in constraints.fields.items():
+            for c in fc.constraints.values():
+                if c.value is None:
+                    continue
+                if c.kind == 'allowed_values':
+                    compiled[(name, c.kind)] = frozenset(c.value)
+                elif c.kind == 'rex':
+                    try:
+                        compiled[(name, c.kind)] = compiled_rexes(c.value)
+                    except re.error:
+                        pass    # the error is raised if it's verified
+        checks = field_checks(constraints, VERIFIER_METHODS)
+        self.__dict__.update(_constraints=constraints,
+                             _checks=MappingProxyType(checks),
+                             epsilon=epsilon, type_checking=type_checking,
+                             repair=repair,
+                             compiled=MappingProxyType(compiled))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('A CompiledConstraints object is immutable.')
+
+    def __delattr__(self, name):
+        raise AttributeError('A CompiledConstraints object is immutable.')
+
+    def verifier(self, df, n_jobs=None):
+        """
+        Returns a :py:class:`PandasConstraintVerifier` for *df*, using
+        this plan, with its column types repaired, if required.
+        """
+        pdv = PandasConstraintVerifier(df, epsilon=self.epsilon,
+                                       type_checking=self.type_checking,
+                                       n_jobs=n_jobs, compiled=self.compiled)
+        if self.repair:
+            pdv.repair_field_types(self._constraints)
+        return pdv
+
+    def verify(self, df, report='all', n_jobs=None, fail_fast=False,
+               **kwargs):
+        """
+        Verifies the DataFrame *df* against the constraints, with the
+        same results as :py:func:`verify_df` (which uses a plan itself),
+        whose other parameters it takes.
+
+        Returns a :py:class:`PandasVerification` object.
+        """
+        pdv = self.verifier(df, n_jobs=n_jobs)
+        return pdv.verify(self._constraints,
+                          VerificationClass=PandasVerification,
+                          checks=self._checks, report=report,
+                          fail_fast=fail_fast, **kwargs)
+
+    def detect(self, df, outpath=None, write_all=False, per_constraint=False,
+               output_fields=None, index=False, in_place=False,
+               rownumber_is_index=True, boolean_ints=False,
+               report='records', n_jobs=None, compact=False, **kwargs):
+        """
+        Detects the records in the DataFrame *df* that fail any of the
+        constraints, with the same results as :py:func:`detect_df` (which
+        uses a plan itself, unless detecting in chunks), whose other
+        parameters it takes.
+
+        Returns a :py:class:`PandasDetection` object.
+        """
+        if compact and outpath:
+            check_compact_outpath(outpath)
+            remove_detection_output(outpath, compact=True)
+        pdv = self.verifier(df, n_jobs=n_jobs)
+        return pdv.detect(self._constraints,
+                          VerificationClass=PandasDetection,
+                          checks=self._checks,
+                          outpath=outpath, write_all=write_all,
+                          per_constraint=per_constraint,
+                          output_fields=output_fields, index=index,
+                          in_place=in_place,
+                          rownumber_is_index=rownumber_is_index,
+                          boolean_ints=boolean_ints,
+                          report=report, compact=compact, **kwargs)
+
+
+def extreme(f, x, y):
+    """
+    Returns f(x, y) (f being min or max), ignoring either value if it is
+    None (or null).
+
+    If *x* and *y* can't be compared (e.g. when one chunk of a CSV file
+    has only numbers in a column, and another has strings), they are
+    compared as strings, as they would be if the whole column had been
+    read at once, as a column of strings.
+    """
+    if x is None or pd.isnull(x):
+        return y
+    elif y is None or pd.isnull(y):
+        return x
+    try:
+        return f(x, y)
+    except TypeError:
+        return f(str(x), str(y))
 
 
 def pandas_types_compatible(x, y, colname=None):
@@ -608,6 +1839,75 @@ def pandas_coarse_type(x):
     return 'number' if t in ('bool', 'int', 'real') else t
 
 
+def combined_rex(rexes):
+    """
+    Returns a single compiled regular expression that matches (at the
+    start of) a string if and only if at least one of the regular
+    expressions in *rexes* does, or None if they can't be combined
+    (e.g. because they use backreferences, or inline flags that are
+    only allowed at the start of an expression).
+
+    Compiled expressions are kept in rexpy's shared, bounded cache,
+    so a constraint's expressions are only combined and compiled once.
+    """
+    if len(rexes) == 1:
+        return rexpy.cre(rexes[0])
+    if any(BACKREFERENCE_RE.search(r) for r in rexes):
+        return None
+    try:
+        return rexpy.cre('|'.join('(?:%s)' % r for r in rexes))
+    except re.error:
+        return None
+
+
+def compiled_rexes(rexes):
+    """
+    Returns a tuple of compiled regular expressions that between them
+    match the same strings as *rexes*: just one, if they can be combined
+    (see :py:func:`combined_rex`), or otherwise each of them, compiled.
+    """
+    rex = combined_rex(rexes)
+    if rex is not None:
+        return (rex,)
+    return tuple(rexpy.cre(r) for r in rexes)
+
+
+def rex_matches(values, rexes, compiled=None):
+    """
+    Returns a boolean numpy array indicating which of the *values*
+    (a Series of strings) match (at the start) at least one of the
+    regular expressions in *rexes*, or in *compiled*, their compiled
+    form from :py:func:`compiled_rexes`, if provided.
+
+    The expressions are combined into one where possible, so that each
+    value is matched once; otherwise, they are tried in turn on the
+    values not yet matched. Values that are not strings never match.
+    """
+    compiled = compiled or compiled_rexes(rexes)
+    if len(compiled) == 1:
+        return values.str.match(compiled[0], na=False).values
+    matched = np.zeros(len(values), dtype=bool)
+    for rex in compiled:
+        rest = ~ matched
+        if not rest.any():
+            break
+        matched[rest] = values[rest].str.match(rex, na=False).values
+    return matched
+
+
+def python_scalar(v):
+    """
+    Converts a scalar returned by Pandas or numpy (e.g. a minimum or
+    maximum) to the corresponding Python value.
+    """
+    if pandas_tdda_type(v) == 'date' and hasattr(v, 'to_pydatetime'):
+        return v.to_pydatetime(warn=False)
+    elif hasattr(v, 'item'):
+        return v.item()
+    else:
+        return v
+
+
 def pandas_tdda_type(x):
     """
     Returns the TDDA type of a column.
@@ -623,17 +1923,7 @@ def pandas_tdda_type(x):
     dt = getattr(x, 'dtype', None)
     if dt == np.dtype('O'):
         # objects could be either strings or booleans-with-nulls or dates
-        for v in x:
-            if type(v) in (bool, np.bool_):
-                return 'bool'
-            elif type(v) in (unicode_string, byte_string):
-                return 'string'
-            elif isinstance(v, datetime.datetime):
-                return 'date'
-            elif isinstance(v, datetime.date):
-                return 'date'
-        # if it was all null, there's no way to tell its type, so say string
-        return 'string'
+        return object_tdda_type(np.asarray(x))
     if is_categorical_dtype(dt):
         return 'string'
     dts = str(dt).lower()
@@ -659,8 +1949,98 @@ def pandas_tdda_type(x):
     return 'other'
 
 
+def object_tdda_type(values):
+    """
+    Returns the TDDA type of a column of objects (a numpy array of
+    *values*), which is the type of the first value that is a boolean,
+    a string or a date, or 'string' if there are none (e.g. if all the
+    values are null).
+
+    Rather than looking at the values one by one in Python, the kind of
+    values in a sample from the start of the column is inferred first
+    (with Pandas' ``infer_dtype``), and then, if that is inconclusive,
+    the kinds of values in successive blocks of the rest of the column.
+    Only a block that mixes kinds of values has to be scanned value
+    by value.
+    """
+    starts = [0] + list(range(TYPE_SAMPLE_SIZE, len(values), TYPE_BLOCK_SIZE))
+    ends = starts[1:] + [len(values)]
+    for start, end in zip(starts, ends):
+        part = values[start:end]
+        if len(part) == 0:
+            continue
+        kind = pd.api.types.infer_dtype(part, skipna=True)
+        if kind in INFERRED_TDDA_TYPES:
+            return INFERRED_TDDA_TYPES[kind]
+        elif kind not in UNTYPED_INFERRED_KINDS:
+            t = first_value_tdda_type(part)
+            if t is not None:
+                return t
+    # if it was all null, there's no way to tell its type, so say string
+    return 'string'
+
+
+def first_value_tdda_type(values):
+    """
+    Returns the TDDA type of the first of the *values* that is a
+    boolean, a string or a date, or None if there isn't one.
+    """
+    for v in values:
+        if type(v) in (bool, np.bool_):
+            return 'bool'
+        elif type(v) in (unicode_string, byte_string):
+            return 'string'
+        elif isinstance(v, datetime.datetime):
+            return 'date'
+        elif isinstance(v, datetime.date):
+            return 'date'
+    return None
+
+
+def compile_constraints(constraints_path, epsilon=None, type_checking=None,
+                        repair=True):
+    """
+    Compile the constraints in the JSON ``.tdda`` file provided into a
+    :py:class:`CompiledConstraints` plan, for verifying many DataFrames
+    (e.g. the partitions of a dataset) against the same constraints,
+    without reloading and preparing them for each one.
+
+    Inputs:
+
+        *constraints_path*:
+                            The path to a JSON ``.tdda`` file, an in-memory
+                            dictionary containing the structured contents
+                            of a ``.tdda`` file, or a
+                            :py:class:`~tdda.constraints.base.DatasetConstraints`
+                            object (which should not be changed
+                            afterwards).
+
+        *epsilon*, *type_checking*, *repair*:
+                            As for :py:func:`verify_df`.
+
+    Returns:
+
+        :py:class:`~tdda.constraints.pd.constraints.CompiledConstraints`
+        object.
+
+    Example usage::
+
+        from tdda.constraints import compile_constraints
+
+        plan = compile_constraints('example_constraints.tdda')
+        for df in partitions:
+            v = plan.verify(df)
+            print('Constraints failing: %d' % v.failures)
+
+    """
+    constraints = load_constraints(constraints_path)
+    return CompiledConstraints(constraints, epsilon=epsilon,
+                               type_checking=type_checking, repair=repair)
+
+
 def verify_df(df, constraints_path, epsilon=None, type_checking=None,
-              repair=True, report='all', **kwargs):
+              repair=True, report='all', n_jobs=None, fail_fast=False,
+              **kwargs):
     """
     Verify that (i.e. check whether) the Pandas DataFrame provided
     satisfies the constraints in the JSON ``.tdda`` file provided.
@@ -754,6 +2134,25 @@ def verify_df(df, constraints_path, epsilon=None, type_checking=None,
                             If report is set to ``fields``, only fields for
                             which at least one constraint failed are shown.
 
+        *n_jobs*:
+                            The number of fields to verify concurrently,
+                            in a pool of threads (``0`` or negative for
+                            one per CPU). By default (``None``), fields
+                            are verified one at a time. The results are
+                            the same either way.
+
+        *fail_fast*:
+                            If ``True``, check the constraints one at a
+                            time, cheapest first (``type``, ``max_nulls``,
+                            then ``min`` and ``max`` etc., with ``rex``
+                            constraints last), and stop at the first
+                            failure. This is for when all that matters
+                            is whether the DataFrame satisfies all the
+                            constraints. The verification then only
+                            includes the constraints that were checked,
+                            and its ``short_circuited`` attribute is set
+                            if any were not checked. *n_jobs* is not used.
+
     Returns:
 
         :py:class:`~tdda.constraints.pd.constraints.PandasVerification` object.
@@ -786,13 +2185,113 @@ def verify_df(df, constraints_path, epsilon=None, type_checking=None,
     for a slightly fuller example.
 
     """
-    pdv = PandasConstraintVerifier(df, epsilon=epsilon,
-                                   type_checking=type_checking)
-    if isinstance(constraints_path, dict):
-        constraints = DatasetConstraints()
-        constraints.initialize_from_dict(native_definite(constraints_path))
-    else:
-        constraints = DatasetConstraints(loadpath=constraints_path)
+    plan = compile_constraints(constraints_path, epsilon=epsilon,
+                               type_checking=type_checking, repair=repair)
+    return plan.verify(df, report=report, n_jobs=n_jobs,
+                       fail_fast=fail_fast, **kwargs)
+
+
+def verify_df_chunks(chunks, constraints_path, epsilon=None,
+                     type_checking=None, repair=True, report='all',
+                     max_distinct=None, **kwargs):
+    """
+    Verify that (i.e. check whether) a dataset, supplied as a sequence
+    of Pandas DataFrames (chunks) with the same columns, satisfies
+    the constraints in the JSON ``.tdda`` file provided.
+
+    This is for datasets too large to fit in memory: only one chunk is
+    held at a time, together with a small set of statistics for each
+    column, and the result is the same as calling :py:func:`verify_df`
+    on all the chunks concatenated into a single DataFrame.
+
+    Mandatory Inputs:
+
+        *chunks*:
+                            An iterable of Pandas DataFrames, such as the
+                            one returned by :py:func:`load_df_chunks`.
+
+        *constraints_path*:
+                            The path to a JSON ``.tdda`` file, or an
+                            in-memory dictionary containing the structured
+                            contents of a ``.tdda`` file, as for
+                            :py:func:`verify_df`.
+
+    Optional Inputs:
+
+        *epsilon*, *type_checking*, *repair*, *report*:
+                            As for :py:func:`verify_df`. Types are
+                            repaired chunk by chunk.
+
+        *max_distinct*:
+                            The most distinct values to keep for a field
+                            with an ``allowed_values`` constraint
+                            (default: 100,000). This is always at least one
+                            more than the number of allowed values, which
+                            is enough to verify the constraint.
+
+    Returns:
+
+        :py:class:`~tdda.constraints.pd.constraints.PandasVerification` object,
+        as for :py:func:`verify_df`.
+
+    Example usage::
+
+        from tdda.constraints import verify_df_chunks
+        from tdda.constraints.pd.constraints import load_df_chunks
+
+        chunks = load_df_chunks('big.csv', chunksize=1000000)
+        v = verify_df_chunks(chunks, 'big.tdda')
+        print(str(v))
+
+    """
+    constraints = load_constraints(constraints_path)
+    pdv = PandasChunkedConstraintVerifier(constraints, epsilon=epsilon,
+                                          type_checking=type_checking,
+                                          repair=repair,
+                                          max_distinct=max_distinct)
+    for df in chunks:
+        pdv.update(df)
+    return pdv.verify(constraints,
+                      VerificationClass=PandasVerification,
+                      report=report, **kwargs)
+
+
+def verify_parquet_file(path, constraints_path, epsilon=None,
+                        type_checking=None, repair=True, report='all',
+                        n_jobs=None, **kwargs):
+    """
+    Verify that (i.e. check whether) the data in the parquet file
+    at *path* satisfies the constraints in the JSON ``.tdda`` file
+    provided.
+
+    The result is the same as calling :py:func:`verify_df` on the
+    DataFrame read from the file, but ``type``, ``min``, ``max``,
+    ``sign`` and ``max_nulls`` constraints are verified from the
+    per-column statistics in the file's footer (row-group metadata),
+    where these are complete and exact, so that the only columns read
+    are those with other constraints (e.g. ``rex``, ``allowed_values``,
+    ``no_duplicates``), or without usable statistics.
+
+    The other parameters are as for :py:func:`verify_df`; types are only
+    repaired for the columns that are read.
+
+    Returns:
+
+        :py:class:`~tdda.constraints.pd.constraints.PandasVerification` object,
+        as for :py:func:`verify_df`.
+
+    Example usage::
+
+        from tdda.constraints import verify_parquet_file
+
+        v = verify_parquet_file('big.parquet', 'big.tdda')
+        print(str(v))
+
+    """
+    constraints = load_constraints(constraints_path)
+    pdv = PandasParquetConstraintVerifier(path, constraints, epsilon=epsilon,
+                                          type_checking=type_checking,
+                                          n_jobs=n_jobs)
     if repair:
         pdv.repair_field_types(constraints)
     return pdv.verify(constraints,
@@ -804,8 +2303,8 @@ def detect_df(df, constraints_path, epsilon=None, type_checking=None,
               outpath=None, write_all=False, per_constraint=False,
               output_fields=None, index=False, in_place=False,
               rownumber_is_index=True, boolean_ints=False,
-              repair=True, report='records',
-              **kwargs):
+              repair=True, report='records', n_jobs=None, chunksize=None,
+              compact=False, **kwargs):
     """
     Check the records from the Pandas DataFrame provided, to detect
     records that fail any of the constraints in the JSON ``.tdda`` file
@@ -945,6 +2444,37 @@ def detect_df(df, constraints_path, epsilon=None, type_checking=None,
                             dataframes that have come from a more reliable
                             source).
 
+        *n_jobs*:
+                            The number of fields to verify concurrently,
+                            in a pool of threads (``0`` or negative for
+                            one per CPU). By default (``None``), fields
+                            are verified one at a time. The results are
+                            the same either way.
+
+        *chunksize*:
+                            If provided, detect failing records
+                            *chunksize* rows at a time, writing them
+                            to *outpath* as each chunk is processed,
+                            using :py:func:`detect_df_chunks`, rather than
+                            building the detection results for the whole
+                            DataFrame before writing them. This cannot
+                            be combined with *in_place*.
+
+        *compact*:
+                            If ``True``, the detection results are just
+                            the row numbers of the failing records
+                            (counting from 1), with a bitmask of the
+                            constraints each failed, as a
+                            :py:class:`FailureIndex`, which is much smaller
+                            than the full results when few records fail.
+                            If *outpath* is provided, it must be a
+                            ``.parquet`` or ``.npz`` file, and a sidecar
+                            JSON file listing the constraints is written
+                            alongside it. The *write_all*, *per_constraint*,
+                            *output_fields*, *index* and *in_place* options
+                            don't apply; use :py:meth:`FailureIndex.join`
+                            to get the failing records themselves.
+
     The *report* parameter from :py:func:`verify_df` can also be
     used, in which case a verification report will also be produced in
     addition to the detection results.
@@ -969,26 +2499,161 @@ def detect_df(df, constraints_path, epsilon=None, type_checking=None,
         print(detection_df.to_string())
 
     """
-    pdv = PandasConstraintVerifier(df, epsilon=epsilon,
-                                   type_checking=type_checking)
-    if isinstance(constraints_path, dict):
-        constraints = DatasetConstraints()
-        constraints.initialize_from_dict(native_definite(constraints_path))
+    if chunksize:
+        if in_place:
+            raise Exception('Cannot detect in place in chunks.')
+        chunks = lambda: (df.iloc[i:i + chunksize].copy()
+                          for i in range(0, len(df), chunksize))
+        return detect_df_chunks(chunks, constraints_path, epsilon=epsilon,
+                                type_checking=type_checking, outpath=outpath,
+                                write_all=write_all,
+                                per_constraint=per_constraint,
+                                output_fields=output_fields, index=index,
+                                rownumber_is_index=rownumber_is_index,
+                                boolean_ints=boolean_ints, repair=repair,
+                                report=report, compact=compact, **kwargs)
+    plan = compile_constraints(constraints_path, epsilon=epsilon,
+                               type_checking=type_checking, repair=repair)
+    return plan.detect(df, outpath=outpath, write_all=write_all,
+                       per_constraint=per_constraint,
+                       output_fields=output_fields, index=index,
+                       in_place=in_place,
+                       rownumber_is_index=rownumber_is_index,
+                       boolean_ints=boolean_ints, report=report,
+                       n_jobs=n_jobs, compact=compact, **kwargs)
+
+
+def detect_df_chunks(chunks, constraints_path, epsilon=None,
+                     type_checking=None, outpath=None, write_all=False,
+                     per_constraint=False, output_fields=None, index=False,
+                     rownumber_is_index=True, boolean_ints=False,
+                     repair=True, report='records', compact=False, **kwargs):
+    """
+    Check the records from a dataset supplied as a sequence of Pandas
+    DataFrames (chunks) with the same columns, to detect records that fail
+    any of the constraints in the JSON ``.tdda`` file provided, writing
+    the results for each chunk to *outpath* as it goes.
+
+    This is for datasets too large to fit in memory. The chunks are
+    read twice: first to verify the constraints, for the dataset as a
+    whole (as :py:func:`verify_df_chunks` does); and then to detect the
+    failing records in each chunk, using what was found in the first
+    pass (e.g. duplicates that are in different chunks), so the results
+    are the same as from :py:func:`detect_df` for the whole dataset.
+
+    Mandatory Inputs:
+
+        *chunks*:
+                            A function with no arguments that returns an
+                            iterable of Pandas DataFrames each time it is
+                            called, such as::
+
+                                lambda: load_df_chunks(path, chunksize)
+
+                            or an iterable of DataFrames that can be
+                            iterated over more than once, such as a list.
+
+        *constraints_path*:
+                            The path to a JSON ``.tdda`` file, or an
+                            in-memory dictionary containing the structured
+                            contents of a ``.tdda`` file, as for
+                            :py:func:`detect_df`.
+
+    Optional Inputs:
+
+        *outpath*:
+                            The path of a CSV or parquet file (or ``-``
+                            for standard output), to which the detection
+                            results are appended, chunk by chunk.
+
+                            Row numbers (for the ``RowNumber`` column, if
+                            *rownumber_is_index* is not set) are for the
+                            dataset as a whole, so start at 1 for the
+                            first record of the first chunk.
+
+        The other options (apart from *in_place*, which is not supported
+        here) are as for :py:func:`detect_df`.
+
+    Returns:
+
+        :py:class:`~tdda.constraints.pd.constraints.PandasDetection` object.
+
+        If there is no *outpath*, its :py:meth:`~PandasDetection.detected()`
+        method returns the detection results for all the chunks, in a single
+        DataFrame; otherwise, the results are only written to *outpath*,
+        and it returns ``None``. Either way, it records the numbers of
+        passing and failing records.
+
+        With *compact* set, if any records fail, the
+        :py:class:`FailureIndex` for all the chunks is always returned
+        (and is only written to *outpath*, if provided, once all the
+        chunks have been processed). As with :py:func:`detect_df`, if
+        all the constraints are satisfied, there are no detection
+        results, and nothing is written.
+    """
+    if callable(chunks):
+        get_chunks = chunks
+    elif iter(chunks) is chunks:
+        raise TypeError('Chunks for detection must be able to be '
+                        'iterated over more than once.')
     else:
-        constraints = DatasetConstraints(loadpath=constraints_path)
-    if repair:
-        pdv.repair_field_types(constraints)
-    return pdv.detect(constraints, VerificationClass=PandasDetection,
-                      outpath=outpath, write_all=write_all,
-                      per_constraint=per_constraint,
-                      output_fields=output_fields, index=index,
-                      in_place=in_place,
-                      rownumber_is_index=rownumber_is_index,
-                      boolean_ints=boolean_ints,
-                      report=report, **kwargs)
+        get_chunks = lambda: chunks
+
+    constraints = load_constraints(constraints_path)
+    if outpath:
+        if compact:
+            check_compact_outpath(outpath)
+        remove_detection_output(outpath, compact=compact)
+
+    pdv = PandasChunkedConstraintVerifier(constraints, epsilon=epsilon,
+                                          type_checking=type_checking,
+                                          repair=repair, detect=True)
+    for df in get_chunks():
+        pdv.update(df)
+    v = pdv.verify(constraints, VerificationClass=PandasDetection,
+                   report=report, **kwargs)
+    if v.failures == 0:
+        return v
+
+    writer = None
+    if outpath and not compact:
+        types = {c: acc.tdda_type() for (c, acc) in pdv.accumulators.items()}
+        writer = PandasDetectionWriter(outpath, types=types)
+    detected = []
+    n_passing_records = n_failing_records = 0
+    offset = 0
+    try:
+        for df in get_chunks():
+            pcd = PandasChunkConstraintDetector(df, pdv)
+            d = pcd.detect(constraints, VerificationClass=PandasDetection,
+                           write_all=write_all, per_constraint=per_constraint,
+                           output_fields=output_fields, index=index,
+                           rownumber_is_index=rownumber_is_index,
+                           boolean_ints=boolean_ints,
+                           detect_writer=writer, detect_row_offset=offset,
+                           report=report, compact=compact, **kwargs)
+            offset += len(df)
+            n_passing_records += d.detection.n_passing_records
+            n_failing_records += d.detection.n_failing_records
+            if writer is None:
+                detected.append(d.detection.obj)
+    finally:
+        if writer:
+            writer.close()
+    # The verification results are the same for every chunk, since they
+    # are for the dataset as a whole, so return the last of them.
+    if compact:
+        obj = FailureIndex.concat(detected)
+        if outpath:
+            obj.save(outpath)
+    else:
+        obj = pd.concat(detected) if detected else None
+    d.detection = Detection(obj, n_passing_records, n_failing_records)
+    return d
 
 
-def discover_df(df, inc_rex=False, df_path=None):
+def discover_df(df, inc_rex=False, df_path=None, seed=None, rex_cache=None,
+                n_jobs=None):
     """
     Automatically discover potentially useful constraints that characterize
     the Pandas DataFrame provided.
@@ -1005,6 +2670,24 @@ def discover_df(df, inc_rex=False, df_path=None):
         *df_path*:
             The path from which the dataframe was loaded, if any.
 
+        *seed*:
+            A random seed for rexpy, to make the regular expressions
+            discovered reproducible when sampling is used.
+
+        *rex_cache*:
+            A persistent on-disk cache for regular expressions
+            discovered by rexpy, to avoid rediscovering them for
+            columns with the same values. This can be a directory
+            path, ``True`` (for the default location) or a
+            :py:class:`~tdda.rexpy.rexpy.RexpyCache` object.
+
+        *n_jobs*:
+            The number of fields to discover constraints for concurrently
+            (``0`` or negative for one per CPU). Statistics are calculated
+            in threads, and regular expressions in separate processes.
+            The default (``None``) discovers one field at a time.
+            The constraints found are the same either way.
+
     Possible return values:
 
     -  :py:class:`~tdda.constraints.base.DatasetConstraints` object
@@ -1113,7 +2796,8 @@ def discover_df(df, inc_rex=False, df_path=None):
     for a slightly fuller example.
 
     """
-    disco = PandasConstraintDiscoverer(df, inc_rex=inc_rex)
+    disco = PandasConstraintDiscoverer(df, inc_rex=inc_rex, seed=seed,
+                                       rex_cache=rex_cache, n_jobs=n_jobs)
     constraints = disco.discover()
     if constraints:
         constraints.set_dates_user_host_creator()
@@ -1131,7 +2815,7 @@ def file_format(path):
 
 
 def load_df(path, mdpath=None, ignore_apparent_metadata=False,
-            infer_metadata=True):
+            infer_metadata=True, columns=None):
     """
     Loads a pandas DataFrame from a path or stream.
 
@@ -1156,18 +2840,164 @@ def load_df(path, mdpath=None, ignore_apparent_metadata=False,
                         Setting this to False overrides that behaviour,
                         forcing the default Pandas CSV reader to be used
                         with few TDDA's default arguments for it.
+
+        columns         If provided, a list of the names of the only
+                        columns to load (in the order they appear in
+                        the file). Names that are not in the file are
+                        ignored. Parquet files read only those columns
+                        from disk, and CSV files only parse them
+                        (using the ``usecols`` argument to
+                        ``pd.read_csv``).
     """
     if isinstance(path, StringIO):  # stream
-        return default_csv_loader(path)
-    exists = os.path.exists(os.path.expanduser(path))
+        return default_csv_loader(path, **projected_csv_args({}, columns))
     stem, ext = os.path.splitext(path)
-    lcstem, ext = stem.lower(), ext.lower()
+    ext = ext.lower()
 
     if ext == '.parquet':
-        return pd.read_parquet(path)
+        return pd.read_parquet(path,
+                               columns=parquet_columns(path, columns))
     elif ext == '.feather':
-        return read_feather_file(path)
+        return projected_df(read_feather_file(path), columns)
+
+    csvpath, kw = csv_loader_args(path, mdpath, ignore_apparent_metadata,
+                                  infer_metadata)
+    return default_csv_loader(csvpath, **projected_csv_args(kw, columns))
+
+
+def load_df_chunks(path, chunksize, mdpath=None,
+                   ignore_apparent_metadata=False, infer_metadata=True,
+                   columns=None):
+    """
+    Generator that loads a dataset from a path or stream as a sequence
+    of pandas DataFrames of up to *chunksize* rows each, for datasets
+    that are too large to load into memory at once.
+
+    CSV files are read *chunksize* lines at a time, with types inferred
+    for each chunk separately; parquet files are read in batches
+    of up to *chunksize* rows from successive row groups. Other
+    formats (feather files) are loaded as a single chunk.
+
+    The other arguments are as for :py:func:`load_df`.
+    """
+    if not isinstance(path, StringIO):
+        stem, ext = os.path.splitext(path)
+        ext = ext.lower()
+        if ext == '.parquet':
+            import pyarrow.parquet as pq
+            pf = pq.ParquetFile(path)
+            start = 0
+            columns = parquet_columns(path, columns, with_index=True)
+            for batch in pf.iter_batches(batch_size=chunksize,
+                                         columns=columns):
+                df = batch.to_pandas()
+                if is_pd_index_trivial(df):
+                    # number the rows from the start of the file, as for CSV
+                    df.index = pd.RangeIndex(start, start + len(df))
+                start += len(df)
+                yield df
+            return
+        elif ext == '.feather':
+            yield projected_df(read_feather_file(path), columns)
+            return
+        path, kw = csv_loader_args(path, mdpath, ignore_apparent_metadata,
+                                   infer_metadata)
+    else:
+        kw = {}
+    kw = projected_csv_args(kw, columns)
+    for df in default_csv_chunk_loader(path, chunksize, **kw):
+        yield df
+
+
+def parquet_columns(path, columns, with_index=False):
+    """
+    Returns the names of the columns in the parquet file at *path*
+    that are in *columns*, in the order they appear in the file,
+    or None (meaning all columns) if *columns* is None.
+
+    If *with_index* is set, any index columns stored in the file from
+    Pandas are included too; :py:func:`pd.read_parquet` adds these
+    itself, but reading batches of rows directly does not.
+    """
+    if columns is None:
+        return None
+    import pyarrow.parquet as pq
+    schema = pq.read_schema(path)
+    wanted = set(columns)
+    if with_index:
+        metadata = schema.pandas_metadata or {}
+        wanted.update(c for c in metadata.get('index_columns', [])
+                      if isinstance(c, str))
+    return [c for c in schema.names if c in wanted]
+
+
+def projected_csv_args(kw, columns):
+    """
+    Returns a copy of the CSV loader keyword arguments *kw*, restricted
+    to reading only the columns in *columns*, if that is not None.
+    """
+    if columns is None:
+        return kw
+    wanted = set(columns)
+    kw = dict(kw)
+    kw['usecols'] = lambda name: name in wanted
+    if 'parse_dates' in kw:
+        kw['parse_dates'] = [c for c in kw['parse_dates'] if c in wanted]
+    return kw
+
+
+def projected_df(df, columns):
+    """
+    Returns *df* restricted to the columns in *columns*, in their
+    existing order, or *df* itself if *columns* is None.
+    """
+    if columns is None:
+        return df
+    wanted = set(columns)
+    return df[[c for c in df.columns if c in wanted]]
+
+
+def load_constraints(constraints_path):
+    """
+    Returns a :py:class:`~tdda.constraints.base.DatasetConstraints` object
+    for *constraints_path*, which is the path of a ``.tdda`` file, a
+    dictionary of its contents, or a DatasetConstraints object already.
+    """
+    if isinstance(constraints_path, DatasetConstraints):
+        return constraints_path
+    elif isinstance(constraints_path, dict):
+        constraints = DatasetConstraints()
+        constraints.initialize_from_dict(native_definite(constraints_path))
+        return constraints
+    else:
+        return DatasetConstraints(loadpath=constraints_path)
+
+
+def columns_to_load(constraints_path, output_fields=None):
+    """
+    Returns the names of the columns needed to verify or detect the
+    constraints in *constraints_path* (a ``.tdda`` file path, or a
+    dictionary of constraints), together with the detection
+    *output_fields*, for use as the *columns* argument to
+    :py:func:`load_df`.
+
+    Returns None (meaning all columns) if *output_fields* is an empty
+    list, since that asks for all the input fields to be written.
+    """
+    if output_fields is not None and len(output_fields) == 0:
+        return None
+    constraints = load_constraints(constraints_path)
+    columns = list(constraints.fields.keys())
+    return columns + [f for f in (output_fields or []) if f not in columns]
+
 
+def csv_loader_args(path, mdpath=None, ignore_apparent_metadata=False,
+                    infer_metadata=True):
+    """
+    Returns the path of the CSV file to read for *path*, and the keyword
+    arguments to pass to the csv loader for it, taking into account any
+    associated metadata. Arguments are as for :py:func:`load_df`.
+    """
     if mdpath is None:
         md_type, _ = find_metadata_type_from_path(path)
         if md_type:
@@ -1180,7 +3010,7 @@ def load_df(path, mdpath=None, ignore_apparent_metadata=False,
                       'Use --no-csv-metadata to override.' % path,
                       file=sys.stderr)
                 kw = to_pandas_read_csv_args(metadata)
-                return default_csv_loader(metadata.path, **kw)
+                return metadata.path, kw
 
         if not ignore_apparent_metadata:
             # no explicit metadata path provided
@@ -1188,17 +3018,17 @@ def load_df(path, mdpath=None, ignore_apparent_metadata=False,
             if mdpath:
                 metadata = load_metadata(path)
                 kw = to_pandas_read_csv_args(metadata)
-                return default_csv_loader(path, **kw)
+                return path, kw
             elif infer_metadata:
                 # infer metadata
                 pass
         # Told not to look for apparent metadata or infer metadata
-        return default_csv_loader(path)
+        return path, {}
 
     else:  # explicit metadatapath provided
         metadata = load_metadata(path)
         kw = to_pandas_read_csv_args(metadata)
-        return default_csv_loader(path, **kw)
+        return path, kw
 
 
 def save_df(df, path, index=False):
@@ -1216,6 +3046,119 @@ def save_df(df, path, index=False):
         raise Exception(f'Unknown output format: {fmt}')
 
 
+def check_compact_outpath(outpath):
+    """
+    Raises an exception unless *outpath* is a ``.parquet`` or ``.npz``
+    file, as required for compact detection output, so that this can
+    be checked before doing any detection.
+    """
+    if outpath == '-' or file_format(outpath) not in ('parquet', 'npz'):
+        raise Exception('Compact detection output must be written to '
+                        'a .parquet or .npz file, not %s' % outpath)
+
+
+def remove_detection_output(outpath, compact=False):
+    """
+    Empties and then removes the detection output file *outpath* (and,
+    for *compact* output, its sidecar JSON file), as
+    :py:func:`~tdda.constraints.base.verify` does for detection, so that
+    there is an early error if it isn't writeable, and so that an old
+    file isn't left in place if there turn out to be no failures.
+    """
+    if outpath == '-':
+        return
+    with open(outpath, 'w') as f:
+        pass
+    os.remove(outpath)
+    sidecar = failure_index_sidecar_path(outpath)
+    if compact and os.path.exists(sidecar):
+        os.remove(sidecar)
+
+
+def failure_index_sidecar_path(path):
+    """
+    Returns the path of the sidecar JSON file, listing the constraints,
+    for a :py:class:`FailureIndex` saved to *path*.
+    """
+    return path + '.json'
+
+
+def load_npz(path, mmap=True):
+    """
+    Returns a dictionary of the arrays in the NumPy ``.npz`` file
+    at *path*.
+
+    If *mmap* is set, arrays stored uncompressed (as by ``np.savez``)
+    are memory-mapped from the file, rather than read into memory,
+    which ``np.load`` only does for ``.npy`` files.
+    """
+    if not mmap:
+        with np.load(path) as npz:
+            return {name: npz[name] for name in npz.files}
+    fmt = np.lib.format
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+        for info in zf.infolist():
+            name = info.filename
+            if name.endswith('.npy'):
+                name = name[:-4]
+            if info.compress_type != zipfile.ZIP_STORED:
+                with zf.open(info) as member:
+                    arrays[name] = fmt.read_array(member)
+                continue
+            # The member's data follows its local header, which is
+            # 30 bytes, plus its file name and extra field.
+            f.seek(info.header_offset)
+            header = f.read(30)
+            (name_len, extra_len) = struct.unpack('<HH', header[26:30])
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            version = fmt.read_magic(f)
+            if version == (1, 0):
+                (shape, fortran, dtype) = fmt.read_array_header_1_0(f)
+            else:
+                (shape, fortran, dtype) = fmt.read_array_header_2_0(f)
+            if dtype.hasobject or 0 in shape:
+                with zf.open(info) as member:
+                    arrays[name] = fmt.read_array(member)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r',
+                                         offset=f.tell(), shape=shape,
+                                         order='F' if fortran else 'C')
+    return arrays
+
+
+def read_rows(path, rows, columns=None):
+    """
+    Returns a DataFrame of the records at the given positions (counting
+    from 0) in the dataset at *path*, with only the *columns* listed,
+    if provided.
+
+    For parquet files, only the row groups containing the records are
+    read; other files are loaded in full (but only the columns needed).
+    """
+    rows = np.asarray(rows)
+    if file_format(path) != 'parquet':
+        df = load_df(path, columns=columns)
+        return df.iloc[rows].reset_index(drop=True)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    pf = pq.ParquetFile(path)
+    metadata = pf.metadata
+    starts = np.cumsum([0] + [metadata.row_group(g).num_rows
+                              for g in range(metadata.num_row_groups)])
+    groups = np.searchsorted(starts, rows, side='right') - 1
+    names = parquet_columns(path, columns)
+    tables = [
+        pf.read_row_group(g, columns=names).take(rows[groups == g] - starts[g])
+        for g in np.unique(groups)
+    ]
+    if not tables:
+        table = pf.schema_arrow.empty_table()
+        tables = [table if names is None else table.select(names)]
+    df = pa.concat_tables(tables).to_pandas()
+    return df.reset_index(drop=True)
+
+
 def unique_column_name(df, name):
     """
     Generate a column name that is not already present in the dataframe.
@@ -1230,13 +3173,18 @@ def unique_column_name(df, name):
 
 def detection_field(column, expr, default=None):
     """
-    Construct a field for a detection result
+    Construct a field for a detection result, as a tri-state array
+    (for a :py:class:`DetectionMatrix`), which is ``PASS`` or ``FAIL``
+    according to the boolean *expr*, except that it is ``NULL_RESULT``
+    where *column* is null, or, if *default* is provided, ``NULL_PASS``
+    (if it is true) or ``FAIL``.
     """
-    if column.isnull().sum() == 0:
-        return expr.astype(bool)
-    else:
-        null = np.nan if default is None else default # np.nan  # pd.NA
-        return np.where(pd.isnull(column), null, expr.astype('O'))
+    result = np.asarray(expr).astype(bool).astype(np.int8)
+    nulls = pd.isnull(column)
+    if nulls.any():
+        result[np.asarray(nulls)] = (NULL_RESULT if default is None
+                                     else NULL_PASS if default else FAIL)
+    return result
 
 
 
@@ -24,6 +24,19 @@ Parameters:
     where detection results are to be written.
     Can be - (or missing) to write to standard output.
 
+Only the columns that have constraints, and any requested with
+--output-fields, are read from the input file.
+
+With --compact, the output file must be a .parquet or .npz file.
+
+Optional flags for CSV and parquet input files:
+
+  * --chunksize N
+      Read the input N rows at a time (twice), rather than loading it
+      all into memory, writing the detection results for each chunk
+      as it goes, for files that are too large to fit in memory.
+      The results are the same.
+
 '''
 
 import os
@@ -39,11 +52,13 @@ import numpy as np
 
 from tdda import __version__
 from tdda.constraints.flags import detect_parser, detect_flags
-from tdda.constraints.pd.constraints import detect_df, load_df, file_format
+from tdda.constraints.pd.constraints import (detect_df, detect_df_chunks,
+                                             load_df, load_df_chunks,
+                                             columns_to_load, file_format)
 
 
 def detect_df_from_file(df_path, constraints_path, outpath,
-                        verbose=True, **kwargs):
+                        verbose=True, chunksize=None, **kwargs):
     if df_path == '-' or df_path is None:
         df_path = StringIO(sys.stdin.read())
         if constraints_path is None:
@@ -54,10 +69,24 @@ def detect_df_from_file(df_path, constraints_path, outpath,
         constraints_path = stem + '.tdda'
 
     from_feather = file_format(df_path) == 'feather'
-
-    df = load_df(df_path)
-    v = detect_df(df, constraints_path, outpath=outpath,
-                  rownumber_is_index=from_feather, **kwargs)
+    if kwargs.get('compact'):
+        columns = columns_to_load(constraints_path)
+    else:
+        columns = columns_to_load(constraints_path,
+                                  kwargs.get('output_fields'))
+
+    if chunksize:
+        def chunks():
+            if hasattr(df_path, 'seek'):
+                df_path.seek(0)
+            return load_df_chunks(df_path, chunksize, columns=columns)
+
+        v = detect_df_chunks(chunks, constraints_path, outpath=outpath,
+                             rownumber_is_index=from_feather, **kwargs)
+    else:
+        df = load_df(df_path, columns=columns)
+        v = detect_df(df, constraints_path, outpath=outpath,
+                      rownumber_is_index=from_feather, **kwargs)
     if verbose and outpath is not None and outpath != '-':
         print(v)
     return v
@@ -70,6 +99,8 @@ def pd_detect_parser():
                         help='constraints file to verify against')
     parser.add_argument('outpath', nargs='?',
                         help='file to write detection results to')
+    parser.add_argument('--chunksize', type=int, metavar='N',
+                        help='read and detect the input N rows at a time')
     return parser
 
 
@@ -80,6 +111,8 @@ def pd_detect_params(args):
     params['df_path'] = flags.input
     params['constraints_path'] = flags.constraints
     params['outpath'] = flags.outpath
+    if flags.chunksize:
+        params['chunksize'] = flags.chunksize
     return params
 
 
@@ -17,6 +17,8 @@ import tempfile
 import unittest
 
 from collections import OrderedDict, namedtuple
+from contextlib import redirect_stdout
+from io import StringIO
 from distutils.spawn import find_executable
 
 import pandas as pd
@@ -42,6 +44,7 @@ from tdda.constraints.base import (
     AllowedValuesConstraint,
     MinLengthConstraint,
     MaxLengthConstraint,
+    RexConstraint,
     DatasetConstraints,
     Fields,
     FieldConstraints,
@@ -55,10 +58,14 @@ from tdda.constraints.console import main_with_argv
 
 from tdda.constraints.pd import constraints as pdc
 from tdda.constraints.pd.constraints import (load_df, verify_df,
-                                             discover_df, detect_df)
+                                             discover_df, detect_df,
+                                             load_df_chunks, verify_df_chunks,
+                                             detect_df_chunks,
+                                             verify_parquet_file)
 from tdda.constraints.pd.discover import discover_df_from_file
-from tdda.constraints.pd.verify import verify_df_from_file#, detect_df_from_file
-from tdda.constraints.pd.detect import detect_df_from_file
+from tdda.constraints.pd.verify import (verify_df_from_file,
+                                        verify_batch)
+from tdda.constraints.pd.detect import detect_df_from_file, pd_detect_params
 
 
 from tdda.examples import copy_accounts_data_unzipped
@@ -195,6 +202,37 @@ class TestPandasIndividualConstraintVerifier(ReferenceTestCase):
         for v in OTHERS:
             self.assertEqual(pdc.pandas_coarse_type(v), 'other')
 
+    def test_tdda_types_of_object_columns(self):
+        n = pdc.TYPE_SAMPLE_SIZE + 2 * pdc.TYPE_BLOCK_SIZE
+        for (values, expected) in (
+            ([], 'string'),
+            ([None, np.nan], 'string'),
+            ([None, 'a', True], 'string'),
+            ([np.nan, True, 'a'], 'bool'),
+            ([1, 2.5, datetime.date(2024, 1, 1), 'a'], 'date'),
+            ([pd.NaT, np.datetime64('2024-01-01')], 'date'),
+            ([1, 2, 3], 'string'),
+            ([None] * n + [True], 'bool'),
+            ([1] * n + [b'a'], 'string'),
+            ([1] * (n - 1) + [pd.Timestamp(2024, 1, 1), 'a'], 'date'),
+        ):
+            self.assertEqual(pdc.pandas_tdda_type(pd.Series(values,
+                                                            dtype=object)),
+                             expected)
+
+    def test_all_non_nulls_boolean(self):
+        df = pd.DataFrame({
+            'b': [True, False, None],
+            'bb': [True, False, True],
+            's': ['true', None, None],
+            'n': [None, None, None],
+        })
+        calc = pdc.PandasConstraintCalculator(df)
+        self.assertEqual([calc.calc_all_non_nulls_boolean(c) for c in df],
+                         [True, True, False, True])
+        v = verify_df(df, {'fields': {'s': {'type': 'bool'}}})
+        self.assertEqual(v.failures, 1)
+
     def test_compatibility(self):
         for kind in (NUMBERS, STRINGS, DATES):
             x = kind[0]
@@ -805,6 +843,55 @@ class TestPandasIndividualConstraintVerifier(ReferenceTestCase):
             else:
                 cvt.verify_allowed_values_constraint(col, c_nothing).isFalse()
 
+    def testRexMatches(self):
+        values = pd.Series(['a1', 'b2', 'c\u0663', 'dd', 'A\n', 5],
+                           dtype=object)
+        for rexes, expected in (
+            (['^[a-z]\\d$'], [True, True, True, False, False, False]),
+            (['^[a-z]\\d$', '^A$'], [True, True, True, False, True, False]),
+            (['^(a)\\1?\\d$', '^dd$'],    # backreference: not combined
+             [True, False, False, True, False, False]),
+            (['^[a-z]\\d$', '(?i)^a$'],    # inline flag: not combined
+             [True, True, True, False, True, False]),
+        ):
+            self.assertEqual(list(pdc.rex_matches(values, rexes)), expected)
+        self.assertIsNone(pdc.combined_rex(['^(a)\\1$', '^b$']))
+        self.assertIs(pdc.combined_rex(['^a$', '^b$']),
+                      pdc.combined_rex(['^a$', '^b$']))
+
+    def testCalcRexConstraint(self):
+        df = pd.DataFrame({
+            's': ['x', 'y', 'zz', None] * 3,
+            'c': pd.Categorical(['x', 'y', 'zz', None] * 3,
+                                categories=['x', 'y', 'zz', 'unused']),
+        })
+        calc = pdc.PandasConstraintCalculator(df)
+        for col in ('s', 'c'):
+            constraint = RexConstraint(['^[a-z]$'])
+            self.assertEqual(calc.calc_rex_constraint(col, constraint,
+                                                      detect=True),
+                             set(['zz']))
+            self.assertTrue(calc.calc_rex_constraint(col, constraint))
+            constraint = RexConstraint(['^zz$', '^[xy]$'])
+            self.assertEqual(calc.calc_rex_constraint(col, constraint,
+                                                      detect=True),
+                             set())
+            self.assertIsNone(calc.calc_rex_constraint(col, constraint))
+
+    def testCalcRexConstraintBytes(self):
+        df = pd.DataFrame({'a': [b'ab', 'b1', None, b'c\xc3\xa9']})
+        constraints = {'fields': {'a': {'rex': ['^a.*$', '^b\\d$']}}}
+        v = detect_df(df, constraints, per_constraint=True)
+        self.assertEqual(v.failures, 1)
+        self.assertEqual(v.detected()['a_rex_ok'].tolist(), [False])
+        constraints['fields']['a']['rex'].append('^c\u00e9$')
+        self.assertEqual(verify_df(df, constraints).failures, 0)
+        calc = pdc.PandasConstraintCalculator(df)
+        constraint = RexConstraint(['^[ab]'])
+        self.assertEqual(calc.calc_rex_constraint('a', constraint,
+                                                  detect=True),
+                         set(['c\u00e9']))
+
 
 class TestPandasMultipleConstraintVerifier(ReferenceTestCase):
     def testFieldVerification(self):
@@ -968,8 +1055,272 @@ class TestPandasMultipleConstraintVerifier(ReferenceTestCase):
         vdf.sort_values('field', inplace=True)
         self.assertStringCorrect(vdf.to_string(), 'elements118rex.df')
 
+    def testElements118rexInChunks(self):
+        csv_path = os.path.join(TESTDATA_DIR, 'elements118.csv')
+        df = pd.read_csv(csv_path)
+        constraints_path = os.path.join(TESTDATA_DIR, 'elements92rex.tdda')
+        v = verify_df(df, constraints_path, report='fields')
+        for chunksize in (1, 10, 200):
+            chunks = (df[i:i + chunksize]
+                      for i in range(0, len(df), chunksize))
+            vc = verify_df_chunks(chunks, constraints_path, report='fields')
+            self.assertEqual(vc.passes, 61)
+            self.assertEqual(vc.failures, 17)
+            self.assertTrue(vc.to_dataframe().equals(v.to_dataframe()))
+            self.assertEqual(str(vc), str(v))
+
+    def testAllowedValuesInChunks(self):
+        df = pd.DataFrame({'s': ['a', 'b', None, 'c', 'a', 'd', 'e', 'a'],
+                           'i': [1, 2, 3, 4, 5, 6, 7, 1]})
+        constraints = {
+            'fields': {
+                's': {'type': 'string', 'allowed_values': ['a', 'b', 'c']},
+                'i': {'type': 'int', 'no_duplicates': True},
+            }
+        }
+        v = verify_df(df, constraints)
+        self.assertEqual((v.passes, v.failures), (2, 2))
+        for max_distinct in (None, 1):
+            vc = verify_df_chunks((df[:3], df[3:6], df[6:]), constraints,
+                                  max_distinct=max_distinct)
+            self.assertTrue(vc.to_dataframe().equals(v.to_dataframe()))
+
+        constraints['fields']['s']['allowed_values'] += ['d', 'e']
+        v = verify_df_chunks((df[:4], df[4:7]), constraints, max_distinct=1)
+        self.assertEqual((v.passes, v.failures), (4, 0))
+
+    def testMixedTypesInChunks(self):
+        # amount is read as ints in the first chunk, but strings later
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'mixed.csv')
+            with open(path, 'w') as f:
+                f.write('id,amount\n')
+                for i in range(25):
+                    f.write('%d,%s\n' % (i, i * 10 if i < 10 else 'N/A'))
+            constraints = {
+                'fields': {
+                    'id': {'type': 'int'},
+                    'amount': {'type': 'int', 'min': 0, 'max': 90},
+                }
+            }
+            v = verify_df(load_df(path), constraints)
+            self.assertEqual((v.passes, v.failures), (1, 3))
+            vc = verify_df_chunks(load_df_chunks(path, 10), constraints)
+            self.assertTrue(vc.to_frame().equals(v.to_frame()))
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def testCompileConstraints(self):
+        constraints_path = os.path.join(TESTDATA_DIR, 'elements92rex.tdda')
+        plan = pdc.compile_constraints(constraints_path)
+        for name in ('elements92.csv', 'elements118.csv'):
+            df = pd.read_csv(os.path.join(TESTDATA_DIR, name))
+            v = plan.verify(df.copy())
+            expected = verify_df(df.copy(), constraints_path)
+            self.assertEqual((v.passes, v.failures),
+                             (expected.passes, expected.failures))
+            self.assertTrue(v.to_frame().equals(expected.to_frame()))
+            d = plan.detect(df.copy(), per_constraint=True)
+            expected = detect_df(df.copy(), constraints_path,
+                                 per_constraint=True)
+            if name == 'elements92.csv':
+                self.assertIsNone(d.detected())
+            else:
+                self.assertTrue(d.detected().equals(expected.detected()))
+
+        self.assertEqual(type(plan.compiled[('Symbol', 'rex')]), tuple)
+        self.assertRaises(AttributeError, setattr, plan, 'epsilon', 0.1)
+        self.assertFalse(hasattr(plan, 'constraints'))
+
+        # the checks are bound when the plan is compiled, so verifying
+        # a DataFrame doesn't look up the verifiers again
+        df = pd.read_csv(os.path.join(TESTDATA_DIR, 'elements118.csv'))
+        expected = verify_df(df.copy(), constraints_path)
+        verifiers = pdc.PandasConstraintVerifier.verifiers
+        pdc.PandasConstraintVerifier.verifiers = None
+        try:
+            v = plan.verify(df)
+        finally:
+            pdc.PandasConstraintVerifier.verifiers = verifiers
+        self.assertTrue(v.to_frame().equals(expected.to_frame()))
+        with self.assertRaises(TypeError):
+            plan.compiled[('Symbol', 'rex')] = None
+
+        df = pd.DataFrame({'s': ['a', 'b', 'c']})
+        plan = pdc.compile_constraints({'fields': {
+            's': {'allowed_values': ['a', 'b'], 'rex': ['^[ab]$', '^z$']}
+        }})
+        self.assertEqual(plan.compiled[('s', 'allowed_values')],
+                         frozenset(['a', 'b']))
+        v = plan.verify(df)
+        self.assertEqual(dict(v.fields['s']),
+                         {'allowed_values': False, 'rex': False})
+        self.assertEqual(plan.verify(df[:2]).failures, 0)
+
+    def testVerifyFailFast(self):
+        df = pd.DataFrame({'s': ['a', 'b', None, 'c'],
+                           'i': [1, 2, 3, 4]})
+        constraints = {
+            'fields': {
+                's': {'type': 'string', 'max_nulls': 0,
+                      'rex': ['^[ab]$']},
+                'i': {'type': 'int', 'max': 3},
+            }
+        }
+        v = verify_df(df, constraints, fail_fast=True)
+        self.assertTrue(v.short_circuited)
+        self.assertEqual((v.passes, v.failures), (2, 1))
+        self.assertEqual(dict(v.fields['s']),
+                         {'type': True, 'max_nulls': False})
+        self.assertEqual(dict(v.fields['i']), {'type': True})
+        self.assertTrue('Stopped at the first failure' in str(v))
+
+        # max is checked before rex, across all fields
+        del constraints['fields']['s']['max_nulls']
+        v = verify_df(df, constraints, fail_fast=True)
+        self.assertTrue(v.short_circuited)
+        self.assertEqual(dict(v.fields['s']), {'type': True})
+        self.assertEqual(dict(v.fields['i']), {'type': True, 'max': False})
+
+        # the last constraint checked fails, so none were skipped
+        constraints['fields']['i']['max'] = 4
+        v = verify_df(df, constraints, fail_fast=True)
+        self.assertFalse(v.short_circuited)
+        self.assertTrue(v.to_frame().equals(verify_df(df, constraints)
+                                            .to_frame()))
+
+        del constraints['fields']['s']['rex']
+        v = verify_df(df, constraints, fail_fast=True)
+        self.assertFalse(v.short_circuited)
+        self.assertEqual((v.passes, v.failures), (3, 0))
+
+        # the cheap checks don't profile the column (with value_counts)
+        constraints['fields']['i']['max'] = 3
+        plan = pdc.compile_constraints(constraints)
+        calc_profile = pdc.PandasConstraintVerifier.calc_profile
+        pdc.PandasConstraintVerifier.calc_profile = None
+        try:
+            v = plan.verify(df, fail_fast=True)
+        finally:
+            pdc.PandasConstraintVerifier.calc_profile = calc_profile
+        self.assertEqual((v.passes, v.failures), (2, 1))
+        self.assertEqual(dict(v.fields['i']), {'type': True, 'max': False})
+
+    def testVerifyBatch(self):
+        constraints_path = os.path.join(TESTDATA_DIR, 'elements92.tdda')
+        tmpdir = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(tmpdir, 'sub'))
+            for (name, copy) in (('elements92.csv', 'a.csv'),
+                                 ('elements118.csv', 'b.csv'),
+                                 ('elements118.parquet', 'sub/c.parquet')):
+                shutil.copy(os.path.join(TESTDATA_DIR, name),
+                            os.path.join(tmpdir, copy))
+            with open(os.path.join(tmpdir, 'sub', 'd.parquet'), 'w') as f:
+                f.write('not parquet')
+            pattern = os.path.join(tmpdir, '**', '*.*')
+            expected = [
+                ('a.csv', 72, 0),
+                ('b.csv', 57, 15),
+                ('sub/c.parquet', 57, 15),
+            ]
+            for (n_jobs, chunksize) in ((None, None), (2, None), (1, 50)):
+                out = StringIO()
+                summary = verify_batch(pattern, constraints_path,
+                                       n_jobs=n_jobs, chunksize=chunksize,
+                                       out=out)
+                lines = [json.loads(line)
+                         for line in out.getvalue().splitlines()]
+                self.assertEqual(len(lines), 5)
+                for (line, (name, passes, failures)) in zip(lines, expected):
+                    self.assertEqual(line['path'],
+                                     os.path.join(tmpdir, name))
+                    self.assertEqual((line['passes'], line['failures']),
+                                     (passes, failures))
+                self.assertEqual(lines[0]['failing_fields'], [])
+                self.assertTrue('Z' in lines[1]['failing_fields'])
+                self.assertEqual(lines[3]['path'],
+                                 os.path.join(tmpdir, 'sub', 'd.parquet'))
+                self.assertTrue('error' in lines[3])
+                self.assertEqual(lines[4], {'summary': summary})
+                self.assertEqual(summary, {
+                    'files': 4,
+                    'passing_files': 1,
+                    'failing_files': 2,
+                    'error_files': 1,
+                    'passes': 186,
+                    'failures': 30,
+                })
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def testVerifyBatchCommand(self):
+        constraints_path = os.path.join(TESTDATA_DIR, 'elements92.tdda')
+        tmpdir = tempfile.mkdtemp()
+        try:
+            # files without extensions, so only --batch chooses Pandas
+            shutil.copy(os.path.join(TESTDATA_DIR, 'elements92.csv'),
+                        os.path.join(tmpdir, 'a'))
+            argv = ['tdda', 'verify', '--batch', os.path.join(tmpdir, '*'),
+                    constraints_path]
+            out = StringIO()
+            with redirect_stdout(out):
+                summary = main_with_argv(argv, verbose=False)
+            self.assertEqual((summary['passing_files'],
+                              summary['failing_files']), (1, 0))
+            self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+            shutil.copy(os.path.join(TESTDATA_DIR, 'elements118.csv'),
+                        os.path.join(tmpdir, 'b'))
+            with redirect_stdout(StringIO()):
+                with self.assertRaises(SystemExit) as cm:
+                    main_with_argv(argv, verbose=False)
+            self.assertEqual(cm.exception.code, 1)
+        finally:
+            shutil.rmtree(tmpdir)
+
 
 class TestPandasDataFrameConstraints(ReferenceTestCase):
+    def testColumnProfile(self):
+        df = pd.DataFrame({
+            'i': [3, 1, 2, 1],
+            'r': [1.5, np.nan, -2.0, 1.5],
+            's': ['b', None, 'a', 'b'],
+            'c': pd.Series(['y', 'x', None, 'x'], dtype='category'),
+            'b': [True, False, True, True],
+            'd': pd.to_datetime(['2024-01-02', None, '2024-01-01', None]),
+            'n': [np.nan] * 4,
+        })
+        calc = pdc.PandasConstraintCalculator(df)
+        for col in df:
+            profile = calc.calc_profile(col)
+            self.assertEqual(profile['null_count'],
+                             calc.calc_null_count(col))
+            self.assertEqual(profile['non_null_count'],
+                             calc.calc_non_null_count(col))
+            self.assertEqual(profile['nunique'], calc.calc_nunique(col))
+            if col != 'c':
+                for stat, f in (('min', calc.calc_min),
+                                ('max', calc.calc_max)):
+                    expected = f(col)
+                    if pd.isnull(expected):
+                        self.assertTrue(pd.isnull(profile[stat]))
+                    else:
+                        self.assertEqual(profile[stat], expected)
+        self.assertNotIn('min', calc.calc_profile('c'))  # unordered
+        for col in ('s', 'c'):
+            self.assertEqual(calc.calc_profile(col)['non_null_uniques'],
+                             calc.calc_unique_values(col,
+                                                     include_nulls=False))
+
+        # verification uses direct reductions, not the (slower) profile
+        pdv = pdc.PandasConstraintVerifier(df)
+        pdv.calc_profile = None
+        self.assertEqual(pdv.get_null_count('r'), 1)
+        self.assertEqual(pdv.get_max('r'), 1.5)
+        self.assertEqual(sorted(pdv.cache['r']), ['max', 'null_count'])
+
     def testDDD_df(self):
         csv_path = os.path.join(TESTDATA_DIR, 'ddd.csv')
         df = pd.read_csv(csv_path)
@@ -1288,6 +1639,133 @@ class TestPandasExampleAccountsData(ReferenceTestCase):
         self.assertEqual(v.passes, passingConstraints)
         self.assertEqual(v.failures, failingConstraints)
 
+    def testVerify25kAgainst1kInChunks(self):
+        reftddafile1k = os.path.join(TESTDATA_DIR, 'ref-accounts1k.tdda')
+        for name in ('accounts25k.csv', 'accounts25k.parquet'):
+            path = os.path.join(TESTDATA_DIR, name)
+            v = verify_df_from_file(path, constraints_path=reftddafile1k,
+                                    verbose=False)
+            vc = verify_df_from_file(path, constraints_path=reftddafile1k,
+                                     chunksize=4000, verbose=False)
+            self.assertEqual(vc.passes, 53)
+            self.assertEqual(vc.failures, 19)
+            self.assertTrue(vc.to_dataframe().equals(v.to_dataframe()))
+
+    def testLoadChunks(self):
+        pq_path = os.path.join(TESTDATA_DIR, 'accounts25k.parquet')
+        df = load_df(pq_path)
+        chunks = list(load_df_chunks(pq_path, chunksize=10000))
+        self.assertEqual([len(c) for c in chunks], [10000, 10000, 5000])
+        self.assertTrue(pd.concat(chunks, ignore_index=True).equals(df))
+
+    def testVerifyParquetFromStatistics(self):
+        pq_path = os.path.join(TESTDATA_DIR, 'accounts25k.parquet')
+        reftddafile1k = os.path.join(TESTDATA_DIR, 'ref-accounts1k.tdda')
+        constraints = DatasetConstraints(loadpath=reftddafile1k)
+        pdv = pdc.PandasParquetConstraintVerifier(pq_path, constraints)
+        # the dates are nanosecond timestamps, so are read
+        self.assertEqual(pdv.stats_fields, set(['overdraft_limit']))
+        self.assertEqual(list(pdv.df), [c for c in pdv.get_column_names()
+                                        if c not in pdv.stats_fields])
+        v = verify_parquet_file(pq_path, reftddafile1k)
+        vdf = verify_df(load_df(pq_path), reftddafile1k)
+        self.assertEqual(v.passes, 53)
+        self.assertEqual(v.failures, 19)
+        self.assertTrue(v.to_dataframe().equals(vdf.to_dataframe()))
+
+    def testVerifyParquetStatisticsRowGroups(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table({
+            'i': [1, None, 3, 4, None, 6],
+            'f': [1.5, float('nan'), -2.0, None, 3.0, 4.0],
+            's': ['a', None, 'b', 'c', 'd', 'e'],
+        })
+        path = os.path.join(self.tmp_dir, 'rowgroups.parquet')
+        pq.write_table(table, path, row_group_size=2)
+        (stats, nrecords) = pdc.parquet_statistics(path)
+        self.assertEqual(nrecords, 6)
+        self.assertEqual((stats['i'].tdda_type, stats['i'].null_count,
+                          stats['i'].min, stats['i'].max),
+                         ('real', 2, 1, 6))
+        self.assertIsNone(stats['f'].null_count)    # NaNs not counted
+        self.assertEqual((stats['f'].min, stats['f'].max), (-2.0, 4.0))
+        self.assertFalse(stats['s'].has_min_max)
+        for ctype in ('int', 'real', 'string'):
+            constraints = {'fields': {
+                c: {'type': ctype, 'min': 0, 'max': 5, 'sign': 'positive',
+                    'max_nulls': 1}
+                for c in ('i', 'f', 's')
+            }}
+            v = verify_parquet_file(path, constraints)
+            vdf = verify_df(load_df(path), constraints)
+            self.assertTrue(v.to_dataframe().equals(vdf.to_dataframe()))
+
+    def testVerifyParquetNullableInts(self):
+        df = pd.DataFrame({
+            'a': pd.array([1, None, 3], dtype='Int64'),
+            'b': pd.array([1, 2, 3], dtype='Int64'),
+            'd': [pd.Timestamp('2024-01-01') + pd.Timedelta(1, 'ns'),
+                  pd.Timestamp('2023-12-31'), None],
+        })
+        path = os.path.join(self.tmp_dir, 'nullable.parquet')
+        df.to_parquet(path)
+        (stats, nrecords) = pdc.parquet_statistics(path)
+        self.assertIsNone(stats['a'].tdda_type)     # read back as Int64
+        self.assertEqual(stats['b'].tdda_type, 'int')
+        self.assertFalse(stats['d'].has_min_max)    # nanoseconds
+        for ctype in ('int', 'real'):
+            for type_checking in ('strict', 'sloppy'):
+                constraints = {'fields': {
+                    c: {'type': ctype, 'min': 1, 'max_nulls': 0}
+                    for c in ('a', 'b')
+                }}
+                v = verify_parquet_file(path, constraints,
+                                        type_checking=type_checking)
+                vdf = verify_df(pd.read_parquet(path), constraints,
+                                type_checking=type_checking)
+                self.assertTrue(v.to_dataframe().equals(vdf.to_dataframe()))
+
+    def testLoadColumns(self):
+        columns = ['surname', 'nonexistent', 'account_number']
+        expected = ['account_number', 'surname']
+        for name in ('accounts1k.csv', 'accounts1k.parquet'):
+            path = os.path.join(TESTDATA_DIR, name)
+            df = load_df(path, columns=columns)
+            self.assertEqual(list(df), expected)
+            self.assertTrue(df.equals(load_df(path)[expected]))
+            chunks = list(load_df_chunks(path, chunksize=400,
+                                         columns=columns))
+            self.assertEqual([list(c) for c in chunks], [expected] * 3)
+            self.assertTrue(pd.concat(chunks).equals(df))
+
+    def testColumnsToLoad(self):
+        constraints = {'fields': {'b': {'type': 'int'},
+                                  'a': {'type': 'string'}}}
+        self.assertEqual(pdc.columns_to_load(constraints), ['b', 'a'])
+        self.assertEqual(pdc.columns_to_load(constraints, ['c', 'a']),
+                         ['b', 'a', 'c'])
+        self.assertIsNone(pdc.columns_to_load(constraints, []))
+
+    def testDetectFromFileLoadsConstrainedColumns(self):
+        csv_path = os.path.join(TESTDATA_DIR, 'accounts1k.csv')
+        constraints = {'fields': {
+            'overdraft_limit': {'type': 'int', 'max': 1000},
+            'surname': {'type': 'string', 'rex': ['^[A-Z][a-z]+$']},
+            'nonexistent': {'type': 'int'},
+        }}
+        fullpath = os.path.join(self.tmp_dir, 'full.csv')
+        outpath = os.path.join(self.tmp_dir, 'projected.csv')
+        df = load_df(csv_path)
+        vdf = detect_df(df, constraints, outpath=fullpath,
+                        output_fields=['account_number'],
+                        per_constraint=True)
+        v = detect_df_from_file(csv_path, constraints, outpath=outpath,
+                                output_fields=['account_number'],
+                                per_constraint=True, verbose=False)
+        self.assertEqual((v.passes, v.failures), (vdf.passes, vdf.failures))
+        self.assertFileCorrect(outpath, fullpath)
+
     def testDetect25kAgainst1k(self):
         csv_path = os.path.join(TESTDATA_DIR, 'accounts25k.csv')
         reftddafile1k = os.path.join(TESTDATA_DIR, 'ref-accounts1k.tdda')
@@ -1313,6 +1791,26 @@ class TestPandasExampleAccountsData(ReferenceTestCase):
 
         self.assertTextFileCorrect(outfile, refpath)
 
+    def testDetect25kAgainst1kInChunks(self):
+        reftddafile1k = os.path.join(TESTDATA_DIR, 'ref-accounts1k.tdda')
+        for name in ('accounts25k.csv', 'accounts25k.parquet'):
+            path = os.path.join(TESTDATA_DIR, name)
+            stem = os.path.splitext(name)[0]
+            outfile = os.path.join(self.tmp_dir, stem + 'failures.parquet')
+            refpath = os.path.join(self.tmp_dir, stem + 'ref.parquet')
+            v = detect_df_from_file(path, constraints_path=reftddafile1k,
+                                    outpath=outfile, chunksize=4000,
+                                    per_constraint=True, verbose=False)
+            self.assertEqual(v.passes, 53)
+            self.assertEqual(v.failures, 19)
+            self.assertEqual(v.detection.n_passing_records, 24883)
+            self.assertEqual(v.detection.n_failing_records, 117)
+            ref = detect_df_from_file(path, constraints_path=reftddafile1k,
+                                      outpath=refpath, per_constraint=True,
+                                      verbose=False)
+            self.assertDataFramesEqual(pd.read_parquet(outfile),
+                                       pd.read_parquet(refpath))
+
     def testDetect25kAgainst1k_parquet(self):
         pq_path = os.path.join(TESTDATA_DIR, 'accounts25k.parquet')
         reftddafile1k = os.path.join(TESTDATA_DIR, 'ref-accounts1k.tdda')
@@ -1377,6 +1875,97 @@ class TestPandasMultipleConstraintDetector(ReferenceTestCase):
         self.assertEqual(v.failures, 17)
         self.assertTextFileCorrect(detectfile, 'elements118rex_detect.csv')
 
+    def testDetectElements118rexToFileInChunks(self):
+        csv_path = os.path.join(TESTDATA_DIR, 'elements118.csv')
+        df = pd.read_csv(csv_path)
+        constraints_path = os.path.join(TESTDATA_DIR, 'elements92rex.tdda')
+        detectfile = os.path.join(self.tmp_dir, 'elements118rex_detect.csv')
+        for chunksize in (1, 10, 200):
+            v = detect_df(df, constraints_path, report='fields',
+                          outpath=detectfile, output_fields=['Z'],
+                          chunksize=chunksize)
+            self.assertEqual(v.passes, 61)
+            self.assertEqual(v.failures, 17)
+            self.assertEqual(v.detection.n_failing_records, 27)
+            self.assertIsNone(v.detected())
+            self.assertTextFileCorrect(detectfile,
+                                       'elements118rex_detect.csv')
+
+    def testDetectMultiIndex(self):
+        df = pd.DataFrame({'a': [1, 2, 3, 9],
+                           'k1': [1, 1, 2, 2],
+                           'k2': ['x', 'y', 'x', 'y']})
+        constraints = {'fields': {'a': {'max': 5, 'min': 2}}}
+        detectfile = os.path.join(self.tmp_dir, 'multiindex.csv')
+        for names in (['k1', 'k2'], [None, None]):
+            mdf = df.set_index(['k1', 'k2'])
+            mdf.index.names = names
+            for output_fields in (None, [], ['a']):
+                for rownumber_is_index in (True, False):
+                    v = detect_df(mdf, constraints, per_constraint=True,
+                                  output_fields=output_fields,
+                                  rownumber_is_index=rownumber_is_index)
+                    detected = v.detected()
+                    self.assertEqual(list(detected.index),
+                                     [(1, 'x'), (2, 'y')])
+                    self.assertEqual(list(detected.index.names), names)
+                    self.assertEqual(list(detected['n_failures']), [1, 1])
+            detect_df(mdf, constraints, outpath=detectfile,
+                      per_constraint=True, index=True)
+            stems = names if names[0] else ['Index_1', 'Index_2']
+            with open(detectfile) as f:
+                self.assertEqual(f.read(),
+                                 '%s,%s,a_min_ok,a_max_ok,n_failures\n'
+                                 '1,x,false,true,1\n'
+                                 '2,y,true,false,1\n' % tuple(stems))
+
+    def testDetectPassingInChunksRemovesOldOutput(self):
+        df = pd.DataFrame({'a': [1, 2, 3]})
+        constraints = {'fields': {'a': {'max': 5}}}
+        for (name, compact) in (('passing.csv', False),
+                                ('passing.parquet', True)):
+            detectfile = os.path.join(self.tmp_dir, name)
+            sidecar = pdc.failure_index_sidecar_path(detectfile)
+            for path in (detectfile, sidecar):
+                with open(path, 'w') as f:
+                    f.write('stale')
+            v = detect_df_chunks([df[:2], df[2:]], constraints,
+                                 outpath=detectfile, compact=compact)
+            self.assertEqual(v.failures, 0)
+            self.assertFalse(os.path.exists(detectfile))
+            self.assertEqual(os.path.exists(sidecar), not compact)
+            if not compact:
+                os.remove(sidecar)
+
+    def testDetectNullChunksInChunks(self):
+        # closed has no values in the first chunk, so is read as real there
+        path = os.path.join(self.tmp_dir, 'nullchunk.csv')
+        with open(path, 'w') as f:
+            f.write('id,closed\n')
+            for i in range(9):
+                f.write('%d,%s\n' % (i, '2024-01-%02d' % (i * 3)
+                                        if i >= 3 else ''))
+        constraints_path = os.path.join(self.tmp_dir, 'nullchunk.tdda')
+        with open(constraints_path, 'w') as f:
+            json.dump({'fields': {'closed': {'type': 'date',
+                                             'min': '2024-01-10',
+                                             'max': '2024-01-20'}}}, f)
+        refpath = os.path.join(self.tmp_dir, 'nullchunk_detect.csv')
+        detect_df_from_file(path, constraints_path, refpath,
+                            per_constraint=True, verbose=False)
+        with open(refpath) as f:
+            expected = f.read()
+        self.assertEqual(expected.count('\n'), 4)
+        for chunksize in (2, 3, 4):
+            detectfile = os.path.join(self.tmp_dir, 'nullchunk%d.csv'
+                                                    % chunksize)
+            v = detect_df_from_file(path, constraints_path, detectfile,
+                                    chunksize=chunksize, per_constraint=True,
+                                    verbose=False)
+            self.assertEqual(v.detection.n_failing_records, 3)
+            with open(detectfile) as f:
+                self.assertEqual(f.read(), expected)
+
     def testDetectElements118rexToFilePerConstraint(self):
         csv_path = os.path.join(TESTDATA_DIR, 'elements118.csv')
         df = pd.read_csv(csv_path)
@@ -1402,6 +1991,22 @@ class TestPandasMultipleConstraintDetector(ReferenceTestCase):
         ddf = v.detected()
         self.assertStringCorrect(ddf.to_string(), 'elements118rex_detect.df')
 
+    def testDetectElements118rexConcurrently(self):
+        csv_path = os.path.join(TESTDATA_DIR, 'elements118.csv')
+        df = pd.read_csv(csv_path)
+        constraints_path = os.path.join(TESTDATA_DIR, 'elements92rex.tdda')
+        v = verify_df(df, constraints_path, n_jobs=4)
+        serial = verify_df(df, constraints_path)
+        self.assertEqual((v.passes, v.failures), (61, 17))
+        self.assertEqual(list(v.fields), list(serial.fields))
+        self.assertEqual(str(v), str(serial))
+        v = detect_df(df, constraints_path, output_fields=['Z'],
+                      per_constraint=True, n_jobs=4)
+        serial = detect_df(df, constraints_path, output_fields=['Z'],
+                           per_constraint=True)
+        self.assertEqual(v.detected().to_string(),
+                         serial.detected().to_string())
+
     def testDetectElements118_csv_to_csv(self):
         self.detectElements('csv', 'csv')
 
@@ -1464,6 +2069,135 @@ class TestPandasMultipleConstraintDetector(ReferenceTestCase):
         ddf2 = v2.detected()
         self.assertStringCorrect(ddf2.to_string(), 'detect_dups.df')
 
+        # duplicates in different chunks are detected too
+        chunks = [df2[:2], df2[2:]]
+        v3 = detect_df_chunks(chunks, constraints.to_dict(),
+                              per_constraint=True, output_fields=['i', 's'])
+        self.assertEqual(v3.passes, 0)
+        self.assertEqual(v3.failures, 2)
+        self.assertStringCorrect(v3.detected().to_string(), 'detect_dups.df')
+        self.assertRaises(TypeError, detect_df_chunks, iter(chunks),
+                          constraints.to_dict())
+
+    def testDetectionMatrix(self):
+        c = pd.Series([1.0, np.nan, 3.0, 4.0])
+        self.assertEqual(list(pdc.detection_field(c, c < 3)),
+                         [pdc.PASS, pdc.NULL_RESULT, pdc.FAIL, pdc.FAIL])
+        self.assertEqual(list(pdc.detection_field(c, c < 3, default=True)),
+                         [pdc.PASS, pdc.NULL_PASS, pdc.FAIL, pdc.FAIL])
+
+        m = pdc.DetectionMatrix(4)
+        names = ['c%d' % i for i in range(pdc.DetectionMatrix.INITIAL_COLUMNS
+                                          + 1)]
+        for name in names:                      # forces the matrix to grow
+            m.set(name, True)
+        m.set(names[0], pdc.detection_field(c, c < 3))
+        m.set(names[1], c.notnull())
+        m.set(names[-1], pdc.detection_field(c, c > 3, default=True))
+        m.set(names[2], False)
+        self.assertEqual(list(m.n_failures), [2, 2, 3, 2])
+
+        df = m.to_frame(names[:3] + names[-1:], pd.RangeIndex(4))
+        self.assertEqual(list(df), names[:3] + names[-1:])
+        self.assertEqual([str(df[name].dtype) for name in df],
+                         ['object', 'bool', 'bool', 'object'])
+        self.assertEqual(df.iloc[1].tolist()[1:], [False, False, True])
+        self.assertTrue(np.isnan(df.iloc[1, 0]))
+        df = m.to_frame(names[:1], pd.Index([2, 3]), rows=np.array([2, 3]))
+        self.assertEqual(df[names[0]].tolist(), [False, False])
+        self.assertEqual(str(df[names[0]].dtype), 'object')
+
+    def testCompactDetection(self):
+        df = pd.DataFrame({'a': [1, 2, 2, np.nan, 5],
+                           's': ['x', 'y', 'z', 'y', None]})
+        constraints = {'fields': {
+            'a': {'max': 4, 'max_nulls': 0, 'no_duplicates': True},
+            's': {'allowed_values': ['x', 'y']},
+        }}
+        full = detect_df(df, constraints, per_constraint=True,
+                         output_fields=[]).detected()
+        v = detect_df(df, constraints, compact=True)
+        fi = v.failure_index()
+        self.assertEqual(len(fi), 4)
+        self.assertEqual(fi.nrecords, 5)
+        self.assertEqual(list(fi.row_numbers), [2, 3, 4, 5])
+        self.assertEqual(fi.constraint_names(),
+                         ['a_max_ok', 'a_nonnull_ok', 'a_nodups_ok',
+                          's_values_ok'])
+        self.assertEqual(fi.constraints[1]['field'], 'a')
+        self.assertEqual(fi.constraints[1]['kind'], 'max_nulls')
+        self.assertEqual(fi.masks.tolist(), [[4], [12], [2], [1]])
+        detected = v.detected()
+        self.assertEqual(list(detected.index), [2, 3, 4, 5])
+        self.assertEqual(detected['n_failures'].tolist(),
+                         full['n_failures'].tolist())
+        for name in fi.constraint_names():
+            self.assertEqual(detected[name].tolist(),
+                             (full[name] != False).tolist())
+
+        joined = fi.join(df, columns=['s'])
+        self.assertEqual(list(joined.index), [1, 2, 3, 4])
+        self.assertEqual(list(joined)[:2], ['s', 'a_max_ok'])
+        self.assertEqual(joined['s'].tolist(), ['y', 'z', 'y', None])
+
+        chunked = detect_df(df, constraints, compact=True, chunksize=2)
+        self.assertEqual(chunked.failure_index().masks.tolist(),
+                         fi.masks.tolist())
+        self.assertEqual(list(chunked.failure_index().row_numbers),
+                         [2, 3, 4, 5])
+
+    def testCompactDetectionFiles(self):
+        df = pd.DataFrame({'a': np.arange(100), 'b': np.arange(100) % 7})
+        constraints = {'fields': {'a': {'max': 90}, 'b': {'max': 5}}}
+        tmpdir = tempfile.mkdtemp()
+        try:
+            inpath = os.path.join(tmpdir, 'in.parquet')
+            df.to_parquet(inpath, row_group_size=10)
+            expected = detect_df(df, constraints, compact=True)
+            expected = expected.failure_index()
+            for name in ('out.parquet', 'out.npz'):
+                outpath = os.path.join(tmpdir, name)
+                detect_df(df, constraints, outpath=outpath, compact=True)
+                for mmap in (True, False):
+                    fi = pdc.FailureIndex.load(outpath, mmap=mmap)
+                    self.assertEqual(fi.nrecords, 100)
+                    self.assertEqual(list(fi.row_numbers),
+                                     list(expected.row_numbers))
+                    self.assertEqual(fi.masks.tolist(),
+                                     expected.masks.tolist())
+                    self.assertEqual(fi.constraints, expected.constraints)
+                with open(outpath + '.json') as f:
+                    sidecar = json.load(f)
+                self.assertEqual([c['name'] for c in sidecar['constraints']],
+                                 ['a_max_ok', 'b_max_ok'])
+            joined = fi.join(inpath, columns=['a'])
+            self.assertEqual(list(joined.index), list(fi.row_numbers))
+            self.assertEqual(joined['a'].tolist(),
+                             [r - 1 for r in fi.row_numbers])
+            self.assertEqual(joined['n_failures'].tolist(),
+                             fi.n_failures().tolist())
+            self.assertTrue(joined.equals(fi.join(df, columns=['a'])
+                                          .set_index(joined.index)))
+            # the output file is checked first, even if nothing fails
+            csvpath = os.path.join(tmpdir, 'out.csv')
+            passing = {'fields': {'a': {'max': 100}}}
+            for c in (constraints, passing):
+                self.assertRaises(Exception, detect_df, df, c,
+                                  outpath=csvpath, compact=True)
+                self.assertRaises(Exception, detect_df_chunks, [df], c,
+                                  outpath=csvpath, compact=True)
+            self.assertRaises(SystemExit, pd_detect_params,
+                              [inpath, 'c.tdda', csvpath, '--compact'])
+
+            # no old sidecar is left behind, if nothing fails
+            outpath = os.path.join(tmpdir, 'out.parquet')
+            v = detect_df(df, passing, outpath=outpath, compact=True)
+            self.assertIsNone(v.detection)
+            self.assertFalse(os.path.exists(outpath))
+            self.assertFalse(os.path.exists(outpath + '.json'))
+        finally:
+            shutil.rmtree(tmpdir)
+
 
 class TestPandasMultipleConstraintGeneration(ReferenceTestCase):
     def testConstraintGenerationNoRex(self):
@@ -1472,6 +2206,29 @@ class TestPandasMultipleConstraintGeneration(ReferenceTestCase):
     def testConstraintGenerationWithRex(self):
         self.constraintsGenerationTest(inc_rex=True)
 
+    def testConstraintGenerationWithRexCache(self):
+        csv_path = os.path.join(TESTDATA_DIR, 'elements92.csv')
+        df = pd.read_csv(csv_path)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            first = discover_df(df, inc_rex=True, rex_cache=tmpdir)
+            self.assertTrue(len(os.listdir(tmpdir)) > 0)
+            second = discover_df(df, inc_rex=True, rex_cache=tmpdir)
+            self.assertEqual(first.to_dict()['fields'],
+                             second.to_dict()['fields'])
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def testConcurrentConstraintGeneration(self):
+        csv_path = os.path.join(TESTDATA_DIR, 'elements92.csv')
+        df = pd.read_csv(csv_path)
+        for inc_rex in (False, True):
+            serial = discover_df(df, inc_rex=inc_rex, seed=1)
+            concurrent = discover_df(df, inc_rex=inc_rex, seed=1, n_jobs=3)
+            self.assertEqual(list(concurrent.fields), list(serial.fields))
+            self.assertEqual(concurrent.to_dict()['fields'],
+                             serial.to_dict()['fields'])
+
     def constraintsGenerationTest(self, inc_rex=False):
         csv_path = os.path.join(TESTDATA_DIR, 'elements92.csv')
         df = pd.read_csv(csv_path)
@@ -1575,6 +2332,14 @@ class CommandLineHelper:
                                                 'Constraints passing: 57\n'
                                                 'Constraints failing: 15'))
 
+    def testVerifyE118CmdInChunks(self):
+        argv = ['tdda', 'verify', self.e118csv, self.e92tdda_correct,
+                '--chunksize', '10']
+        result = self.execute_command(argv)
+        self.assertTrue(result.strip().endswith('SUMMARY:\n\n'
+                                                'Constraints passing: 57\n'
+                                                'Constraints failing: 15'))
+
     def testVerifyOptionFlags(self):
         argv = ['tdda', 'verify', self.e92csv, self.e92tdda_correct]
         result = self.execute_command(argv)
@@ -1650,6 +2415,17 @@ class CommandLineHelper:
         self.assertTextFileCorrect(self.e92bads1, 'detect-els-cmdline.csv')
         os.remove(self.e92bads1)
 
+    def testDetectE118CmdInChunks(self):
+        argv = ['tdda', 'detect', self.e118csv, self.e92tdda_correct,
+                self.e92bads1, '--per-constraint', '--output-fields',
+                '--index', '--chunksize', '25']
+        result = self.execute_command(argv)
+        self.assertTrue(result.strip().endswith('SUMMARY:\n\n'
+                                                'Records passing: 91\n'
+                                                'Records failing: 27'))
+        self.assertTextFileCorrect(self.e92bads1, 'detect-els-cmdline.csv')
+        os.remove(self.e92bads1)
+
     def testDetectE118CmdInterleaved(self):
         argv = ['tdda', 'detect', self.e118csv, self.e92tdda_correct,
                 self.e92bads3, '--per-constraint', '--output-fields',
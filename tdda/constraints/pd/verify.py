@@ -23,11 +23,42 @@ Parameters:
 If no constraints file is provided, a file with the same path as the
 input file, with a .tdda extension will be tried.
 
+Only the columns that have constraints are read from the input file.
+
+For parquet files, type, min, max, sign and max_nulls constraints are
+verified from the statistics in the file's footer, where possible,
+without reading the columns.
+
+Optional flags for CSV and parquet input files:
+
+  * --chunksize N
+      Read the input N rows at a time, rather than loading it all
+      into memory, for files that are too large to fit in memory.
+      The results are the same.
+  * -j N, --jobs N
+      Verify up to N fields concurrently (0 for one per CPU), or,
+      with --batch, up to N files concurrently, in a pool of processes.
+  * --batch
+      Treat the input as a glob pattern (quoted, to stop the shell
+      expanding it, and with ** matching any number of directories),
+      and verify every file matching it against the constraints file,
+      which must be given. The result for each file is written to
+      standard output as a line of JSON, as soon as it is available
+      (in order of path), followed by a line with a summary for all
+      the files. The exit status is 1 if any file failed verification
+      or couldn't be verified, and 0 otherwise.
+
 '''
 
+import glob
+import json
 import os
 import sys
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
 try:
     from StringIO import StringIO
 except ImportError:
@@ -38,10 +69,22 @@ import numpy as np
 
 from tdda import __version__
 from tdda.constraints.flags import verify_parser, verify_flags
-from tdda.constraints.pd.constraints import verify_df, load_df
+from tdda.constraints.pd.constraints import (verify_df, verify_df_chunks,
+                                             verify_parquet_file,
+                                             compile_constraints,
+                                             load_constraints,
+                                             load_df, load_df_chunks,
+                                             columns_to_load, file_format)
+from tdda.utils import effective_n_jobs
 
 
-def verify_df_from_file(df_path, constraints_path, verbose=True, **kwargs):
+def verify_df_from_file(df_path, constraints_path, verbose=True,
+                        chunksize=None, batch=False, n_jobs=None, **kwargs):
+    if batch:
+        return verify_batch(df_path, constraints_path, n_jobs=n_jobs,
+                            chunksize=chunksize, **kwargs)
+    if n_jobs is not None and not chunksize:
+        kwargs['n_jobs'] = n_jobs
     if df_path == '-' or df_path is None:
         df_path = StringIO(sys.stdin.read())
         if constraints_path is None:
@@ -51,18 +94,147 @@ def verify_df_from_file(df_path, constraints_path, verbose=True, **kwargs):
         stem, ext = os.path.splitext(df_path)
         constraints_path = stem + '.tdda'
 
-    df = load_df(df_path)
-    v = verify_df(df, constraints_path, **kwargs)
+    columns = columns_to_load(constraints_path)
+    if chunksize:
+        chunks = load_df_chunks(df_path, chunksize, columns=columns)
+        v = verify_df_chunks(chunks, constraints_path, **kwargs)
+    elif file_format(df_path) == 'parquet':
+        v = verify_parquet_file(df_path, constraints_path, **kwargs)
+    else:
+        df = load_df(df_path, columns=columns)
+        v = verify_df(df, constraints_path, **kwargs)
     if verbose:
         print(v)
     return v
 
 
+def verify_batch(pattern, constraints_path, n_jobs=None, chunksize=None,
+                 out=None, **kwargs):
+    """
+    Verify every file matching the glob *pattern* against the constraints
+    in *constraints_path*, in a pool of *n_jobs* processes (or one at a
+    time, if *n_jobs* is ``None`` or 1), writing the result for each file
+    to *out* (standard output, by default) as a line of JSON, in order of
+    path, followed by a line with a summary for all the files, which is
+    also returned.
+
+    Each process loads the constraints once, and keeps them (compiled)
+    for all the files it verifies, so the cost of starting Python and
+    importing Pandas, and of preparing the constraints, is only paid
+    once per process, rather than once per file.
+
+    A file that can't be read or verified is reported with its error,
+    rather than stopping the batch.
+    """
+    out = out or sys.stdout
+    paths = sorted(glob.glob(pattern, recursive=True))
+    summary = OrderedDict((
+        ('files', len(paths)),
+        ('passing_files', 0),
+        ('failing_files', 0),
+        ('error_files', 0),
+        ('passes', 0),
+        ('failures', 0),
+    ))
+    initargs = (constraints_path, chunksize, kwargs)
+    n_jobs = min(effective_n_jobs(n_jobs), max(len(paths), 1))
+    if n_jobs > 1:
+        pool = ProcessPoolExecutor(max_workers=n_jobs,
+                                   initializer=init_batch_worker,
+                                   initargs=initargs)
+        results = pool.map(verify_batch_file, paths)
+    else:
+        pool = None
+        init_batch_worker(*initargs)
+        results = map(verify_batch_file, paths)
+    try:
+        for result in results:
+            if 'error' in result:
+                summary['error_files'] += 1
+            else:
+                summary['passes'] += result['passes']
+                summary['failures'] += result['failures']
+                if result['failures']:
+                    summary['failing_files'] += 1
+                else:
+                    summary['passing_files'] += 1
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    finally:
+        if pool:
+            pool.shutdown()
+    out.write(json.dumps({'summary': summary}) + '\n')
+    out.flush()
+    return summary
+
+
+BATCH = {}      # the state of batch verification in each worker process
+
+
+def init_batch_worker(constraints_path, chunksize, kwargs):
+    """
+    Prepares for batch verification in this process, compiling the
+    constraints once, for all the files.
+    """
+    kwargs = dict(kwargs)
+    constraints = load_constraints(constraints_path)
+    plan = compile_constraints(constraints,
+                               epsilon=kwargs.pop('epsilon', None),
+                               type_checking=kwargs.pop('type_checking',
+                                                        None))
+    BATCH.update(plan=plan, constraints=constraints, chunksize=chunksize,
+                 columns=columns_to_load(constraints), kwargs=kwargs)
+
+
+def verify_batch_file(path):
+    """
+    Verifies the file at *path* (in batch verification), in the same way
+    as for a single file, returning an OrderedDict of its results, or its
+    error, to be written as a line of JSON.
+
+    Anything printed during verification (such as warnings) goes to
+    standard error, since standard output is for the results.
+    """
+    plan = BATCH['plan']
+    kwargs = dict(BATCH['kwargs'], epsilon=plan.epsilon,
+                  type_checking=plan.type_checking)
+    result = OrderedDict([('path', path)])
+    try:
+        with redirect_stdout(sys.stderr):
+            if BATCH['chunksize']:
+                chunks = load_df_chunks(path, BATCH['chunksize'],
+                                        columns=BATCH['columns'])
+                v = verify_df_chunks(chunks, BATCH['constraints'], **kwargs)
+            elif file_format(path) == 'parquet':
+                v = verify_parquet_file(path, BATCH['constraints'], **kwargs)
+            else:
+                df = load_df(path, columns=BATCH['columns'])
+                v = plan.verify(df, **BATCH['kwargs'])
+    except Exception as e:
+        result['error'] = '%s: %s' % (e.__class__.__name__, e)
+        return result
+    result['passes'] = v.passes
+    result['failures'] = v.failures
+    result['failing_fields'] = [name for (name, field) in v.fields.items()
+                                if field.failures > 0]
+    if v.short_circuited:
+        result['short_circuited'] = True
+    return result
+
+
 def pd_verify_parser():
     parser = verify_parser(USAGE)
     parser.add_argument('input', nargs=1, help='CSV or parquet file')
     parser.add_argument('constraints', nargs='?',
                         help='constraints file to verify against')
+    parser.add_argument('--chunksize', type=int, metavar='N',
+                        help='read and verify the input N rows at a time')
+    parser.add_argument('-j', '--jobs', type=int, metavar='N',
+                        help='verify up to N fields (or, with --batch, '
+                             'files) concurrently')
+    parser.add_argument('--batch', action='store_true',
+                        help='verify all the files matching the input '
+                             '(a glob pattern), writing JSON lines')
     return parser
 
 
@@ -72,6 +244,16 @@ def pd_verify_params(args):
     flags = verify_flags(parser, args, params)
     params['df_path'] = flags.input[0] if flags.input else None
     params['constraints_path'] = flags.constraints
+    if flags.chunksize:
+        params['chunksize'] = flags.chunksize
+    if flags.jobs is not None:
+        params['n_jobs'] = flags.jobs
+    if flags.batch:
+        if flags.constraints is None:
+            print('A constraints file must be specified with --batch.',
+                  file=sys.stderr)
+            sys.exit(1)
+        params['batch'] = True
     return params
 
 
@@ -83,10 +265,14 @@ class PandasVerifier:
     def verify(self):
         params = pd_verify_params(self.argv[1:])
         path = params['df_path']
-        if path is not None and path != '-' and not os.path.isfile(path):
+        if (path is not None and path != '-' and not params.get('batch')
+                and not os.path.isfile(path)):
             print('%s does not exist' % path)
             sys.exit(1)
-        return verify_df_from_file(verbose=self.verbose, **params)
+        v = verify_df_from_file(verbose=self.verbose, **params)
+        if params.get('batch') and (v['failing_files'] or v['error_files']):
+            sys.exit(1)
+        return v
 
 
 def main(argv, verbose=True):
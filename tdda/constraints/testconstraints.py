@@ -10,6 +10,11 @@ try:
 except ImportError:
     print('Skipping Pandas tests', file=sys.stderr)
 
+try:
+    from tdda.constraints.arrow.testarrowconstraints import *
+except ImportError:
+    print('Skipping Arrow tests', file=sys.stderr)
+
 try:
     from tdda.constraints.db.testdbconstraints import *
     # The individual imports of the database driver libraries
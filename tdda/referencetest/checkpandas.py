@@ -710,6 +710,60 @@ def default_csv_loader(csvfile, **kwargs):
         - na_values             are the empty string, ``"NaN"``, and ``"NULL"``
         - keep_default_na       is ``False``
     """
+    options, infer_datetimes = csv_loader_options(kwargs)
+    try:
+        df = pd.read_csv(csvfile, **options)
+    except pd.errors.ParserError:
+        # Pandas CSV reader gets confused by stutter-quoted text that
+        # also includes escapechars. So try again, with no escapechar.
+        del options['escapechar']
+        df = pd.read_csv(csvfile, **options)
+
+    if infer_datetimes:  # We do it ourselves, now, instead of lettings
+        # pandas do it.
+        return infer_datetime_columns(df)
+    else:
+        return df
+
+
+def default_csv_chunk_loader(csvfile, chunksize, **kwargs):
+    """
+    Generator version of :py:func:`default_csv_loader`, for reading a
+    csv file that might not fit in memory.
+
+    Yields successive DataFrames of up to *chunksize* rows each, read
+    with the same defaults as :py:func:`default_csv_loader`.
+
+    Types (including dates) are inferred separately for each chunk,
+    so a column can have different dtypes in different chunks (e.g. if
+    one chunk has only nulls for it).
+    """
+    options, infer_datetimes = csv_loader_options(kwargs)
+    options['chunksize'] = chunksize
+    nchunks = 0
+    try:
+        with pd.read_csv(csvfile, **options) as reader:
+            for df in reader:
+                nchunks += 1
+                yield infer_datetime_columns(df) if infer_datetimes else df
+    except pd.errors.ParserError:
+        if nchunks > 0:
+            raise
+        # As for default_csv_loader, try again with no escapechar.
+        # This is only possible if no chunks have been yielded yet.
+        if hasattr(csvfile, 'seek'):
+            csvfile.seek(0)
+        del options['escapechar']
+        with pd.read_csv(csvfile, **options) as reader:
+            for df in reader:
+                yield infer_datetime_columns(df) if infer_datetimes else df
+
+
+def csv_loader_options(kwargs):
+    """
+    Returns the options to pass to pd.read_csv() for the default csv
+    loaders, and whether they should infer datetime columns themselves.
+    """
     options = {
         'index_col': None,
         'quotechar': '"',
@@ -722,34 +776,29 @@ def default_csv_loader(csvfile, **kwargs):
     if 'infer_datetime_format' in options:  # don't let pandas do it.
         del options['infer_datetime_format']
     infer_datetimes = kwargs.get('infer_datetime_format', True)
+    return options, infer_datetimes
 
-    try:
-        df = pd.read_csv(csvfile, **options)
-    except pd.errors.ParserError:
-        # Pandas CSV reader gets confused by stutter-quoted text that
-        # also includes escapechars. So try again, with no escapechar.
-        del options['escapechar']
-        df = pd.read_csv(csvfile, **options)
 
-    if infer_datetimes:  # We do it ourselves, now, instead of lettings
-        # pandas do it.
-        colnames = df.columns.tolist()
-        for c in colnames:
-            if is_string_col(df[c]):
-                fmt = infer_date_format(df[c])
-                if fmt:
-                    try:
-                        datecol = pd.to_datetime(df[c], format=fmt)
-                        if datecol.dtype == np.dtype('datetime64[ns]'):
-                            df[c] = datecol
-                    except Exception as e:
-                        pass
-        ndf = pd.DataFrame()
-        for c in colnames:
-            ndf[c] = df[c]
-        return ndf
-    else:
-        return df
+def infer_datetime_columns(df):
+    """
+    Returns a DataFrame like *df*, but with any string columns that look
+    like dates or datetimes converted to datetimes.
+    """
+    colnames = df.columns.tolist()
+    for c in colnames:
+        if is_string_col(df[c]):
+            fmt = infer_date_format(df[c])
+            if fmt:
+                try:
+                    datecol = pd.to_datetime(df[c], format=fmt)
+                    if datecol.dtype == np.dtype('datetime64[ns]'):
+                        df[c] = datecol
+                except Exception as e:
+                    pass
+    ndf = pd.DataFrame()
+    for c in colnames:
+        ndf[c] = df[c]
+    return ndf
 
 
 def default_csv_writer(df, csvfile, **kwargs):
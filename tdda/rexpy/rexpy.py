@@ -9,17 +9,30 @@ programs.
 
 """
 
+import bz2
+import copy
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import os
 import random
 import re
 import string
 import sys
+import threading
+import zlib
 
 from array import array
 from collections import Counter, defaultdict, namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pprint import pprint
 
+import numpy as np
+
 from tdda import __version__
-from tdda.utils import nvl
+from tdda.utils import effective_n_jobs, nvl
 
 isPython2 = sys.version_info[0] < 3
 str_type = unicode if isPython2 else str
@@ -39,7 +52,8 @@ USAGE = '''Usage:
     rexpy [FLAGS] [INPUTFILE [OUTPUTFILE]]
 
 If INPUTFILE is provided, it should contain one string per line;
-otherwise lines will be read from standard input.
+otherwise lines will be read from standard input. Input compressed
+with gzip, bzip2 or xz is decompressed automatically.
 
 If OUTPUTFILE is provided, regular expressions found will be written
 to that (one per line); otherwise they will be printed.
@@ -163,21 +177,93 @@ class Size(object):
 
 
 
-nCalls = 0
-memo = {}
-def cre(rex):
+CRE_CACHE_SIZE = 10000
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+
+class RegexCache(object):
     """
-    Compiled regular expression
-    Memoized implementation.
+    Thread-safe, size-bounded cache of compiled regular expressions,
+    evicting the least recently used when full.
+
+    Compilation happens outside the lock, so two threads asking for
+    the same uncached expression at once may both compile it;
+    the results are equivalent.
     """
-    global nCalls, memo
-    nCalls += 1
-    c = memo.get(rex)
-    if c:
-        return c
-    else:
-        memo[rex] = c = re.compile(rex, RE_FLAGS)
+    def __init__(self, maxsize=CRE_CACHE_SIZE, flags=RE_FLAGS):
+        self.maxsize = maxsize
+        self.flags = flags
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, rex):
+        """
+        Returns the compiled form of regular expression rex.
+        """
+        with self.lock:
+            c = self.cache.get(rex)
+            if c is not None:
+                self.cache.move_to_end(rex)
+                self.hits += 1
+                return c
+            self.misses += 1
+        c = re.compile(rex, self.flags)
+        with self.lock:
+            self.cache[rex] = c
+            while len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
         return c
+    __call__ = get
+
+    def info(self):
+        """
+        Returns a CacheInfo named tuple with the numbers of hits and misses,
+        the maximum size and the current size of the cache.
+        """
+        with self.lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize,
+                             len(self.cache))
+
+    def resize(self, maxsize):
+        """
+        Change the maximum size of the cache, evicting entries if necessary.
+        """
+        with self.lock:
+            self.maxsize = maxsize
+            while len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+
+    def clear(self):
+        """
+        Empty the cache and reset its counters.
+        """
+        with self.lock:
+            self.cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+RE_CACHE = RegexCache()
+
+
+def cre(rex):
+    """
+    Compiled regular expression.
+
+    Uses the shared, bounded RE_CACHE.
+    """
+    return RE_CACHE.get(rex)
+
+
+def cre_cache_info():
+    """
+    Returns hit, miss and size information for the compiled regular
+    expression cache used by cre.
+    """
+    return RE_CACHE.info()
 
 
 def terminated_cre(expr):
@@ -305,6 +391,7 @@ class Categories(object):
             ['UAlphaNumeric'] if UNICHRS else []
 
         )
+        self.coarse_table = CoarseClassTable(self)
         if dialect and dialect != 'perl':
             self.adapt_for_output(dialect, el_re)
 
@@ -334,6 +421,20 @@ class Categories(object):
             self.build_cat_map()
         return self.code2cat[k]
 
+    def coarse_classify_char(self, c):
+        """
+        Classify character into one of the coarse categories,
+        by matching it against the regular expression for each in turn.
+
+        This is the reference implementation used to populate
+        self.coarse_table; normally, use that instead.
+        """
+        for cat in self.SpecificCoarseCats:
+            if re.match(cat.re_single, c):
+                return cat.code
+        assert re.match(self.Other.re_single, c)
+        return self.Other.code
+
     @classmethod
     def escape_code(cls, code):
         return escape(code, full=False) if code in cls.escapableCodes else code
@@ -390,6 +491,27 @@ class Categories(object):
 
 
 
+class CoarseClassTable(dict):
+    """
+    Mapping from code points to coarse category codes, suitable for
+    use with ``str.translate``, so that a whole string can be coarsely
+    classified in a single pass.
+
+    The ASCII range is populated on construction; other code points
+    are classified (using the regular expressions from the Categories
+    object) the first time they are seen, and then remembered.
+    """
+    def __init__(self, cats):
+        dict.__init__(self)
+        self.cats = cats
+        for i in range(128):
+            self[i] = cats.coarse_classify_char(chr(i))
+
+    def __missing__(self, k):
+        code = self[k] = self.cats.coarse_classify_char(chr(k))
+        return code
+
+
 class Fragment(namedtuple('Fragment', 're group')):
     """
     Container for a fragment.
@@ -419,6 +541,47 @@ def Tree():
     return defaultdict(list)
 
 
+class MultiPatternMatcher(object):
+    """
+    Matches strings against a list of regular expressions in a single
+    pass, giving the same answer as trying each one in turn and stopping
+    at the first that matches.
+
+    The patterns are compiled into a single alternation, with each
+    alternative wrapped in a capture group. The last group to close
+    in a successful match is always the outer group of the alternative
+    that matched, so ``m.lastindex`` identifies the pattern.
+
+    If the combined expression can't be compiled, this falls back to
+    matching against each pattern in turn.
+    """
+    def __init__(self, rexes):
+        self.rexes = list(rexes)
+        self.compiled = [cre(r) for r in self.rexes]
+        self.group2index = {}
+        g = 1
+        for i, c in enumerate(self.compiled):
+            self.group2index[g] = i
+            g += c.groups + 1
+        try:
+            self.combined = cre('|'.join('(%s)' % r for r in self.rexes))
+        except (re.error, AssertionError, OverflowError, RecursionError):
+            self.combined = None
+
+    def match_index(self, s):
+        """
+        Returns the index of the first pattern matching s,
+        or None if none does.
+        """
+        if self.combined is not None:
+            m = self.combined.match(s)
+            return None if m is None else self.group2index[m.lastindex]
+        for i, c in enumerate(self.compiled):
+            if c.match(s):
+                return i
+        return None
+
+
 class Examples(object):
     def __init__(self, strings, freqs=None):
         self.strings = strings
@@ -457,6 +620,14 @@ class Extractor(object):
         - None (the default), in which case rexpy's defaults are used
         - False or 0, which means don't use sampling
 
+    n_jobs controls how many worker processes are used to refine
+    the fragments of the different VRLEs found:
+        - None or 1 (the default) means refine them serially, in-process
+        - a larger number means use a pool of up to that many processes
+        - 0 or a negative number means use one process per CPU.
+    Refinement is deterministic, and results are always combined in
+    the same order, so the patterns found do not depend on n_jobs.
+
     Verbose is usually 0 or ``False``. It can be to ``True`` or 1 for various
     extra output, and to higher numbers for even more verbose output.
     The highest level currently used is 2.
@@ -470,12 +641,13 @@ class Extractor(object):
                  min_diff_strings_per_pattern=MIN_DIFF_STRINGS_PER_PATTERN,
                  min_strings_per_pattern=MIN_STRINGS_PER_PATTERN,
                  size=None, seed=None, dialect=DEFAULT_DIALECT,
-                 verbose=VERBOSITY):
+                 n_jobs=None, verbose=VERBOSITY):
         """
         Set class attributes and clean input strings.
         Also performs exraction unless extract=False.
         """
         self.verbose = verbose
+        self.n_jobs = n_jobs
         self.size = size or Size(use_sampling=False if size == 0 else None)
         if self.size.use_sampling:
             self.by_length = Tree()         # Also store examples by length
@@ -683,7 +855,6 @@ class Extractor(object):
         example2v_id = ilist([1]) * len(examples)  # same length as rles
         vrles, sig2rle, sig2vrle = to_vrles(rle_freqs.keys())
         vrle_freqs = IDCounter()
-        refined = []
         for vrle in vrles:
             v_id = vrle_freqs.add(vrle)  # v_ids are the ids of vles
             sig = signature(vrle)
@@ -696,17 +867,21 @@ class Extractor(object):
                                            # initially added
             # Note, these totals include repeats.
 
-        # For each example, record the id of the VRLE to which it belongs
-        # and stash that away inside the Examples object.
+        # For each example, record the id of the VRLE to which it belongs,
+        # and group the example positions by VRLE id, so that each VRLE's
+        # fragments can be analysed using only its own examples.
+        # Stash both away inside the Examples object.
+        v_id2indexes = Tree()
         for i, r_id in enumerate(example2r_id):
-            example2v_id[i] = r_id2v_id[r_id]
+            v_id = r_id2v_id[r_id]
+            example2v_id[i] = v_id
+            v_id2indexes[v_id].append(i)
         self.examples.example2v_id = example2v_id
+        self.examples.v_id2indexes = v_id2indexes
 #        self.examples.example2r_id = example2r_id  # probably don't need
 
         # Refine the fragments in the VRLEs
-        for vrle in vrles:
-            grouped = self.refine_fragments(vrle, vrle_freqs.ids[vrle])
-            refined.append(grouped)
+        refined = self.refine_all_fragments(vrles, vrle_freqs)
 
 #        self.examples.rle_freqs = rle_freqs  # probably don't need
         self.examples.vrle_freqs = vrle_freqs
@@ -734,18 +909,13 @@ class Extractor(object):
         """
         Classify each character in a string into one of the coarse categories
         """
-        return ''.join(self.coarse_classify_char(c) for c in s)
+        return s.translate(self.Cats.coarse_table)
 
     def coarse_classify_char(self, c):
         """
         Classify character into one of the coarse categories
         """
-        Cats = self.Cats
-        for cat in Cats.SpecificCoarseCats:
-            if re.match(cat.re_single, c):
-                return cat.code
-        assert re.match(Cats.Other.re_single, c)
-        return Cats.Other.code
+        return self.Cats.coarse_table[ord(c)]
 
     def run_length_encode_coarse_classes(self, s):
         """
@@ -961,48 +1131,89 @@ class Extractor(object):
 
         strings = examples.strings
         freqs = examples.freqs
-        N = len(strings)
-        matched = [False] * N
-        nRemaining = N
         re_freqs = [0] * len(rexes)
-        if self.results:
-            for j, r in enumerate(rexes):
-                cr = cre(r)
-                for i in range(N):
-                    if not matched[i]:
-                        if re.match(cr, strings[i]):
-                            matched[i] = True
-                            nRemaining -= 1
-                            re_freqs[j] += freqs[i]
-                            if nRemaining == 0:
-                                return [], [], re_freqs
-        indices = [i for i in range(N) if not matched[i]]
-        failures = [strings[i] for i in indices]
-        out_freqs = [freqs[i] for i in indices]
+        if not self.results:
+            return list(strings), list(freqs), re_freqs
+
+        matcher = MultiPatternMatcher(rexes)
+        failures = []
+        out_freqs = []
+        for (x, n) in zip(strings, freqs):
+            j = matcher.match_index(x)
+            if j is None:
+                failures.append(x)
+                out_freqs.append(n)
+            else:
+                re_freqs[j] += n
         return failures, out_freqs, re_freqs
 
     def pattern_matches(self):
-        compiled = [cre(r) for r in self.results.rex]
+        matcher = MultiPatternMatcher(self.results.rex)
         results = OrderedDict()
         for x in self.examples.strings:
-            for i, r in enumerate(self.results.rex):
-                cr = cre(r)
-                if re.match(cr, x):
-                    try:
-                        results[i].append(x)
-                    except:
-                        results[i] = [x]
-                    break
+            i = matcher.match_index(x)
+            if i is not None:
+                try:
+                    results[i].append(x)
+                except:
+                    results[i] = [x]
             else:
                 # TODO: should never happen, so should raise an exception
                 print('Example "%s" did not match any pattern' % x)
         return results
 
-    def analyse_fragments(self, vrle, v_id):
+    def refine_all_fragments(self, vrles, vrle_freqs):
+        """
+        Refine the fragments of each of the vrles provided, returning
+        the refined patterns in the same order as the vrles.
+
+        If self.n_jobs asks for more than one job, the VRLEs are farmed
+        out to a pool of worker processes, each of which is sent only the
+        examples for the VRLEs it is refining.
+        """
+        v_ids = [vrle_freqs.ids[vrle] for vrle in vrles]
+        n_jobs = min(effective_n_jobs(self.n_jobs), len(vrles))
+        if n_jobs <= 1:
+            return [self.refine_fragments(vrle, v_id)
+                    for (vrle, v_id) in zip(vrles, v_ids)]
+
+        tasks = [(vrle, v_id, self.vrle_examples(v_id))
+                 for (vrle, v_id) in zip(vrles, v_ids)]
+        chunksize = max(1, len(tasks) // (4 * n_jobs))
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 initializer=_init_refine_worker,
+                                 initargs=(self.worker_copy(),)) as pool:
+            return list(pool.map(_refine_in_worker, tasks,
+                                 chunksize=chunksize))
+
+    def worker_copy(self):
+        """
+        Returns a copy of this extractor, without its examples, results
+        and check function, suitable for sending to worker processes
+        to refine fragments.
+        """
+        x = copy.copy(self)
+        for name in ('all_examples', 'examples', 'results', 'by_length'):
+            x.__dict__.pop(name, None)
+        x.check_fn = None
+        x.prng_state = None
+        return x
+
+    def vrle_examples(self, v_id):
+        """
+        Returns the example strings belonging to the VRLE with id v_id.
+        """
+        strings = self.examples.strings
+        return [strings[i] for i in self.examples.v_id2indexes[v_id]]
+
+    def analyse_fragments(self, vrle, v_id, strings=None):
         """
         Analyse the contents of each fragment in vrle across the
         examples it matches.
 
+        If strings is provided, it should be the list of examples
+        belonging to the VRLE; otherwise they are looked up from v_id.
+
         Return zip of
 
           - the characters in each fragment
@@ -1013,7 +1224,6 @@ class Extractor(object):
 
         all indexed on the (zero-based) group number.
         """
-        examples = self.examples
         regex = cre(self.vrle2re(vrle, tagged=True))
         n_frags = len(vrle)
         frag_chars = [set([]) for i in range(n_frags)]
@@ -1023,42 +1233,43 @@ class Extractor(object):
         frag_rlecs = [None] * n_frags   # Start as None; end as False or VRLE
 
         n_strings = [0] * n_frags
-        strings = examples.strings
-        v_ids = examples.example2v_id
+        if strings is None:
+            strings = self.vrle_examples(v_id)  # Only examples for this VRLE
         size = self.size
-        for i, example in enumerate(strings):
-            if v_ids[i] == v_id:  # Only need to use examples for this VRLE
-                m = re.match(regex, example)
-                assert m is not None
-                f = group_map_function(m, n_frags)
-                for i, frag in enumerate(vrle):
-                    try:
-                        g = m.group(f(i + 1))
-                    except:
-                        print('>>>', regex.pattern)
-                        print(n_frags, i)
-                        raise
-
-                    if n_strings[i] <= size.max_strings_in_group:
-                        frag_strings[i].add(g)
-                        n_strings[i] = len(frag_strings[i])
-                    frag_chars[i] = frag_chars[i].union(set(list(g)))
-                    (frag_rlefcs[i],
-                     frag_rlecs[i]) = self.rle_fc_c(g, frag,
-                                                     frag_rlefcs[i],
-                                                     frag_rlecs[i])
+        for example in strings:
+            m = re.match(regex, example)
+            assert m is not None
+            f = group_map_function(m, n_frags)
+            for i, frag in enumerate(vrle):
+                try:
+                    g = m.group(f(i + 1))
+                except:
+                    print('>>>', regex.pattern)
+                    print(n_frags, i)
+                    raise
+
+                if n_strings[i] <= size.max_strings_in_group:
+                    frag_strings[i].add(g)
+                    n_strings[i] = len(frag_strings[i])
+                frag_chars[i].update(g)
+                (frag_rlefcs[i],
+                 frag_rlecs[i]) = self.rle_fc_c(g, frag,
+                                                 frag_rlefcs[i],
+                                                 frag_rlecs[i])
         if self.verbose >= 2:
             print('Fine Class VRLE:', frag_rlefcs)
             print('      Char VRLE:', frag_rlecs)
         return zip(frag_chars, frag_strings, frag_rlefcs, frag_rlecs, vrle)
 
-    def refine_fragments(self, vrle, v_id):
+    def refine_fragments(self, vrle, v_id, strings=None):
         """
         Refine the categories for variable-run-length-encoded pattern (vrle)
         provided by narrowing the characters in each fragment.
+
+        If strings is provided, it should be the list of examples
+        belonging to the VRLE; otherwise they are looked up from v_id.
         """
-        examples = self.examples
-        ga = self.analyse_fragments(vrle, v_id)
+        ga = self.analyse_fragments(vrle, v_id, strings)
         out = []
         Cats = self.Cats
         size = self.size
@@ -1474,6 +1685,181 @@ class Extractor(object):
         return results, tree
 
 
+class StreamingExtractor(object):
+    """
+    Accumulates compact, mergeable state from which regular expressions
+    can be extracted, for inputs too large to hold in memory.
+
+    Strings are added in chunks, with add(), each chunk being either
+    a list (or other iterable) of strings, or a string-keyed dictionary
+    (or counter) of frequencies. Nulls are counted and ignored, and strings
+    are stripped and empties removed if requested, just as by Extractor.
+
+    The state kept consists of:
+
+      - ``rle_freqs``: a counter of the total frequency of each run-length
+        encoded coarse pattern (RLE) seen;
+
+      - ``samples``: for each RLE, a sample of at most ``size.n_per_length``
+        of the distinct strings with that RLE, together with their
+        (exact) frequencies.
+
+    The sample for each RLE consists of the strings with the smallest
+    (CRC32) hash values, so it is a deterministic, uniform sample of
+    the distinct strings, and two states can be combined with merge()
+    to give exactly the state that would have been obtained by adding
+    all their inputs to one. So partial states can be built from
+    different chunks, files or processes and then merged.
+
+    Every RLE seen is represented in the sample, so every string added
+    matches at least a coarse form of some pattern extracted;
+    when no RLE has more distinct strings than the sample size,
+    the results are the same as from extracting from all the inputs.
+
+    extract() builds an Extractor from the sampled strings and returns
+    its results.
+    """
+    def __init__(self, extra_letters=None, strip=False, remove_empties=False,
+                 size=None):
+        self.extra_letters = extra_letters
+        self.strip = strip
+        self.remove_empties = remove_empties
+        self.size = size or Size()
+        self.n_per_rle = self.size.n_per_length
+        self.Cats = Categories(extra_letters)
+        self.n_stripped = 0
+        self.n_empties = 0
+        self.n_nulls = 0
+        self.rle_freqs = Counter()
+        self.samples = {}       # rle --> {string: freq}
+        self.thresholds = {}    # rle --> largest key in full sample
+
+    def add(self, chunk):
+        """
+        Add a chunk of strings, given as a list (or other iterable)
+        of strings or as a string-keyed dictionary of frequencies.
+
+        Returns self, so that calls can be chained.
+        """
+        if not isinstance(chunk, dict):
+            chunk = Counter(chunk)
+        for s, n in chunk.items():
+            if s is None:
+                self.n_nulls += n
+                continue
+            elif n == 0:
+                continue
+            stripped = s.strip() if self.strip else s
+            if self.remove_empties and len(stripped) == 0:
+                self.n_empties += n
+                continue
+            if len(stripped) != len(s):
+                self.n_stripped += n
+            self.add_string(stripped, n)
+        return self
+
+    def add_string(self, s, n=1, rle=None):
+        """
+        Add (already cleaned) string s, with frequency n.
+        """
+        rle = rle or self.rle(s)
+        self.rle_freqs[rle] += n
+        sample = self.samples.get(rle)
+        if sample is None:
+            self.samples[rle] = {s: n}
+        elif s in sample:
+            sample[s] += n
+        elif len(sample) < self.n_per_rle:
+            sample[s] = n
+            if len(sample) == self.n_per_rle:
+                self.thresholds[rle] = max(sample_key(x) for x in sample)
+        elif sample_key(s) < self.thresholds[rle]:
+            del sample[self.thresholds[rle][1]]
+            sample[s] = n
+            self.thresholds[rle] = max(sample_key(x) for x in sample)
+
+    def rle(self, s):
+        """
+        Run-length encoded coarse classification of s, as used by Extractor.
+        """
+        rle = run_length_encode(s.translate(self.Cats.coarse_table))
+        return rle if len(rle) <= MAX_GROUPS else run_length_encode(
+                                                        CODE.ANY * len(s))
+
+    def merge(self, other):
+        """
+        Merge the state from another StreamingExtractor into this one.
+        The other StreamingExtractor must have been created with
+        the same parameters.
+
+        Returns self, so that calls can be chained.
+        """
+        if ((self.extra_letters, self.strip, self.remove_empties,
+             self.n_per_rle)
+                != (other.extra_letters, other.strip, other.remove_empties,
+                    other.n_per_rle)):
+            raise ValueError('Cannot merge StreamingExtractors with '
+                             'different parameters.')
+        self.n_stripped += other.n_stripped
+        self.n_empties += other.n_empties
+        self.n_nulls += other.n_nulls
+        for rle, sample in other.samples.items():
+            for s, n in sample.items():
+                self.add_string(s, n, rle=rle)
+            # Also count strings that were seen but not kept in the sample
+            self.rle_freqs[rle] += other.rle_freqs[rle] - sum(sample.values())
+        return self
+
+    def examples(self):
+        """
+        Returns a Counter of the sampled strings.
+
+        Frequencies are scaled up so that the total for each RLE is the
+        total number of strings seen with that RLE; this makes no
+        difference for RLEs whose distinct strings were all kept.
+        """
+        counter = Counter()
+        for rle in sorted(self.samples):  # Sorted so as not to depend on
+            sample = self.samples[rle]     # the order strings were added
+            total = sum(sample.values())
+            scale = self.rle_freqs[rle] / float(total)
+            for s, n in sorted(sample.items()):
+                counter[s] = n if scale == 1 else max(1, int(round(n * scale)))
+        return counter
+
+    def vrles(self):
+        """
+        Returns the variable run-length encoded patterns for the RLEs seen.
+        """
+        return to_vrles(self.rle_freqs.keys())[0]
+
+    def extract(self, as_object=False, **kwargs):
+        """
+        Extract regular expressions from the (sampled) state.
+
+        Keyword arguments are passed on to Extractor.
+        If as_object is set, the Extractor object is returned;
+        otherwise, a list of regular expressions is returned.
+        """
+        x = Extractor(self.examples(), extract=False,
+                      extra_letters=self.extra_letters,
+                      strip=self.strip, remove_empties=self.remove_empties,
+                      size=self.size, **kwargs)
+        x.n_stripped = self.n_stripped
+        x.n_empties = self.n_empties
+        x.n_nulls = self.n_nulls
+        x.extract()
+        return x if as_object else x.results.rex if x.results else []
+
+
+def sample_key(s):
+    """
+    Key used to choose the strings kept in a StreamingExtractor's samples;
+    stable across processes, unlike hash().
+    """
+    return (zlib.crc32(s.encode('UTF-8', 'surrogatepass')), s)
+
+
 def example_check_function(rexes, maxN=None):
     """
     **CHECK FUNCTIONS**
@@ -1545,22 +1931,13 @@ def rex_coverage(patterns, examples, dedup=False):
     If ``dedup`` is set to ``True``, the frequencies are ignored, so that only
     the number of keys is returned.
     """
-    results = []
-    for p in patterns:
-        p = '%s%s%s' % ('' if p.startswith('^') else '^',
-                        p,
-                        '' if p.endswith('$') else '$')
-        r = re.compile(p, RE_FLAGS)
-        if dedup:
-            strings = examples.strings
-            results.append(sum(1 if re.match(r, k) else 0
-                               for k in strings))
-        else:
-            strings = examples.strings
-            freqs = examples.freqs
-            results.append(sum(n if re.match(r, k) else 0
-                           for (k, n) in zip(strings, freqs)))
-    return results
+    terminated = ['%s%s%s' % ('' if p.startswith('^') else '^',
+                              p,
+                              '' if p.endswith('$') else '$')
+                  for p in patterns]
+    matrix, deduped = coverage_arrays(terminated, examples)
+    totals = (deduped if dedup else matrix).sum(axis=0)
+    return [int(t) for t in totals]
 
 
 def rex_full_incremental_coverage(patterns, examples, sort_on_deduped=False,
@@ -1593,7 +1970,7 @@ def rex_full_incremental_coverage(patterns, examples, sort_on_deduped=False,
             excluding duplicates
     """
     patterns, indexes = terminate_patterns_and_sort(patterns)
-    matrix, deduped = coverage_matrices(patterns, examples)
+    matrix, deduped = coverage_arrays(patterns, examples)
     return matrices2incremental_coverage(patterns, matrix, deduped, indexes,
                                          examples,
                                          sort_on_deduped=sort_on_deduped)
@@ -1692,19 +2069,25 @@ def rex_incremental_coverage(patterns, examples, sort_on_deduped=False,
 
 
 def coverage_matrices(patterns, examples):
-    # Compute the 2 coverage matrices:
+    # Compute the 2 coverage matrices, as lists of rows:
     #   matrix:  1 row per example, with a count of number of matches
-    #   deduped: 1 row per example, with a boolean where it matches
+    #   deduped: 1 row per example, with a 1 where it matches
+
+    matrix, deduped = coverage_arrays(patterns, examples)
+    return matrix.tolist(), deduped.tolist()
+
+
+def coverage_arrays(patterns, examples):
+    # The same 2 coverage matrices as coverage_matrices,
+    # as NumPy integer arrays, as used internally.
 
-    matrix = []
-    deduped = []  # deduped version of same
-    rexes = [re.compile(p, RE_FLAGS) for p in patterns]
+    rexes = [cre(p) for p in patterns]
     strings = examples.strings
-    freqs = examples.freqs
-    for (x, n) in zip(strings, freqs):
-        row = [n if re.match(r, x) else 0 for r in rexes]
-        matrix.append(row)
-        deduped.append([1 if r else 0 for r in row])
+    deduped = np.zeros((len(strings), len(rexes)), dtype=np.int64)
+    for j, r in enumerate(rexes):
+        deduped[:, j] = [r.match(x) is not None for x in strings]
+    freqs = np.asarray(examples.freqs, dtype=np.int64).reshape(-1, 1)
+    matrix = deduped * freqs
     return matrix, deduped
 
 
@@ -1715,58 +2098,50 @@ def matrices2incremental_coverage(patterns, matrix, deduped, indexes,
 
     Then set overlapping matches to zero and repeat.
 
+    The matrices can be lists of rows, as returned by coverage_matrices,
+    or NumPy arrays, as returned by coverage_arrays; rather than
+    recomputing column totals on each pass, the totals for the examples
+    zeroed are subtracted from them.
+
     Returns ordered dict, sorted by incremental match rate,
     with number of (previously unaccounted for) strings matched.
     """
     results = OrderedDict()
-    sort_matrix = deduped if sort_on_deduped else matrix
-    np = len(patterns)
-    zeros = [0] * np
-    strings = examples.strings
-    pattern_freqs = [sum(matrix[i][r] for i, x in enumerate(strings))
-                     for r in range(np)]
-    pattern_uniqs = [sum(deduped[i][r] for i, x in enumerate(strings))
-                     for r in range(np)]
+    n_patterns = len(patterns)
+    matrix = np.array(matrix, dtype=np.int64).reshape(-1, n_patterns)
+    deduped = np.array(deduped, dtype=np.int64).reshape(-1, n_patterns)
+    pattern_freqs = matrix.sum(axis=0)
+    pattern_uniqs = deduped.sum(axis=0)
+    totals = pattern_freqs.copy()
+    uniq_totals = pattern_uniqs.copy()
+    sort_totals = uniq_totals if sort_on_deduped else totals
     some_left = True
-    while some_left and len(results) < np:
-        totals = [sum(row[i] for row in matrix) for i in range(np)]
-        uniq_totals = [sum(row[i] for row in deduped) for i in range(np)]
-        M, uM = max(totals), max(uniq_totals)
-        if sort_on_deduped:
-            sort_totals = uniq_totals
-            target = uM
-        else:
-            sort_totals = totals
-            target = M
-
-        if target > 0:
-            # find pattern with frequency of target
-            p = 0  # index of pattern
-            while sort_totals[p] < target:
-                p += 1
+    while some_left and len(results) < n_patterns:
+        if n_patterns and sort_totals.max() > 0:
+            # find (first) pattern with the largest frequency
+            p = int(np.argmax(sort_totals))
             rex = patterns[p]
 
-            in_results = rex in results
-            if not in_results:
-                for i in range(examples.n_uniqs):
-                    if matrix[i][p]:
-                        matrix[i] = zeros
-                        deduped[i] = zeros
-                        zeroed = True
-                results[rex] = Coverage(n=pattern_freqs[p],
-                                        n_uniq=pattern_uniqs[p],
-                                        incr=totals[p],
-                                        incr_uniq=uniq_totals[p],
+            if rex not in results:
+                results[rex] = Coverage(n=int(pattern_freqs[p]),
+                                        n_uniq=int(pattern_uniqs[p]),
+                                        incr=int(totals[p]),
+                                        incr_uniq=int(uniq_totals[p]),
                                         index=indexes[p])
+                rows = matrix[:, p] != 0
+                totals -= matrix[rows].sum(axis=0)
+                uniq_totals -= deduped[rows].sum(axis=0)
+                matrix[rows] = 0
+                deduped[rows] = 0
         else:
             some_left = False
 
-    if some_left and len(results) < np:
-        for p in range(np):
+    if some_left and len(results) < n_patterns:
+        for p in range(n_patterns):
             rex = patterns[p]
             if rex not in results:
-                results[rex] = Coverage(n=pattern_freqs[p],
-                                        n_uniq=pattern_uniqs[p],
+                results[rex] = Coverage(n=int(pattern_freqs[p]),
+                                        n_uniq=int(pattern_uniqs[p]),
                                         incr=0, incr_uniq=0,
                                         index=indexes[p])
     return results
@@ -2052,6 +2427,187 @@ class PRNGState:
             random.setstate(self.saved)
 
 
+REXPY_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.tdda_rexpy_cache')
+REXPY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class RexpyCache(object):
+    """
+    Persistent, content-addressed cache of rexpy results.
+
+    Each result is stored as a small JSON file in a local directory,
+    named by a fingerprint of the (sorted, distinct) example strings,
+    their frequencies and the parameters used for extraction,
+    so a result found once can be reused across runs and processes.
+
+    The total size of the files in the directory is kept to at
+    most max_bytes by removing the least recently used entries
+    (by modification time, which is refreshed on every hit).
+    """
+    def __init__(self, directory=None, max_bytes=REXPY_CACHE_MAX_BYTES):
+        self.directory = os.path.expanduser(directory or REXPY_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['lock']       # locks can't be pickled
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def key(self, examples, **params):
+        """
+        Returns the fingerprint for extracting from examples (a list of
+        strings or a dictionary of string frequencies) with the given
+        extraction parameters, or None if the examples can't be
+        fingerprinted (e.g. if they are a function, or include
+        non-string values).
+        """
+        if callable(examples):
+            return None
+        if isinstance(examples, dict):
+            freqs = {k: v for (k, v) in examples.items() if k is not None}
+        else:
+            freqs = Counter(x for x in examples if x is not None)
+        if not all(type(x) is str_type for x in freqs):
+            return None
+        size = params.get('size')
+        if isinstance(size, Size):
+            params['size'] = sorted(size.__dict__.items())
+        h = hashlib.sha256()
+        h.update(json.dumps([__version__, sorted(params.items())],
+                            default=str).encode('UTF-8'))
+        for x in sorted(freqs):
+            b = x.encode('UTF-8', 'surrogatepass')
+            h.update(b'%d:%d:' % (freqs[x], len(b)))
+            h.update(b)
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """
+        Returns the cached list of regular expressions for key,
+        or None if there isn't one.
+        """
+        path = self.path(key)
+        try:
+            with open(path, encoding='UTF-8') as f:
+                rexes = json.load(f)
+            os.utime(path)      # mark as recently used
+        except (OSError, ValueError):
+            rexes = None
+        with self.lock:
+            if rexes is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return rexes
+
+    def put(self, key, rexes):
+        """
+        Stores the list of regular expressions rexes under key,
+        then evicts old entries if the cache has grown too large.
+        """
+        path = self.path(key)
+        tmppath = '%s.%d.%d.tmp' % (path, os.getpid(), threading.get_ident())
+        with open(tmppath, 'w', encoding='UTF-8') as f:
+            json.dump(list(rexes), f)
+        os.replace(tmppath, path)   # atomic, so readers never see partials
+        self.evict()
+
+    def entries(self):
+        """
+        Returns a list of (mtime, size, path) for the entries in the cache,
+        least recently used first.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue    # removed by another process
+                entries.append((st.st_mtime, st.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        """
+        Removes least recently used entries until the total size
+        of the cache is no more than max_bytes.
+        """
+        entries = self.entries()
+        total = sum(size for (_, size, _) in entries)
+        for (_, size, path) in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def info(self):
+        """
+        Returns a CacheInfo named tuple with the numbers of hits and misses,
+        and the maximum and current sizes of the cache, in bytes.
+        """
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        currsize = sum(size for (_, size, _) in self.entries())
+        return CacheInfo(hits, misses, self.max_bytes, currsize)
+
+    def clear(self):
+        """
+        Removes all entries from the cache and resets its counters.
+        """
+        for (_, _, path) in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+
+
+def rexpy_cache(cache):
+    """
+    Returns a RexpyCache given a cache parameter, which may be
+    None or False (for no cache), True (to use the default directory),
+    a directory path, or a RexpyCache.
+    """
+    if cache is None or cache is False:
+        return None
+    elif cache is True:
+        return RexpyCache()
+    elif isinstance(cache, RexpyCache):
+        return cache
+    else:
+        return RexpyCache(cache)
+
+
+_worker_extractor = None
+
+
+def _init_refine_worker(extractor):
+    global _worker_extractor
+    _worker_extractor = extractor
+
+
+def _refine_in_worker(task):
+    vrle, v_id, strings = task
+    return _worker_extractor.refine_fragments(vrle, v_id, strings)
+
+
 def extract(examples, tag=False, encoding=None, as_object=False,
             extra_letters=None, full_escape=False,
             remove_empties=False, strip=False,
@@ -2059,7 +2615,8 @@ def extract(examples, tag=False, encoding=None, as_object=False,
             max_patterns=MAX_PATTERNS,
             min_diff_strings_per_pattern=MIN_DIFF_STRINGS_PER_PATTERN,
             min_strings_per_pattern=MIN_STRINGS_PER_PATTERN, size=None,
-            seed=None, dialect=DEFAULT_DIALECT, verbose=VERBOSITY):
+            seed=None, dialect=DEFAULT_DIALECT, n_jobs=None,
+            cache=None, verbose=VERBOSITY):
     """
     Extract regular expression(s) from examples and return them.
 
@@ -2072,23 +2629,60 @@ def extract(examples, tag=False, encoding=None, as_object=False,
     If as_object is set, the extractor object is returned,
     with results in .results.rex; otherwise, a list of regular
     expressions, as unicode strings is returned.
+
+    If n_jobs is more than 1, fragment refinement is spread across
+    that many worker processes (0 or negative for one per CPU).
+    The results are the same as for serial extraction.
+
+    If cache is provided (as a RexpyCache, a directory path, or True
+    for the default directory), results are looked up in, and stored in,
+    a persistent on-disk cache, keyed on the examples and the parameters
+    affecting extraction. The cache is not used when as_object is set.
     """
     if encoding and not callable(examples):
         if isinstance(examples, dict):
             examples ={x.decode(encoding): n for (x, n) in examples.items()}
         else:
             examples = [x.decode(encoding) for x in examples]
+    cache = None if as_object else rexpy_cache(cache)
+    if cache:
+        key = cache.key(examples, tag=tag, extra_letters=extra_letters,
+                        full_escape=full_escape,
+                        remove_empties=remove_empties, strip=strip,
+                        variableLengthFrags=variableLengthFrags,
+                        max_patterns=max_patterns,
+                        min_diff_strings_per_pattern=
+                            min_diff_strings_per_pattern,
+                        min_strings_per_pattern=min_strings_per_pattern,
+                        size=size, seed=seed, dialect=dialect)
+        if key:
+            rexes = cache.get(key)
+            if rexes is not None:
+                return rexes
+            rexes = extract(examples, tag=tag, extra_letters=extra_letters,
+                            full_escape=full_escape,
+                            remove_empties=remove_empties, strip=strip,
+                            variableLengthFrags=variableLengthFrags,
+                            max_patterns=max_patterns,
+                            min_diff_strings_per_pattern=
+                                min_diff_strings_per_pattern,
+                            min_strings_per_pattern=min_strings_per_pattern,
+                            size=size, seed=seed, dialect=dialect,
+                            n_jobs=n_jobs, verbose=verbose)
+            cache.put(key, rexes)
+            return rexes
     r = Extractor(examples, tag=tag, extra_letters=extra_letters,
                   full_escape=full_escape, remove_empties=remove_empties,
                   strip=strip, variableLengthFrags=variableLengthFrags,
                   max_patterns = max_patterns,
                   min_diff_strings_per_pattern = min_diff_strings_per_pattern,
                   min_strings_per_pattern = min_strings_per_pattern,
-                  size=size, seed=seed, dialect=dialect, verbose=verbose)
+                  size=size, seed=seed, dialect=dialect, n_jobs=n_jobs,
+                  verbose=verbose)
     return r if as_object else r.results.rex if r.results else []
 
 
-def pdextract(cols, seed=None):
+def pdextract(cols, seed=None, cache=None):
     """
     Extract regular expression(s) from the Pandas column (``Series``) object
     or list of Pandas columns given.
@@ -2115,21 +2709,46 @@ def pdextract(cols, seed=None):
         re5   = '^[a-z]{3}$'
         re345 = '^[a-z]{3}$'
 
+    The frequency of each distinct value is passed on to the extractor,
+    so that sampling and the minimum number of strings per pattern take
+    account of how common each value is.
+
+    If cache is provided, it is used as for :py:func:`extract`.
+
     """
     if type(cols) not in (list, tuple):
         cols = [cols]
-    strings = []
+    freqs = Counter()
     for c in cols:
-        strings.extend(list(c.dropna().unique()))
+        freqs.update(pd_value_frequencies(c))
     try:
-        return extract(strings, seed=seed)
+        return extract(freqs, seed=seed, cache=cache)
     except:
-        if not all(type(s) == str_type for s in strings):
+        if not all(type(s) == str_type for s in freqs):
             raise ValueError('Non-null, non-string values found in input.')
         else:
             raise
 
 
+def pd_value_frequencies(col):
+    """
+    Returns a dictionary mapping each distinct non-null value in
+    the Pandas column (``Series``) col to the number of times it occurs.
+
+    For categorical columns, this is computed from the category codes,
+    without materializing the values.
+    """
+    if hasattr(col, 'cat'):
+        codes = np.asarray(col.cat.codes)
+        counts = np.bincount(codes[codes >= 0],
+                             minlength=len(col.cat.categories))
+        return {v: n for (v, n) in zip(col.cat.categories, counts.tolist())
+                if n > 0}
+    else:
+        counts = col.value_counts(dropna=True)
+        return dict(zip(counts.index, counts.tolist()))
+
+
 def get_omnipresent_at_pos(fragFreqCounters, n, **kwargs):
     """
     Find patterns in ``fragFreqCounters`` for which the frequency is ``n``.
@@ -2279,8 +2898,8 @@ def length_stats(patterns):
 
 
 def get_nCalls():
-    global nCalls
-    return nCalls
+    info = RE_CACHE.info()
+    return info.hits + info.misses
 
 
 def rexpy_streams(in_path=None, out_path=None, skip_header=False,
@@ -2295,27 +2914,26 @@ def rexpy_streams(in_path=None, out_path=None, skip_header=False,
         None:             to write outputs to stdout
         path to file:     to write outputs from file at out_path
         False:            to return the strings as a list
+
+    Input read from a file or stdin is streamed line by line and counted,
+    so memory use depends on the number of distinct lines, rather than
+    the total number. Compressed input is decompressed transparently.
     """
     verbose = kwargs.get('verbose', 0)
     if type(in_path) in (list, tuple):
-        strings = in_path
+        strings = in_path[1:] if skip_header else in_path
     elif in_path:
         if verbose:
             print('Reading file %s.' % in_path)
-        with open(in_path) as f:
-            strings = f.read().splitlines()
+        strings = count_lines(in_path, skip_header=skip_header)
         if verbose:
             print('Read file %s' % in_path)
     else:
         if verbose:
             print('Ingesting strings')
-        strings = [s.strip() for s in sys.stdin.readlines()]
-        if strings and type(strings[0]) == bytes_type:
-            strings = [s.decode('UTF-8') for s in strings]
+        strings = count_lines(None, skip_header=skip_header, strip=True)
         if verbose:
             print('Ingested strings.')
-    if skip_header:
-        strings = strings[1:]
     if verbose:
         print('Extracting strings')
     patterns = extract(strings, **kwargs)
@@ -2338,6 +2956,59 @@ def rexpy_streams(in_path=None, out_path=None, skip_header=False,
             print(p)
 
 
+COMPRESSION_MAGIC = (
+    (b'\x1f\x8b', gzip.open),
+    (b'BZh', bz2.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+)
+
+
+def open_text_input(path=None):
+    """
+    Open the file at path (or standard input, if path is None) for reading
+    as text, transparently decompressing gzip, bzip2 and xz input
+    (as identified by its leading "magic" bytes).
+    """
+    binary = open(path, 'rb') if path else sys.stdin.buffer
+    if not hasattr(binary, 'peek'):
+        binary = io.BufferedReader(binary)
+    magic = binary.peek(6)[:6]
+    for prefix, opener in COMPRESSION_MAGIC:
+        if magic.startswith(prefix):
+            if path:  # reopen by name, so closing closes the file too
+                binary.close()
+                return io.TextIOWrapper(opener(path))
+            return io.TextIOWrapper(opener(binary))
+    return io.TextIOWrapper(binary)
+
+
+def count_lines(path=None, skip_header=False, strip=False):
+    """
+    Read lines from the file at path (or from standard input, if path
+    is None), one at a time, and return a Counter of their frequencies.
+
+    Lines are split as by str.splitlines. If strip is set,
+    each line is stripped.
+    """
+    counter = Counter()
+    f = open_text_input(path)
+    try:
+        first = True
+        for line in f:
+            for s in line.splitlines():
+                if first and skip_header:
+                    first = False
+                    continue
+                first = False
+                counter[s.strip() if strip else s] += 1
+    finally:
+        if path:
+            f.close()
+        else:
+            f.detach()
+    return counter
+
+
 def get_params(args):
     params = {
         'in_path': '',
@@ -203,12 +203,17 @@ Goal:
  +  d{1,2}        s       d{2,3}  s     d{3,4}  s  d{4}
 """
 
+import bz2
+import gzip
+import lzma
 import os
 import random
+import shutil
 import sys
+import tempfile
 import unittest
 
-from collections import OrderedDict
+from collections import Counter, OrderedDict
 
 try:
     import pandas
@@ -415,6 +420,52 @@ class TestUtilityFunctions(ReferenceTestCase):
                               ' c   /   !'])
         self.assertEqual(x.aligned_parts(parts), expected)
 
+    def test_multi_pattern_matcher(self):
+        rexes = [r'^([a-z]+)\-(([0-9])+)$', r'^([a-z]+)\-.*$', r'^\d+$',
+                 r'^(a|(b))$', r'^.*$']
+        strings = ['ab-12', 'ab-x', '123', 'a', 'b', 'a\n', '', 'Q-1', '1b']
+        m = MultiPatternMatcher(rexes)
+        self.assertIsNotNone(m.combined)
+        for s in strings:
+            expected = [i for (i, r) in enumerate(rexes) if re.match(r, s)]
+            self.assertEqual(m.match_index(s),
+                             expected[0] if expected else None)
+        m = MultiPatternMatcher(rexes[:3])
+        self.assertIsNone(m.match_index('a'))
+        self.assertIsNone(m.match_index('1b'))
+
+    def test_find_non_matches_attribution(self):
+        x = Extractor({'ab': 3, 'cd': 2, '12': 1, '1a': 4, '-': 5})
+        failures, freqs, re_freqs = x.find_non_matches([r'^[a-z]+$',
+                                                        r'^[a-c]+$',
+                                                        r'^[0-9a-z]+$'])
+        self.assertEqual(failures, ['-'])
+        self.assertEqual(list(freqs), [5])
+        self.assertEqual(re_freqs, [5, 0, 5])
+
+    def test_regex_cache(self):
+        cache = RegexCache(maxsize=2)
+        a = cache.get('^a$')
+        self.assertIs(cache.get('^a$'), a)
+        cache.get('^b$')
+        cache.get('^a$')         # a is now most recently used
+        cache.get('^c$')         # so b is evicted
+        self.assertEqual(cache.info(), CacheInfo(hits=2, misses=3,
+                                                 maxsize=2, currsize=2))
+        self.assertEqual(list(cache.cache.keys()), ['^a$', '^c$'])
+        cache.resize(1)
+        self.assertEqual(list(cache.cache.keys()), ['^c$'])
+        cache.clear()
+        self.assertEqual(cache.info(), CacheInfo(0, 0, 1, 0))
+
+        before = cre_cache_info()
+        cre('^shared cache test$')
+        cre('^shared cache test$')
+        after = cre_cache_info()
+        self.assertEqual(after.hits + after.misses,
+                         before.hits + before.misses + 2)
+        self.assertGreaterEqual(after.hits, before.hits + 1)
+
     def testIDCounter(self):
         c = IDCounter()
         self.assertEqual(c.add('two'), 1)
@@ -501,6 +552,19 @@ class TestHelperMethods(ReferenceTestCase):
         self.assertEqual(x.coarse_classify('2016-01-02T10:11:12\a+0300z'),
                                            CtoUC('CCCC.CC.CCCCC.CC.CC*.CCCCC'))
 
+    def test_coarse_table_matches_regex_classification(self):
+        for extras in (None, '_', '.', '-', '_.-'):
+            cats = Categories(extras)
+            for i in list(range(0, 0x250)) + [0x1E08, 0x2028, 0x3000, 0xFF10]:
+                c = chr(i)
+                self.assertEqual(cats.coarse_table[i],
+                                 cats.coarse_classify_char(c))
+            s = 'Ḉaf_9-é.\t\x07(z) ٣'
+            x = Extractor([], extra_letters=extras)
+            self.assertEqual(x.coarse_classify(s),
+                             ''.join(x.Cats.coarse_classify_char(c)
+                                     for c in s))
+
     def test_run_length_encoding(self):
         self.assertEqual(run_length_encode(''), ())
 
@@ -594,6 +658,17 @@ class TestHelperMethods(ReferenceTestCase):
         self.assertEqual(freqs[key1], 2)
         self.assertEqual(freqs[key2], 1)
 
+    def test_batch_extract_vrle_index(self):
+        examples = ['123-AB-321', '12-AB-4321', 'abc', 'x y', 'pq r']
+        x = Extractor(examples)
+        ex = x.examples
+        indexes = sorted(i for v in ex.v_id2indexes.values() for i in v)
+        self.assertEqual(indexes, list(range(len(ex.strings))))
+        for v_id, positions in ex.v_id2indexes.items():
+            for i in positions:
+                self.assertEqual(ex.example2v_id[i], v_id)
+        self.assertEqual(len(ex.v_id2indexes), len(ex.vrle_freqs))
+
     def test_rle2re(self):
         Cats = self.x.Cats
         rle = (('C', 3), ('.', 1), ('C', 2), ('.', 1), ('C', 3))
@@ -1815,6 +1890,18 @@ class TestExtraction(ReferenceTestCase):
         self.assertEqual(re45, ['^[a-z]{4,5}$'])
         self.assertEqual(re345, ['^[a-z]{3,5}$'])
 
+    @unittest.skipIf(pandas is None, 'No pandas here')
+    def testpdextract_categorical(self):
+        values = ['one', 'two', 'two', np.NaN, 'three', 'one', 'one']
+        plain = pd.Series(values)
+        categorical = pd.Series(values, dtype='category')
+        categorical = categorical.cat.add_categories(['unused'])
+        expected = {'one': 3, 'two': 2, 'three': 1}
+        self.assertEqual(pd_value_frequencies(plain), expected)
+        self.assertEqual(pd_value_frequencies(categorical), expected)
+        self.assertEqual(pdextract(categorical), pdextract(plain))
+        self.assertEqual(pdextract(categorical), ['^[a-z]{3,5}$'])
+
     @unittest.skipIf(pandas is None, 'No pandas here')
     def testpdextract2(self):
         df = pd.DataFrame({'ab': ["one", True, np.NaN]})
@@ -1837,6 +1924,27 @@ class TestExtraction(ReferenceTestCase):
                       ([r'''"^[a-z]{3,5} \\\\\\\"\\' [a-z]{3,4}$"'''],
                        [r'''"^[a-z]{3,5} \\\\\"' [a-z]{3,4}$"''']))
 
+    def testRexpyStreamsCompressedFiles(self):
+        lines = ['postcode', 'EH12 3LH', 'AL64 1BB', 'EH12 3LH', 'W1 2AB']
+        text = '\n'.join(lines) + '\n'
+        expected = rexpy_streams(lines, out_path=False, skip_header=True)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            for (ext, opener) in (('txt', open), ('gz', gzip.open),
+                                  ('bz2', bz2.open), ('xz', lzma.open)):
+                path = os.path.join(tmpdir, 'postcodes.' + ext)
+                with opener(path, 'wt') as f:
+                    f.write(text)
+                counts = count_lines(path, skip_header=True)
+                self.assertEqual(counts, Counter({'EH12 3LH': 2,
+                                                  'AL64 1BB': 1,
+                                                  'W1 2AB': 1}))
+                self.assertEqual(rexpy_streams(path, out_path=False,
+                                               skip_header=True),
+                                 expected)
+        finally:
+            shutil.rmtree(tmpdir)
+
     def testConstraints(self):
         inputs = {'aa_bb': 10, '.123': 5, 'a': 1, 'b.' : 2}
         r = extract(inputs)
@@ -1868,6 +1976,83 @@ class TestExtraction(ReferenceTestCase):
         s_seed.restore()  # should restore
         self.assertEqual(random.getstate(), state)
 
+    def test_parallel_refinement(self):
+        inputs = ['123-AB-321', '12-AB-4321', 'EH12 3LH', 'AL64 1BB',
+                  'one', 'two', 'three', 'a.b.c', 'x_y', '(0131) 123 4567',
+                  '1f65c9e8-cf9a-4e53-b7d0-c48a26a21b7c']
+        state = random.getstate()
+        serial = extract(inputs, seed=1234)
+        parallel = extract(inputs, seed=1234, n_jobs=2)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(random.getstate(), state)
+        self.assertEqual(effective_n_jobs(None), 1)
+        self.assertEqual(effective_n_jobs(3), 3)
+        self.assertGreaterEqual(effective_n_jobs(-1), 1)
+
+    def test_streaming_extraction(self):
+        inputs = ['123-AB-321', '12-AB-4321', 'EH12 3LH', 'AL64 1BB', None,
+                  'one', 'two', 'three', 'a.b.c', ' x_y', '(0131) 123 4567',
+                  'one', 'two', '', '1f65c9e8-cf9a-4e53-b7d0-c48a26a21b7c']
+        expected = extract(inputs, strip=True, remove_empties=True)
+        s = StreamingExtractor(strip=True, remove_empties=True)
+        s.add(inputs[:6]).add(Counter(inputs[6:]))
+        self.assertEqual(s.n_nulls, 1)
+        self.assertEqual(s.n_empties, 1)
+        self.assertEqual(s.n_stripped, 1)
+        self.assertEqual(sum(s.rle_freqs.values()), 13)
+        self.assertEqual(s.examples()['one'], 2)
+        self.assertEqual(s.extract(), expected)
+
+    def test_streaming_merge(self):
+        prng = random.Random(1)
+        inputs = [''.join(prng.choice('ab1-') for i in range(3))
+                  for j in range(500)]
+        size = Size(n_per_length=3)
+        whole = StreamingExtractor(size=size).add(inputs)
+        parts = [StreamingExtractor(size=size).add(inputs[i:i + 100])
+                 for i in range(0, 500, 100)]
+        merged = parts[0]
+        for p in parts[1:]:
+            merged.merge(p)
+        self.assertEqual(merged.rle_freqs, whole.rle_freqs)
+        self.assertEqual(merged.samples, whole.samples)
+        self.assertTrue(all(len(v) <= 3 for v in merged.samples.values()))
+        self.assertEqual(sum(merged.examples().values()), 500)
+        self.assertEqual(merged.extract(), whole.extract())
+        self.assertRaises(ValueError, merged.merge, StreamingExtractor())
+
+    def test_result_cache(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            cache = RexpyCache(tmpdir)
+            inputs = ['ab-1', 'cd-22', 'ef-333', 'cd-22']
+            expected = extract(inputs)
+            self.assertEqual(extract(inputs, cache=cache), expected)
+            self.assertEqual(cache.info()[:2], (0, 1))
+            self.assertEqual(extract(list(reversed(inputs)), cache=tmpdir),
+                             expected)
+            self.assertEqual(extract(inputs, cache=cache), expected)
+            self.assertEqual(cache.info()[:2], (1, 1))
+            self.assertEqual(len(cache.entries()), 1)
+            first = cache.entries()[0][2]
+
+            # Different values or parameters mean different entries
+            extract(inputs[:2], cache=cache)
+            extract(inputs, tag=True, cache=cache)
+            extract(inputs, seed=1, cache=cache)
+            self.assertEqual(len(cache.entries()), 4)
+
+            # Least recently used entries are evicted first
+            os.utime(first, (0, 0))
+            cache.max_bytes = cache.info().currsize - 1
+            cache.evict()
+            self.assertEqual(len(cache.entries()), 3)
+            self.assertFalse(os.path.exists(first))
+            cache.clear()
+            self.assertEqual(cache.info(), (0, 0, cache.max_bytes, 0))
+        finally:
+            shutil.rmtree(tmpdir)
+
     def atestSeeding(self):
         inputs = ['a', 'a.a', 'a.a.a', 'a.a.a.a', 'a.a.a.a.a']
         state = random.getstate()
@@ -1,5 +1,22 @@
+import os
+
+
 def nvl(v, w):
     """
     This function is used as syntactic sugar for replacing null values.
     """
     return w if v is None else v
+
+
+def effective_n_jobs(n_jobs):
+    """
+    Number of jobs to use, given an n_jobs parameter, which is
+    None or 1 for serial operation, a larger number for that many jobs,
+    or 0 or negative for one job per CPU.
+    """
+    if n_jobs is None:
+        return 1
+    elif n_jobs <= 0:
+        return os.cpu_count() or 1
+    else:
+        return n_jobs